@@ -0,0 +1,93 @@
+"""Find the batch size at which the pandas batch parser beats the scalar path.
+
+Both paths build the same analysis DataFrame from the same lines:
+  scalar  - LogParser.parse once per line (parse_log_line), then a DataFrame
+  columns - LogParser.parse_fields per line into LogColumns (analyze_logs)
+  batch   - BatchParser.parse_lines with str.extract per batch
+
+Usage:
+    python benchmarks/bench_batch.py --entries 200000
+"""
+import argparse
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent / 'src'))
+
+import pandas as pd
+from batch_parser import BatchParser
+from log_columns import LogColumns
+from log_generator import LogGenerator
+from log_parser import LogParser
+
+BATCH_SIZES = [1, 10, 100, 1000, 10000, 100000]
+
+def best_of(func, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark batch against scalar parsing')
+    parser.add_argument('--entries', type=int, default=200000,
+                        help='Number of generated log lines to parse')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='Number of timed runs; the best one is reported')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        end_time = datetime.now()
+        log_file = LogGenerator(tmp_dir).generate_logs(
+            args.entries, end_time - timedelta(days=1), end_time
+        )
+        with open(log_file, 'rb') as f:
+            raw_lines = f.read().split(b'\n')
+    if not raw_lines[-1]:
+        raw_lines.pop()
+    lines = [line.decode() for line in raw_lines]
+    log_parser = LogParser()
+
+    def scalar():
+        rows = [row for row in map(log_parser.parse, lines) if row is not None]
+        return pd.DataFrame(rows)
+
+    def columns():
+        log_columns = LogColumns()
+        log_columns.add_lines(raw_lines, log_parser.parse_fields)
+        return log_columns.to_frame()
+
+    scalar_time = best_of(scalar, args.repeat)
+    columns_time = best_of(columns, args.repeat)
+    print(f"Lines: {len(lines)}")
+    print(f"{'Path':<16}{'Time (s)':>10}{'Lines/s':>14}")
+    print(f"{'scalar':<16}{scalar_time:>10.3f}{len(lines) / scalar_time:>14,.0f}")
+    print(f"{'columns':<16}{columns_time:>10.3f}{len(lines) / columns_time:>14,.0f}")
+
+    crossover = {}
+    for batch_size in BATCH_SIZES:
+        if batch_size > len(lines):
+            break
+        # Small batches are timed on a sample of lines so the run stays short
+        sample = lines[:batch_size * 500]
+        batch_parser = BatchParser(log_parser, batch_size)
+        elapsed = best_of(lambda: batch_parser.parse_lines(sample), args.repeat)
+        rate = len(sample) / elapsed
+        print(f"{f'batch {batch_size}':<16}{elapsed:>10.3f}{rate:>14,.0f}")
+        for name, baseline in (('scalar', scalar_time), ('columns', columns_time)):
+            if rate > len(lines) / baseline:
+                crossover.setdefault(name, batch_size)
+
+    for name in ('scalar', 'columns'):
+        if name in crossover:
+            print(f"Batch parsing beats {name} from batch size {crossover[name]}")
+        else:
+            print(f"Batch parsing does not beat {name} at any measured batch size")
+
+if __name__ == "__main__":
+    main()
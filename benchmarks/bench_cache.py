@@ -0,0 +1,49 @@
+"""Compare a cold analyze_logs run (parse and fill the cache) with a warm one.
+
+Usage:
+    python benchmarks/bench_cache.py --entries 2000000 --files 4
+"""
+import argparse
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent / 'src'))
+
+from log_analyzer import LogAnalyzer
+from log_generator import LogGenerator
+from parse_cache import ParseCache
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the parsed-column cache')
+    parser.add_argument('--entries', type=int, default=1000000,
+                        help='Total number of generated log lines')
+    parser.add_argument('--files', type=int, default=4,
+                        help='Number of files the lines are spread over')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        log_dir = Path(tmp_dir) / "logs"
+        end_time = datetime.now()
+        generator = LogGenerator(log_dir)
+        for index in range(args.files):
+            log_file = Path(generator.generate_logs(
+                args.entries // args.files, end_time - timedelta(days=1), end_time
+            ))
+            log_file.rename(log_dir / f"bench_{index}.log")
+        total_mb = sum(f.stat().st_size for f in log_dir.glob('*.log')) / 2**20
+
+        analyzer = LogAnalyzer(log_dir, cache_dir=Path(tmp_dir) / "cache")
+        if analyzer.cache is None:
+            analyzer.cache = ParseCache(Path(tmp_dir) / "cache", logger=analyzer.logger)
+        print(f"Log data: {total_mb:.1f} MB, cache format: {analyzer.cache.suffix}")
+        print(f"{'Run':<8}{'Time (s)':>10}{'Rows':>12}")
+        for run in ('cold', 'warm'):
+            start = time.perf_counter()
+            df = analyzer.analyze_logs()
+            elapsed = time.perf_counter() - start
+            print(f"{run:<8}{elapsed:>10.2f}{len(df):>12}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Compare peak memory of list-of-dicts and columnar DataFrame construction.
+
+Usage:
+    python benchmarks/bench_columnar.py --entries 500000
+"""
+import argparse
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent / 'src'))
+
+import pandas as pd
+from log_columns import LogColumns
+from log_generator import LogGenerator
+from log_parser import LogParser
+
+def build_from_dicts(log_file, parser):
+    all_logs = []
+    with open(log_file, 'r') as f:
+        for line in f:
+            parsed = parser.parse(line)
+            if parsed:
+                all_logs.append(parsed)
+    return pd.DataFrame(all_logs)
+
+def build_columnar(log_file, parser):
+    columns = LogColumns()
+    with open(log_file, 'rb') as f:
+        columns.add_lines(f, parser.parse_fields)
+    return columns.to_frame()
+
+def measure(build, log_file):
+    # Timed without tracemalloc, whose hooks slow allocation-heavy code
+    start = time.perf_counter()
+    df = build(log_file, LogParser())
+    elapsed = time.perf_counter() - start
+    frame_bytes = df.memory_usage(deep=True).sum()
+    del df
+
+    tracemalloc.start()
+    build(log_file, LogParser())
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, frame_bytes
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark DataFrame construction')
+    parser.add_argument('--entries', type=int, default=500000,
+                        help='Number of generated log lines')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        end_time = datetime.now()
+        log_file = LogGenerator(tmp_dir).generate_logs(
+            args.entries, end_time - timedelta(days=1), end_time
+        )
+
+        print(f"{'Method':<16}{'Time (s)':>10}{'Peak (MB)':>12}{'Frame (MB)':>12}")
+        for name, build in [('list-of-dicts', build_from_dicts), ('columnar', build_columnar)]:
+            elapsed, peak, frame_bytes = measure(build, log_file)
+            print(f"{name:<16}{elapsed:>10.2f}{peak / 2**20:>12.1f}{frame_bytes / 2**20:>12.1f}")
+
+if __name__ == "__main__":
+    main()
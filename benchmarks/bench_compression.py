@@ -0,0 +1,98 @@
+"""Measure ingestion of rotated archives per codec: decompression alone,
+decompression plus parsing, and a warm analyze_logs served from the parse cache.
+
+MB/s is given in decompressed bytes, so the codecs compare with plain
+.log files. .zst is only measured when the zstandard package is installed.
+
+Usage:
+    python benchmarks/bench_compression.py --entries 2000000 --files 4 --workers 4
+"""
+import argparse
+import bz2
+import gzip
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent / 'src'))
+
+from config import Config
+from ingestion import IngestionStats, parse_files
+from log_analyzer import LogAnalyzer
+from log_generator import LogGenerator
+from log_reader import iter_decompressed_blocks, zstandard
+from parse_cache import ParseCache
+
+def compress_file(source, codec):
+    """Write `source` compressed with `codec` next to it; returns the archive path"""
+    target = source.with_name(f"{source.name}.{codec}")
+    if codec == 'gz':
+        opener = gzip.open(target, 'wb', compresslevel=6)
+    elif codec == 'bz2':
+        opener = bz2.open(target, 'wb')
+    else:
+        opener = zstandard.ZstdCompressor(level=3).stream_writer(open(target, 'wb'))
+    with open(source, 'rb') as f, opener as out:
+        shutil.copyfileobj(f, out, 8 * 2**20)
+    return target
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark compressed log ingestion')
+    parser.add_argument('--entries', type=int, default=2000000, help='Total generated log lines')
+    parser.add_argument('--files', type=int, default=4, help='Files (archives) the lines are spread over')
+    parser.add_argument('--workers', type=int, default=4, help='Processes for the parallel runs')
+    args = parser.parse_args()
+
+    codecs = ['log', 'gz', 'bz2'] + (['zst'] if zstandard is not None else [])
+    block_size = Config.STREAMING_CONFIG['block_size']
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        plain_dir = Path(tmp_dir) / "log"
+        plain_files = LogGenerator(plain_dir).generate_bulk(args.entries, files=args.files, seed=0)
+        raw_mb = sum(Path(path).stat().st_size for path in plain_files) / 2**20
+        print(f"Log data: {raw_mb:.1f} MB in {args.files} files"
+              f"{'' if zstandard else ' (zstandard not installed, skipping .zst)'}")
+        print(f"{'Codec':<6}{'Ratio':>7}{'Decompress MB/s':>17}{'Parse MB/s':>12}"
+              f"{f'Parse x{args.workers} MB/s':>17}{'Warm (s)':>10}")
+
+        for codec in codecs:
+            log_dir = Path(tmp_dir) / codec
+            log_dir.mkdir(exist_ok=True)
+            if codec == 'log':
+                log_files = [Path(path) for path in plain_files]
+            else:
+                log_files = []
+                for path in plain_files:
+                    source = log_dir / Path(path).name
+                    shutil.copyfile(path, source)
+                    log_files.append(compress_file(source, codec))
+                    source.unlink()
+            ratio = raw_mb * 2**20 / sum(path.stat().st_size for path in log_files)
+
+            decompress = '-'
+            if codec != 'log':
+                start = time.perf_counter()
+                for path in log_files:
+                    for _ in iter_decompressed_blocks(path, block_size):
+                        pass
+                decompress = f"{raw_mb / (time.perf_counter() - start):.1f}"
+
+            rates = []
+            for workers in (1, args.workers):
+                stats = IngestionStats()
+                start = time.perf_counter()
+                parse_files(log_files, workers, stats=stats)
+                rates.append(stats.bytes / 2**20 / (time.perf_counter() - start))
+
+            analyzer = LogAnalyzer(log_dir, cache_dir=log_dir / "cache")
+            if analyzer.cache is None:
+                analyzer.cache = ParseCache(log_dir / "cache", logger=analyzer.logger)
+            analyzer.analyze_logs()
+            start = time.perf_counter()
+            analyzer.analyze_logs()
+            warm = time.perf_counter() - start
+
+            print(f"{codec:<6}{ratio:>7.1f}{decompress:>17}{rates[0]:>12.1f}{rates[1]:>17.1f}{warm:>10.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""Measure log generation throughput: per-line generate_logs vs. generate_bulk.
+
+Usage:
+    python benchmarks/bench_generator.py --entries 2000000 --files 4 --max-workers 4
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent / 'src'))
+
+from log_generator import LogGenerator
+
+def measure(label, run, output_dir, entries):
+    start = time.perf_counter()
+    run()
+    elapsed = time.perf_counter() - start
+    size = sum(path.stat().st_size for path in Path(output_dir).glob('*.log'))
+    print(f"{label:<22}{elapsed:>10.2f}{entries / elapsed:>14,.0f}{size / 2**20 / elapsed:>10.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark synthetic log generation')
+    parser.add_argument('--entries', type=int, default=2000000, help='Log lines per run')
+    parser.add_argument('--files', type=int, default=4, help='Output files for bulk runs')
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count(),
+                        help='Largest worker count to try')
+    parser.add_argument('--scalar-entries', type=int, default=200000,
+                        help='Lines for the slow per-line baseline')
+    args = parser.parse_args()
+
+    print(f"{'Mode':<22}{'Time (s)':>10}{'Lines/s':>14}{'MB/s':>10}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        output_dir = Path(tmp_dir) / "per_line"
+        generator = LogGenerator(output_dir)
+        measure('per-line', lambda: generator.generate_logs(args.scalar_entries), output_dir,
+                args.scalar_entries)
+
+        workers = 1
+        while workers <= max(args.max_workers, 1):
+            output_dir = Path(tmp_dir) / f"bulk_{workers}"
+            generator = LogGenerator(output_dir)
+            measure(f"bulk, {workers} worker(s)",
+                    lambda: generator.generate_bulk(args.entries, files=args.files,
+                                                    workers=workers, seed=0),
+                    output_dir, args.entries)
+            workers *= 2
+
+if __name__ == "__main__":
+    main()
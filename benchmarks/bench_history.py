@@ -0,0 +1,75 @@
+"""Time trend queries against the history store and against re-reading one
+JSON report per cycle, for months of five-minute cycles.
+
+Usage:
+    python benchmarks/bench_history.py --days 90 --cycle-minutes 5
+"""
+import argparse
+import json
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent / 'src'))
+
+import numpy as np
+import pandas as pd
+from config import Config
+from history_store import HistoryStore
+from rollups import Rollup
+
+def cycle_rollup(start, minutes, rng):
+    """A Rollup of one cycle with a few hundred rows per minute"""
+    index = pd.date_range(start, periods=minutes, freq='1min', name='bucket')
+    counts = {level: rng.poisson(rate, minutes) for level, rate in zip(Config.SEVERITY_LEVELS, (400, 60, 20))}
+    total = sum(counts.values())
+    return Rollup(pd.DataFrame({**counts, 'response_time_sum': total * rng.uniform(100, 300, minutes),
+                                'response_time_count': total, 'response_time_max': rng.uniform(1000, 9000, minutes)},
+                               index=index))
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the history store')
+    parser.add_argument('--days', type=int, default=90, help='Days of history')
+    parser.add_argument('--cycle-minutes', type=int, default=5, help='Minutes between service cycles')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    end = datetime(2024, 6, 1)
+    start = end - timedelta(days=args.days)
+    cycles = args.days * 1440 // args.cycle_minutes
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        store = HistoryStore(Path(tmp_dir) / "history.db")
+        report_dir = Path(tmp_dir) / "reports"
+        report_dir.mkdir()
+        started = time.perf_counter()
+        for cycle in range(cycles):
+            cycle_start = start + timedelta(minutes=cycle * args.cycle_minutes)
+            rollup = cycle_rollup(cycle_start, args.cycle_minutes, rng)
+            summary = {'total_logs': int(rollup.severity_totals().sum()),
+                       'error_count': int(rollup.severity_totals()['ERROR'])}
+            store.add_rollup(rollup)
+            store.add_summary(summary, time=cycle_start)
+            with open(report_dir / f"log_summary_{cycle_start:%Y%m%d_%H%M%S}.json", 'w') as f:
+                json.dump(summary, f)
+        print(f"{cycles:,} cycles written in {time.perf_counter() - started:.1f}s")
+
+        started = time.perf_counter()
+        removed = store.compact(now=end)
+        print(f"Compaction folded {removed:,} rows in {time.perf_counter() - started:.2f}s; "
+              f"database {store.path.stat().st_size / 2**20:.1f} MB")
+
+        since = end - timedelta(days=30)
+        print(f"{'Query (last 30 days)':<34}{'Rows':>8}{'Time (ms)':>12}")
+        for resolution in ('1min', '1h', '1D'):
+            started = time.perf_counter()
+            rows = len(store.rollup(since, end, resolution))
+            print(f"{f'history store, {resolution} buckets':<34}{rows:>8,}"
+                  f"{(time.perf_counter() - started) * 1000:>12.1f}")
+        started = time.perf_counter()
+        reports = [json.loads(path.read_text()) for path in sorted(report_dir.glob("log_summary_*.json"))
+                   if path.name >= f"log_summary_{since:%Y%m%d}"]
+        print(f"{'JSON report files':<34}{len(reports):>8,}{(time.perf_counter() - started) * 1000:>12.1f}")
+
+if __name__ == "__main__":
+    main()
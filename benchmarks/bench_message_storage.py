@@ -0,0 +1,54 @@
+"""Compare DataFrame memory per row with messages stored as full-line
+strings (the former layout) and as an interned categorical of bodies.
+
+Usage:
+    python benchmarks/bench_message_storage.py --entries 10000000
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent / 'src'))
+
+import pandas as pd
+from ingestion import parse_files
+from log_generator import LogGenerator
+
+def full_lines(log_files):
+    """The stripped text of every line, as the message column used to hold it"""
+    lines = []
+    for log_file in log_files:
+        with open(log_file, 'rb') as f:
+            lines.extend(line.strip().decode('utf-8', 'replace') for line in f)
+    return pd.Series(lines, dtype=object)
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark message column storage')
+    parser.add_argument('--entries', type=int, default=10000000, help='Number of generated log lines')
+    parser.add_argument('--files', type=int, default=4, help='Files the lines are spread over')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        log_files = LogGenerator(tmp_dir).generate_bulk(args.entries, files=args.files, seed=0)
+
+        start = time.perf_counter()
+        columns = parse_files(log_files)
+        parse_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        interned = columns.to_frame()
+        frame_seconds = time.perf_counter() - start
+        del columns
+        strings = interned.assign(message=full_lines(log_files))
+
+        rows = len(interned)
+        print(f"{rows:,} rows, {len(interned['message'].cat.categories):,} distinct messages; "
+              f"parse {parse_seconds:.2f}s, to_frame {frame_seconds:.2f}s")
+        print(f"{'Layout':<14}{'Message B/row':>15}{'Frame B/row':>13}{'Frame (MB)':>12}")
+        for name, df in [('strings', strings), ('categorical', interned)]:
+            usage = df.memory_usage(deep=True, index=False)
+            print(f"{name:<14}{usage['message'] / rows:>15.1f}{usage.sum() / rows:>13.1f}"
+                  f"{usage.sum() / 2**20:>12.1f}")
+
+if __name__ == "__main__":
+    main()
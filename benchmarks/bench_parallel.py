@@ -0,0 +1,53 @@
+"""Measure how parse_files scales from 1 to N worker processes.
+
+Usage:
+    python benchmarks/bench_parallel.py --entries 2000000 --files 4 --max-workers 8
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent / 'src'))
+
+from ingestion import parse_files
+from log_generator import LogGenerator
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark parallel log ingestion')
+    parser.add_argument('--entries', type=int, default=1000000,
+                        help='Total number of generated log lines')
+    parser.add_argument('--files', type=int, default=1,
+                        help='Number of files the lines are spread over')
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count(),
+                        help='Largest worker count to measure')
+    parser.add_argument('--chunk-mb', type=int, default=16,
+                        help='Split size for large files in MB')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        end_time = datetime.now()
+        generator = LogGenerator(tmp_dir)
+        log_files = []
+        for index in range(args.files):
+            log_file = Path(generator.generate_logs(
+                args.entries // args.files, end_time - timedelta(days=1), end_time
+            ))
+            log_files.append(log_file.rename(Path(tmp_dir) / f"bench_{index}.log"))
+        total_mb = sum(f.stat().st_size for f in log_files) / 2**20
+
+        worker_counts = sorted({1, *[2**i for i in range(1, 8) if 2**i <= args.max_workers], args.max_workers})
+        baseline = None
+        print(f"{'Workers':>8}{'Time (s)':>10}{'Lines/s':>14}{'MB/s':>10}{'Speedup':>9}")
+        for workers in worker_counts:
+            start = time.perf_counter()
+            columns = parse_files(log_files, workers, chunk_size=args.chunk_mb * 2**20)
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            print(f"{workers:>8}{elapsed:>10.2f}{len(columns) / elapsed:>14,.0f}"
+                  f"{total_mb / elapsed:>10.1f}{baseline / elapsed:>9.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Compare LogParser's fast path with the original per-pattern parser.
+
+Usage:
+    python benchmarks/bench_parser.py --entries 200000
+"""
+import argparse
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent / 'src'))
+
+from log_generator import LogGenerator
+from log_parser import LogParser
+
+def time_parse(parse, lines, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for line in lines:
+            parse(line)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the log line parser')
+    parser.add_argument('--entries', type=int, default=200000,
+                        help='Number of generated log lines to parse')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='Number of timed runs; the best one is reported')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        end_time = datetime.now()
+        log_file = LogGenerator(tmp_dir).generate_logs(
+            args.entries, end_time - timedelta(days=1), end_time
+        )
+        with open(log_file, 'r') as f:
+            lines = f.readlines()
+
+    log_parser = LogParser()
+    mismatches = sum(
+        1 for line in lines if log_parser.parse(line) != log_parser.parse_fallback(line)
+    )
+
+    legacy = time_parse(log_parser.parse_fallback, lines, args.repeat)
+    fast = time_parse(log_parser.parse, lines, args.repeat)
+
+    print(f"Lines:            {len(lines)}")
+    print(f"Mismatched rows:  {mismatches}")
+    print(f"Original parser:  {legacy:.3f}s ({len(lines) / legacy:,.0f} lines/s)")
+    print(f"Single-pass:      {fast:.3f}s ({len(lines) / fast:,.0f} lines/s)")
+    print(f"Speedup:          {legacy / fast:.2f}x")
+
+if __name__ == "__main__":
+    main()
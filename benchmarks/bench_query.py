@@ -0,0 +1,90 @@
+"""Time ad-hoc queries over a week of logs with the query subcommand's engine.
+
+One file per day is generated in time order. Each query runs cold (files
+are parsed and cached), warm (cached blocks pruned by their zone maps)
+and, for comparison, by filtering the full frame from analyze_logs with
+a warm cache.
+
+Usage:
+    python benchmarks/bench_query.py --days 7 --entries-per-day 200000
+"""
+import argparse
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent / 'src'))
+
+from log_analyzer import LogAnalyzer
+from log_generator import LogGenerator
+from log_query import LogQuery, group_rows
+
+def full_frame_filter(df, query):
+    """The same filters with pandas over the full analysis frame"""
+    keep = df['timestamp'].notna() if query.since or query.until else df['severity'].notna()
+    if query.since:
+        keep &= df['timestamp'] >= query.since
+    if query.until:
+        keep &= df['timestamp'] < query.until
+    if query.severity_codes is not None:
+        keep &= df['severity'].cat.codes.isin(query.severity_codes.nonzero()[0])
+    if query.contains:
+        keep &= df['message'].astype(str).str.contains(query.contains, case=not query.ignore_case, regex=False)
+    if query.min_response_time is not None:
+        keep &= df['response_time'] >= query.min_response_time
+    return df[keep]
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark log queries')
+    parser.add_argument('--days', type=int, default=7, help='Number of daily log files')
+    parser.add_argument('--entries-per-day', type=int, default=200000, help='Log lines per daily file')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        log_dir = Path(tmp_dir) / "logs"
+        generator = LogGenerator(log_dir)
+        end_time = datetime(2024, 3, 1) + timedelta(days=args.days)
+        start_time = end_time - timedelta(days=args.days)
+        for day in range(args.days):
+            day_start = start_time + timedelta(days=day)
+            seconds = sorted(random.randrange(86400) for _ in range(args.entries_per_day))
+            with open(log_dir / f"app_{day:02d}.log", 'w') as f:
+                for second in seconds:
+                    f.write(generator.generate_log_entry(day_start + timedelta(seconds=second)) + '\n')
+        total_mb = sum(f.stat().st_size for f in log_dir.glob('*.log')) / 2**20
+        print(f"Log data: {total_mb:.1f} MB, {args.days * args.entries_per_day:,} lines over {args.days} days")
+
+        queries = {
+            'errors, last 2 hours': dict(since=end_time - timedelta(hours=2), severities=['ERROR']),
+            '"timeout" -i, whole week': dict(contains='timeout', ignore_case=True),
+            'response > 4900ms, one day': dict(since=end_time - timedelta(days=2),
+                                                until=end_time - timedelta(days=1), min_response_time=4900),
+            'errors by template, top 5': dict(severities=['ERROR'], group_by=['template']),
+        }
+        cache_dir = Path(tmp_dir) / "cache"
+        print(f"{'Query':<28}{'Rows':>10}{'Cold (s)':>10}{'Warm (s)':>10}{'Blocks':>12}{'Full frame (s)':>16}")
+        for name, options in queries.items():
+            group_by = options.pop('group_by', None)
+            shutil.rmtree(cache_dir, ignore_errors=True)
+            analyzer = LogAnalyzer(log_dir, cache_dir=cache_dir)
+            timings = []
+            for _ in range(2):
+                query = LogQuery(**options)
+                start = time.perf_counter()
+                df = analyzer.query(query)
+                if group_by:
+                    group_rows(df, group_by, top=5)
+                timings.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            expected = full_frame_filter(analyzer.analyze_logs(), LogQuery(**options))
+            full = time.perf_counter() - start
+            assert len(expected) == len(df)
+            print(f"{name:<28}{len(df):>10,}{timings[0]:>10.2f}{timings[1]:>10.3f}"
+                  f"{f'{query.blocks_read}/{query.blocks_total}':>12}{full:>16.2f}")
+
+if __name__ == "__main__":
+    main()
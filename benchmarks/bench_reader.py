@@ -0,0 +1,93 @@
+"""Compare peak RSS and throughput of the log file readers.
+
+Each method runs in its own subprocess so peak RSS is measured in isolation:
+  readlines - text mode readlines() + per-line parse (the old CLI path)
+  stream    - buffered binary blocks (log_reader.iter_blocks)
+  mmap      - memory-mapped blocks (log_reader.iter_mapped_blocks)
+
+Usage:
+    python benchmarks/bench_reader.py --entries 3000000
+"""
+import argparse
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent / 'src'))
+
+from config import Config
+from log_columns import LogColumns
+from log_generator import LogGenerator
+from log_parser import LogParser
+from log_reader import iter_blocks, iter_mapped_blocks
+from summary_aggregator import SummaryAggregator
+
+METHODS = ['readlines', 'stream', 'mmap']
+
+def run_method(method, log_file):
+    parser = LogParser()
+    aggregator = SummaryAggregator()
+    size = Path(log_file).stat().st_size
+    block_size = Config.STREAMING_CONFIG['block_size']
+
+    if method == 'readlines':
+        with open(log_file, 'r') as f:
+            lines = f.readlines()
+        rows = [parser.parse(line) for line in lines]
+        return len(rows)
+
+    if method == 'stream':
+        f = open(log_file, 'rb')
+        blocks = iter_blocks(f, 0, size, block_size)
+    else:
+        f = None
+        blocks = iter_mapped_blocks(log_file, 0, size, block_size)
+    for block in blocks:
+        columns = LogColumns(keep_messages=False)
+        columns.add_buffer(block, parser.parse_fields)
+        aggregator.update_columns(columns)
+    if f:
+        f.close()
+    return aggregator.total
+
+def child(method, log_file):
+    start = time.perf_counter()
+    rows = run_method(method, log_file)
+    elapsed = time.perf_counter() - start
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f"{elapsed} {peak_kb} {rows}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark log file readers')
+    parser.add_argument('--entries', type=int, default=2000000,
+                        help='Number of generated log lines')
+    parser.add_argument('--child', nargs=2, metavar=('METHOD', 'FILE'),
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(*args.child)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        end_time = datetime.now()
+        log_file = LogGenerator(tmp_dir).generate_logs(
+            args.entries, end_time - timedelta(days=1), end_time
+        )
+        size_mb = Path(log_file).stat().st_size / 2**20
+
+        print(f"File size: {size_mb:.1f} MB")
+        print(f"{'Method':<12}{'Time (s)':>10}{'MB/s':>10}{'Peak RSS (MB)':>15}")
+        for method in METHODS:
+            output = subprocess.run(
+                [sys.executable, __file__, '--child', method, log_file],
+                capture_output=True, text=True, check=True
+            ).stdout.split()
+            elapsed, peak_kb = float(output[0]), int(output[1])
+            print(f"{method:<12}{elapsed:>10.2f}{size_mb / elapsed:>10.1f}{peak_kb / 1024:>15.1f}")
+
+if __name__ == "__main__":
+    main()
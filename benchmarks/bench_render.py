@@ -0,0 +1,62 @@
+"""Measure generate_all_visualizations in-process vs. in a process pool.
+
+A month of per-minute rollups is synthesized and the three charts are
+rendered sequentially (workers=1) and concurrently (workers=3). The pool
+is reused between cycles, so the first pooled cycle includes its start-up.
+A final cycle with unchanged input shows the cost when every chart is
+skipped by its content hash.
+
+Usage:
+    python benchmarks/bench_render.py --days 30 --cycles 3
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+import numpy as np
+import pandas as pd
+sys.path.append(str(Path(__file__).parent.parent / 'src'))
+
+from config import Config
+from rollups import Rollup
+from visualizer import LogVisualizer
+
+def synthesize_rollup(days, rng):
+    index = pd.date_range('2024-03-01', periods=days * 1440, freq='1min', name='bucket')
+    counts = {level: rng.poisson(lam, len(index)) for level, lam in zip(Config.SEVERITY_LEVELS, (80, 15, 5))}
+    response_time_count = rng.poisson(50, len(index))
+    frame = pd.DataFrame({
+        **counts,
+        'response_time_sum': response_time_count * rng.uniform(100, 3000, len(index)),
+        'response_time_count': response_time_count,
+        'response_time_max': rng.uniform(3000, 9000, len(index)),
+    }, index=index)
+    return Rollup(frame)
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark chart rendering')
+    parser.add_argument('--days', type=int, default=30, help='Days of per-minute rollups')
+    parser.add_argument('--cycles', type=int, default=3, help='Rendering cycles per configuration')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    rollups = [synthesize_rollup(args.days, rng) for _ in range(args.cycles)]
+    print(f"{'Workers':>8}{'Cycle':>7}{'Time (s)':>10}")
+    for workers in (1, 3):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            visualizer = LogVisualizer(Path(tmp_dir), workers=workers)
+            try:
+                # Every cycle has new data, so all charts are drawn
+                for cycle, rollup in enumerate(rollups, 1):
+                    start = time.perf_counter()
+                    visualizer.generate_all_visualizations(rollup)
+                    print(f"{workers:>8}{cycle:>7}{time.perf_counter() - start:>10.2f}")
+                start = time.perf_counter()
+                visualizer.generate_all_visualizations(rollups[-1])
+                print(f"{workers:>8}{'same':>7}{time.perf_counter() - start:>10.2f}")
+            finally:
+                visualizer.close()
+
+if __name__ == "__main__":
+    main()
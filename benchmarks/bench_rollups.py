@@ -0,0 +1,59 @@
+"""Measure chart rendering time from rollups for a day vs. a month of logs.
+
+Rows are synthesized with numpy at a constant rate. For each range the
+rollup is built once (the ingestion-time cost) and the three charts are
+rendered from it; rendering time should not grow with the row count.
+
+Usage:
+    python benchmarks/bench_rollups.py --rows-per-day 200000 --days 1 30
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+import numpy as np
+import pandas as pd
+sys.path.append(str(Path(__file__).parent.parent / 'src'))
+
+from config import Config
+from rollups import Rollup
+from visualizer import LogVisualizer
+
+def synthesize(days, rows_per_day, rng):
+    size = days * rows_per_day
+    start = np.datetime64('2024-03-01T00:00:00', 'ns')
+    offsets = np.sort(rng.integers(0, days * 86400 * 10**9, size))
+    response_times = rng.uniform(50, 9000, size).astype(np.float32)
+    response_times[rng.random(size) < 0.5] = np.nan
+    return pd.DataFrame({
+        'timestamp': start + offsets.astype('timedelta64[ns]'),
+        'severity': pd.Categorical.from_codes(rng.choice(3, size, p=[0.8, 0.15, 0.05]).astype(np.int8),
+                                              categories=Config.SEVERITY_LEVELS),
+        'response_time': response_times,
+    })
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark rendering charts from rollups')
+    parser.add_argument('--rows-per-day', type=int, default=200000, help='Log rows per day')
+    parser.add_argument('--days', type=int, nargs='+', default=[1, 30], help='Ranges to chart, in days')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        visualizer = LogVisualizer(Path(tmp_dir), workers=1)
+        print(f"{'Days':>6}{'Rows':>12}{'Buckets':>10}{'Rollup (s)':>12}{'Render (s)':>12}")
+        for days in args.days:
+            df = synthesize(days, args.rows_per_day, rng)
+            start = time.perf_counter()
+            rollup = Rollup.from_frame(df)
+            rollup_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            results = visualizer.generate_all_visualizations(rollup)
+            render_time = time.perf_counter() - start
+            assert all(results.values())
+            print(f"{days:>6}{len(df):>12}{len(rollup):>10}{rollup_time:>12.2f}{render_time:>12.2f}")
+
+if __name__ == "__main__":
+    main()
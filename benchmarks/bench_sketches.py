@@ -0,0 +1,56 @@
+"""Compare sketch percentiles and distinct counts with exact values computed
+from all rows, and show the memory each needs.
+
+Usage:
+    python benchmarks/bench_sketches.py --entries 5000000 --files 8
+"""
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent / 'src'))
+
+import numpy as np
+from config import Config
+from ingestion import parse_files, summarize_files
+from log_generator import LogGenerator
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark response-time and message sketches')
+    parser.add_argument('--entries', type=int, default=5000000, help='Number of generated log lines')
+    parser.add_argument('--files', type=int, default=8, help='Files, summarized separately and merged')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        log_files = [Path(path) for path in
+                     LogGenerator(tmp_dir).generate_bulk(args.entries, files=args.files, seed=0)]
+
+        start = time.perf_counter()
+        aggregator = summarize_files(log_files, 1)
+        sketch_seconds = time.perf_counter() - start
+        summary = aggregator.to_summary()
+        state_bytes = len(json.dumps(aggregator.sketches.to_dict()))
+
+        start = time.perf_counter()
+        df = parse_files(log_files).to_frame()
+        response_times = df['response_time'].dropna().to_numpy(dtype=np.float64)
+        exact = {q: np.quantile(response_times, q, method='lower') for q in Config.SKETCH_CONFIG['quantiles']}
+        distinct = df['message'].nunique()
+        exact_seconds = time.perf_counter() - start
+        exact_bytes = df['response_time'].memory_usage(deep=True) + df['message'].memory_usage(deep=True)
+
+        print(f"{len(df):,} rows in {args.files} files, {len(aggregator.sketches.buckets)} sketch buckets")
+        print(f"{'Statistic':<22}{'Exact':>12}{'Sketch':>12}{'Error':>9}")
+        for q, value in exact.items():
+            estimate = summary[f"p{q * 100:g}_response_time"]
+            print(f"{f'p{q * 100:g}_response_time':<22}{value:>12.2f}{estimate:>12.2f}"
+                  f"{abs(estimate - value) / value:>9.2%}")
+        estimate = summary['distinct_messages']
+        print(f"{'distinct_messages':<22}{distinct:>12,}{estimate:>12,}{abs(estimate - distinct) / distinct:>9.2%}")
+        print(f"Sketches: streamed summary {sketch_seconds:.2f}s, state {state_bytes / 2**10:.0f} KB as JSON")
+        print(f"Exact:    parse and sort {exact_seconds:.2f}s, columns {exact_bytes / 2**20:.0f} MB in memory")
+
+if __name__ == "__main__":
+    main()
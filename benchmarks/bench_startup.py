@@ -0,0 +1,75 @@
+"""Measure CLI start-up cost per command and check it against a budget.
+
+Each command is run with ``python -X importtime`` and the cumulative time
+of all top-level imports is taken from its stderr; the best of
+``--repeat`` runs is compared with the budget below. The heaviest
+imports are listed for commands over budget. Exits with status 1 when
+any command is over budget, so it can run as a regression check.
+
+Usage:
+    python benchmarks/bench_startup.py --repeat 5
+"""
+import argparse
+import re
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+CLI = Path(__file__).parent.parent / 'src' / 'cli.py'
+
+# Import-time budgets in milliseconds. `metrics` and `cleanup` must stay
+# free of pandas/matplotlib; `analyze` needs the analysis stack but not
+# the plotting libraries when it exits early.
+BUDGETS_MS = {
+    'help': 50,
+    'metrics': 100,
+    'cleanup': 50,
+    'analyze': 1500,
+}
+
+IMPORT_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+def import_times(args):
+    """Run the CLI with -X importtime; returns {top-level module: cumulative us}"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', str(CLI), *args],
+                            capture_output=True, text=True, cwd=CLI.parent)
+    times = {}
+    for line in result.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match and len(match.group(3)) == 1:
+            times[match.group(4)] = int(match.group(2))
+    return times
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark CLI start-up imports')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per command; the best is kept')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp_dir = Path(tmp_dir)
+        (tmp_dir / 'logs').mkdir()
+        commands = {
+            'help': ['--help'],
+            'metrics': ['metrics'],
+            'cleanup': ['cleanup', '--report-dir', str(tmp_dir)],
+            # An empty log directory: the analysis stack loads, then exits early
+            'analyze': ['analyze', '--log-dir', str(tmp_dir / 'logs'), '--report-dir', str(tmp_dir)],
+        }
+
+        over_budget = False
+        print(f"{'Command':<10}{'Imports (ms)':>14}{'Budget (ms)':>13}")
+        for name, command in commands.items():
+            runs = [import_times(command) for _ in range(args.repeat)]
+            best = min(runs, key=lambda times: sum(times.values()))
+            total_ms = sum(best.values()) / 1000
+            status = '' if total_ms <= BUDGETS_MS[name] else '  OVER BUDGET'
+            print(f"{name:<10}{total_ms:>14.1f}{BUDGETS_MS[name]:>13}{status}")
+            if status:
+                over_budget = True
+                for module, micros in sorted(best.items(), key=lambda item: -item[1])[:5]:
+                    print(f"{'':<10}{module:<30}{micros / 1000:>8.1f} ms")
+    sys.exit(1 if over_budget else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Measure how much of a month of logs a last-hour query reads with the time index.
+
+One file per day is generated in time order, as a rotating logger would
+write it. The summary for the last hour is computed with a full scan and
+with the time index (cold, which builds the index, and warm).
+
+Usage:
+    python benchmarks/bench_time_index.py --days 30 --entries-per-day 50000
+"""
+import argparse
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent / 'src'))
+
+from ingestion import IngestionStats
+from log_analyzer import LogAnalyzer
+from log_generator import LogGenerator
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark time-range queries')
+    parser.add_argument('--days', type=int, default=30, help='Number of daily log files')
+    parser.add_argument('--entries-per-day', type=int, default=50000,
+                        help='Log lines per daily file')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        log_dir = Path(tmp_dir) / "logs"
+        generator = LogGenerator(log_dir)
+        end_time = datetime.now().replace(microsecond=0)
+        start_time = end_time - timedelta(days=args.days)
+        for day in range(args.days):
+            day_start = start_time + timedelta(days=day)
+            seconds = sorted(random.randrange(86400) for _ in range(args.entries_per_day))
+            with open(log_dir / f"app_{day:02d}.log", 'w') as f:
+                for second in seconds:
+                    f.write(generator.generate_log_entry(day_start + timedelta(seconds=second)) + '\n')
+        total_mb = sum(f.stat().st_size for f in log_dir.glob('*.log')) / 2**20
+
+        since = end_time - timedelta(hours=1)
+        analyzer = LogAnalyzer(log_dir, cache_dir=Path(tmp_dir) / "cache")
+        time_index = analyzer.time_index
+        print(f"Log data: {total_mb:.1f} MB over {args.days} days; query: last hour")
+        print(f"{'Run':<12}{'Time (s)':>10}{'Read (MB)':>12}{'Rows':>10}")
+        for run in ('full scan', 'index cold', 'index warm'):
+            analyzer.time_index = None if run == 'full scan' else time_index
+            stats = IngestionStats()
+            start = time.perf_counter()
+            summary = analyzer.summarize_logs(since=since, stats=stats)
+            elapsed = time.perf_counter() - start
+            print(f"{run:<12}{elapsed:>10.2f}{stats.bytes / 2**20:>12.2f}{summary['total_logs']:>10}")
+
+if __name__ == "__main__":
+    main()
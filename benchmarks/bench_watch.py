@@ -0,0 +1,94 @@
+"""Measure the latency from appending a log line to the alert decision in watch mode.
+
+A writer appends one ERROR line at a time to a watched directory while
+LogAnalyzerService.watch runs in a background thread. The latency is the
+time between the write and the moment the alert rules have run on the
+line, for the inotify and the polling watcher.
+
+Usage:
+    python benchmarks/bench_watch.py --lines 200 --interval 0.02
+"""
+import argparse
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent / 'src'))
+
+from config import Config
+from log_watcher import InotifyWatcher
+
+def measure(base_dir, mode, lines, interval):
+    log_dir = base_dir / mode
+    Config.LOGS_DIR = log_dir
+    Config.REPORTS_DIR = base_dir / "reports"
+    Config.VISUALIZATIONS_DIR = base_dir / "visualizations"
+    Config.WATCH_CONFIG = {**Config.WATCH_CONFIG, 'use_inotify': mode == 'inotify',
+                           'state_file': base_dir / "state" / f"{mode}.json"}
+    from main import LogAnalyzerService
+
+    log_file = log_dir / "app.log"
+    log_dir.mkdir(parents=True, exist_ok=True)
+    log_file.touch()
+    service = LogAnalyzerService()
+    written, decided = {}, {}
+
+    def on_alerts(df, alerts):
+        now = time.perf_counter()
+        for alert in alerts:
+            probe = alert['message'].rsplit(' ', 1)[-1]
+            if probe in written:
+                decided.setdefault(probe, now)
+
+    stop = threading.Event()
+    thread = threading.Thread(target=service.watch, args=(stop, on_alerts))
+    thread.start()
+    while not Config.WATCH_CONFIG['state_file'].exists():
+        time.sleep(0.01)
+
+    with open(log_file, 'a') as f:
+        for i in range(lines):
+            probe = f"probe-{i}"
+            written[probe] = time.perf_counter()
+            f.write(f"{datetime.now():%Y-%m-%d %H:%M:%S} ERROR Request failed {probe}\n")
+            f.flush()
+            time.sleep(interval)
+    deadline = time.monotonic() + 5
+    while len(decided) < lines and time.monotonic() < deadline:
+        time.sleep(0.01)
+    stop.set()
+    thread.join()
+    service.alert_system.close()
+
+    latencies = sorted((decided[probe] - written[probe]) * 1000 for probe in decided)
+    return latencies
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark append-to-alert latency of watch mode')
+    parser.add_argument('--lines', type=int, default=200, help='Number of lines to append')
+    parser.add_argument('--interval', type=float, default=0.02, help='Seconds between appends')
+    args = parser.parse_args()
+
+    modes = ['polling']
+    try:
+        InotifyWatcher(Path(tempfile.gettempdir())).close()
+        modes.insert(0, 'inotify')
+    except OSError:
+        print("inotify is not available, measuring polling only")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        print(f"{'Watcher':<10}{'Lines':>8}{'p50 (ms)':>10}{'p95 (ms)':>10}{'max (ms)':>10}")
+        for mode in modes:
+            latencies = measure(Path(tmp_dir), mode, args.lines, args.interval)
+            if not latencies:
+                print(f"{mode:<10}{0:>8}")
+                continue
+            p95 = latencies[min(int(len(latencies) * 0.95), len(latencies) - 1)]
+            print(f"{mode:<10}{len(latencies):>8}{statistics.median(latencies):>10.1f}"
+                  f"{p95:>10.1f}{latencies[-1]:>10.1f}")
+
+if __name__ == "__main__":
+    main()
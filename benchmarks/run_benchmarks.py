@@ -0,0 +1,286 @@
+"""Benchmark harness for the analysis pipeline with a regression check.
+
+Datasets are generated with LogGenerator.generate_bulk at each requested
+size and reused between runs when --data-dir is given. Every stage runs
+at every size in a fresh process, so its peak RSS is its own. Stages that work on
+parsed rows load them from a pickled frame written once per dataset, so
+their peak RSS does not include parsing the logs. A stage process that
+dies (e.g. killed for running out of memory) is recorded as failed. Per
+stage the harness records wall time (the fastest of --repeat runs),
+lines/s, MB/s (for stages that read the log files) and peak RSS. Results
+are written to a JSON file.
+
+With --baseline the results are compared with an earlier results file.
+A stage that is slower, or uses more memory, than the baseline by more
+than --tolerance makes the script exit with status 1. --save-baseline
+stores the current results as the new baseline.
+
+Stages:
+    parse_log_line     LogAnalyzer.parse_log_line on every line
+    analyze_logs       LogAnalyzer.analyze_logs, parse cache disabled
+    generate_summary   LogAnalyzer.generate_summary on the parsed rows
+    should_send_alert  AlertSystem.should_send_alert per row
+    evaluate_alerts    AlertSystem.evaluate on the whole frame
+    render             LogVisualizer.generate_all_visualizations, in-process
+
+Usage:
+    python benchmarks/run_benchmarks.py --sizes 10k 100k 1m --output results.json
+    python benchmarks/run_benchmarks.py --sizes 10k 100k --baseline benchmarks/baseline.json
+    python benchmarks/run_benchmarks.py --sizes 100m --stages analyze_logs --data-dir /data/bench
+"""
+import argparse
+import json
+import multiprocessing
+import platform
+import queue as queues
+import resource
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent / 'src'))
+
+STAGES = ['parse_log_line', 'analyze_logs', 'generate_summary', 'should_send_alert',
+          'evaluate_alerts', 'render']
+# Stages timed over reading the log files report MB/s
+READS_FILES = {'parse_log_line', 'analyze_logs'}
+# Parsed rows of a dataset, shared by the stages that don't read the log files
+FRAME_FILE = 'frame.pkl'
+# Seconds between checks that a stage process is still alive
+POLL_SECONDS = 1.0
+
+def parse_size(text):
+    """'10k' -> 10000, '1m' -> 1000000, '100' -> 100"""
+    text = text.lower()
+    factor = {'k': 10**3, 'm': 10**6, 'b': 10**9}.get(text[-1], 1)
+    return int(float(text[:-1] if factor > 1 else text) * factor)
+
+def prepare_dataset(data_dir, size, seed):
+    """Generate (or reuse) the log files for one size; returns their directory"""
+    from log_generator import LogGenerator
+
+    log_dir = Path(data_dir) / f"lines_{size}_seed_{seed}"
+    if not (log_dir / '.complete').exists():
+        for stale in [*log_dir.glob('*.log'), log_dir / FRAME_FILE]:
+            stale.unlink(missing_ok=True)
+        end_time = datetime(2024, 3, 31)
+        LogGenerator(log_dir).generate_bulk(size, end_time - timedelta(days=30), end_time,
+                                            files=max(1, min(8, size // 1_000_000)), seed=seed,
+                                            order='sorted')
+        (log_dir / '.complete').touch()
+    return log_dir
+
+def _analyzer(log_dir):
+    from log_analyzer import LogAnalyzer
+
+    analyzer = LogAnalyzer(log_dir)
+    analyzer.cache = None
+    return analyzer
+
+def _write_frame(log_dir):
+    _analyzer(log_dir).analyze_logs().to_pickle(Path(log_dir) / FRAME_FILE)
+
+def prepare_frame(log_dir):
+    """Parse a dataset once, in a child process, and pickle the rows next to its logs"""
+    frame_file = Path(log_dir) / FRAME_FILE
+    if not frame_file.exists():
+        process = multiprocessing.get_context('spawn').Process(target=_write_frame, args=(str(log_dir),))
+        process.start()
+        process.join()
+        if process.exitcode != 0:
+            frame_file.unlink(missing_ok=True)
+            raise RuntimeError(f"Parsing {log_dir} failed: {_exit_reason(process.exitcode)}")
+    return frame_file
+
+def run_stage(stage, log_dir, scratch_dir):
+    """Run one stage; returns (seconds, lines processed). Runs in a child process."""
+    log_files = sorted(Path(log_dir).glob('*.log'))
+    if stage == 'parse_log_line':
+        analyzer = _analyzer(log_dir)
+        start = time.perf_counter()
+        lines = 0
+        for log_file in log_files:
+            with open(log_file, 'r') as f:
+                for line in f:
+                    analyzer.parse_log_line(line)
+                    lines += 1
+        return time.perf_counter() - start, lines
+
+    if stage == 'analyze_logs':
+        analyzer = _analyzer(log_dir)
+        start = time.perf_counter()
+        df = analyzer.analyze_logs()
+        return time.perf_counter() - start, len(df)
+
+    import pandas as pd
+
+    df = pd.read_pickle(Path(log_dir) / FRAME_FILE)
+    if stage == 'generate_summary':
+        analyzer = _analyzer(log_dir)
+        start = time.perf_counter()
+        analyzer.generate_summary(df)
+        return time.perf_counter() - start, len(df)
+
+    if stage in ('should_send_alert', 'evaluate_alerts'):
+        from alert_system import AlertSystem
+
+        alert_system = AlertSystem()
+        if stage == 'evaluate_alerts':
+            start = time.perf_counter()
+            alert_system.evaluate(df)
+            return time.perf_counter() - start, len(df)
+        records = df[['severity', 'response_time']].astype(object).to_dict('records')
+        start = time.perf_counter()
+        for record in records:
+            alert_system.should_send_alert(record)
+        return time.perf_counter() - start, len(records)
+
+    if stage == 'render':
+        from visualizer import LogVisualizer
+
+        Path(scratch_dir).mkdir(parents=True, exist_ok=True)
+        visualizer = LogVisualizer(Path(scratch_dir), workers=1)
+        start = time.perf_counter()
+        visualizer.generate_all_visualizations(df)
+        return time.perf_counter() - start, len(df)
+
+    raise ValueError(f"Unknown stage {stage!r}")
+
+def _stage_worker(stage, log_dir, scratch_dir, queue):
+    try:
+        seconds, lines = run_stage(stage, log_dir, scratch_dir)
+        # ru_maxrss is in KiB on Linux and bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        peak_mb = peak / 2**20 if sys.platform == 'darwin' else peak / 2**10
+        queue.put({'wall_seconds': seconds, 'lines': lines, 'peak_rss_mb': peak_mb})
+    except Exception as e:
+        queue.put({'error': f"{type(e).__name__}: {e}"})
+
+def _exit_reason(exitcode):
+    if exitcode is not None and exitcode < 0:
+        return f"killed by signal {-exitcode}"
+    return f"exit code {exitcode}"
+
+def _result(process, queue):
+    """The stage process's result, or an error if it exits without one"""
+    while True:
+        try:
+            return queue.get(timeout=POLL_SECONDS)
+        except queues.Empty:
+            if process.is_alive():
+                continue
+        # The process may have put its result just before exiting
+        try:
+            return queue.get(timeout=POLL_SECONDS)
+        except queues.Empty:
+            process.join()
+            return {'error': f"Stage process exited without a result ({_exit_reason(process.exitcode)})"}
+
+def measure(stage, log_dir, scratch_dir):
+    """Run a stage in a fresh interpreter and return its measurements"""
+    context = multiprocessing.get_context('spawn')
+    queue = context.Queue()
+    process = context.Process(target=_stage_worker, args=(stage, str(log_dir), str(scratch_dir), queue))
+    process.start()
+    result = _result(process, queue)
+    process.join()
+    if 'error' in result:
+        return result
+    log_bytes = sum(path.stat().st_size for path in Path(log_dir).glob('*.log'))
+    seconds = max(result['wall_seconds'], 1e-9)
+    result['lines_per_second'] = result['lines'] / seconds
+    result['mb_per_second'] = log_bytes / 2**20 / seconds if stage in READS_FILES else None
+    return result
+
+def compare(results, baseline, tolerance):
+    """Return a list of regression messages against the baseline results"""
+    regressions = []
+    for key, current in results.items():
+        previous = baseline.get(key)
+        if not previous or 'error' in previous or 'error' in current:
+            continue
+        if current['lines_per_second'] < previous['lines_per_second'] * (1 - tolerance):
+            regressions.append(
+                f"{key}: {current['lines_per_second']:,.0f} lines/s, baseline "
+                f"{previous['lines_per_second']:,.0f} "
+                f"({current['lines_per_second'] / previous['lines_per_second'] - 1:+.0%})"
+            )
+        if current['peak_rss_mb'] > previous['peak_rss_mb'] * (1 + tolerance):
+            regressions.append(
+                f"{key}: peak RSS {current['peak_rss_mb']:.0f} MB, baseline "
+                f"{previous['peak_rss_mb']:.0f} MB "
+                f"({current['peak_rss_mb'] / previous['peak_rss_mb'] - 1:+.0%})"
+            )
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the pipeline benchmarks')
+    parser.add_argument('--sizes', nargs='+', default=['10k', '100k', '1m'],
+                        help='Dataset sizes in lines, e.g. 10k 1m 100m')
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=STAGES, help='Stages to run')
+    parser.add_argument('--repeat', type=int, default=1,
+                        help='Runs per stage and size; the fastest is kept')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for the generated datasets')
+    parser.add_argument('--data-dir', type=str, help='Keep generated datasets here for reuse')
+    parser.add_argument('--output', type=str, help='Results JSON file (default: benchmarks/results/<time>.json)')
+    parser.add_argument('--baseline', type=str, help='Results JSON file to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='Allowed slowdown / memory growth relative to the baseline')
+    parser.add_argument('--save-baseline', type=str, help='Also write the results to this baseline file')
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        data_dir = Path(args.data_dir) if args.data_dir else Path(tmp_dir) / "data"
+        print(f"{'Stage':<20}{'Lines':>12}{'Time (s)':>10}{'Lines/s':>14}{'MB/s':>8}{'Peak RSS (MB)':>15}")
+        for size in map(parse_size, args.sizes):
+            log_dir = prepare_dataset(data_dir, size, args.seed)
+            if set(args.stages) - READS_FILES:
+                prepare_frame(log_dir)
+            for stage in args.stages:
+                key = f"{stage}@{size}"
+                runs = [measure(stage, log_dir, Path(tmp_dir) / "scratch" / key)
+                        for _ in range(max(1, args.repeat))]
+                results[key] = result = min(runs, key=lambda run: run.get('wall_seconds', float('inf')))
+                if 'error' in result:
+                    print(f"{stage:<20}{size:>12}  failed: {result['error']}")
+                    continue
+                mb_per_second = f"{result['mb_per_second']:.1f}" if result['mb_per_second'] else '-'
+                print(f"{stage:<20}{result['lines']:>12}{result['wall_seconds']:>10.2f}"
+                      f"{result['lines_per_second']:>14,.0f}{mb_per_second:>8}{result['peak_rss_mb']:>15.0f}")
+
+    document = {
+        'meta': {
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': multiprocessing.cpu_count(),
+            'seed': args.seed,
+        },
+        'results': results,
+    }
+    output = Path(args.output) if args.output else (
+        Path(__file__).parent / 'results' / f"{datetime.now():%Y%m%d_%H%M%S}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(document, indent=4))
+    print(f"\nResults written to {output}")
+    if args.save_baseline:
+        Path(args.save_baseline).write_text(json.dumps(document, indent=4))
+        print(f"Baseline written to {args.save_baseline}")
+
+    failed = [key for key, result in results.items() if 'error' in result]
+    regressions = []
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())['results']
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\nPERFORMANCE REGRESSIONS (tolerance {args.tolerance:.0%}):")
+            for message in regressions:
+                print(f"  {message}")
+        else:
+            print(f"\nNo regressions against {args.baseline}")
+    sys.exit(1 if regressions or failed else 0)
+
+if __name__ == "__main__":
+    main()
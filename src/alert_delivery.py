@@ -0,0 +1,230 @@
+import hashlib
+import queue
+import re
+import smtplib
+import threading
+import time
+
+_DIGITS_RE = re.compile(r'\d+')
+_STOP = object()
+
+def alert_fingerprint(alert):
+    """Key under which identical alerts are deduplicated.
+
+    Digits are masked so the same failure at different times, or with a
+    different response time or count, maps to the same fingerprint.
+    """
+    text = f"{alert.get('severity')}|{_DIGITS_RE.sub('#', str(alert.get('message', '')))}"
+    return hashlib.blake2b(text.encode(), digest_size=8).hexdigest()
+
+class SMTPConnection:
+    """SMTP session that is opened once and reused for every message.
+
+    STARTTLS and login only run when the session is (re)opened. A session
+    that has been idle for a while is checked with NOOP before reuse. Safe
+    to share between the dispatcher thread and direct senders.
+    """
+
+    def __init__(self, smtp_config, smtp_factory=None, timeout=30, idle_check=60):
+        self.smtp_config = smtp_config
+        self.smtp_factory = smtp_factory or smtplib.SMTP
+        self.timeout = timeout
+        self.idle_check = idle_check
+        self.server = None
+        self.last_used = 0.0
+        self.connects = 0
+        self.lock = threading.Lock()
+
+    def open(self):
+        server = self.smtp_factory(self.smtp_config['server'], self.smtp_config['port'],
+                                   timeout=self.timeout)
+        try:
+            server.starttls()
+            server.login(self.smtp_config['username'], self.smtp_config['password'])
+        except Exception:
+            server.close()
+            raise
+        self.server = server
+        self.connects += 1
+
+    def send(self, msg):
+        with self.lock:
+            if self.server is not None and time.monotonic() - self.last_used > self.idle_check:
+                try:
+                    self.server.noop()
+                except (smtplib.SMTPException, OSError):
+                    self._close()
+            if self.server is None:
+                self.open()
+            self.server.send_message(msg)
+            self.last_used = time.monotonic()
+
+    def close(self):
+        with self.lock:
+            self._close()
+
+    def _close(self):
+        if self.server is None:
+            return
+        try:
+            self.server.quit()
+        except (smtplib.SMTPException, OSError):
+            self.server.close()
+        self.server = None
+
+class AlertDispatcher:
+    """Background delivery of alerts through a bounded queue.
+
+    A worker thread collects queued alerts for ``digest_seconds`` and sends
+    them as a single digest message over one persistent SMTP connection.
+    Alerts with the same fingerprint are merged within a digest and
+    suppressed for ``dedup_seconds`` after being sent; the next digest
+    lists how many were suppressed. Failed sends are retried with
+    exponential backoff. When the queue is full, new alerts are dropped
+    rather than blocking the analysis cycle. An error while handling one
+    item is logged and counted as failed, so the worker keeps running.
+
+    `build_message(entries, suppressed)` gets the digest entries and the
+    suppressed ones, each a dict with the first 'alert' of a fingerprint
+    and its 'count'.
+    """
+
+    def __init__(self, connection, build_message, delivery_config, logger=None):
+        self.connection = connection
+        self.build_message = build_message
+        self.digest_seconds = delivery_config['digest_seconds']
+        self.dedup_seconds = delivery_config['dedup_seconds']
+        self.max_retries = delivery_config['max_retries']
+        self.retry_backoff = delivery_config['retry_backoff']
+        self.logger = logger
+        self.queue = queue.Queue(maxsize=delivery_config['queue_size'])
+        self.pending = {}
+        self.suppressed = {}
+        self.window_end = None
+        self.sent_at = {}
+        self.counts = {'queued': 0, 'dropped': 0, 'suppressed': 0, 'sent': 0, 'failed': 0}
+        # Time spent talking to the SMTP server, including retries
+        self.send_seconds = 0.0
+        self._stopping = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='alert-dispatcher', daemon=True)
+        self._thread.start()
+
+    def _log(self, level, message):
+        if self.logger:
+            getattr(self.logger, level)(message)
+
+    def submit(self, alert):
+        """Queue one alert without blocking; returns False if it was dropped"""
+        try:
+            self.queue.put_nowait(alert)
+        except queue.Full:
+            self.counts['dropped'] += 1
+            self._log('warning', "Alert queue is full, dropping alert")
+            return False
+        self.counts['queued'] += 1
+        return True
+
+    def flush(self, timeout=None):
+        """Send everything queued so far now, without waiting for the digest window"""
+        done = threading.Event()
+        self.queue.put(done, timeout=timeout)
+        return done.wait(timeout)
+
+    def close(self, timeout=None):
+        """Deliver pending alerts, stop the worker and close the SMTP session"""
+        if not self._thread.is_alive():
+            return
+        self._stopping.set()
+        self.queue.put(_STOP, timeout=timeout)
+        self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            wait = None
+            if self.window_end is not None:
+                wait = max(self.window_end - time.monotonic(), 0)
+            try:
+                item = self.queue.get(timeout=wait)
+            except queue.Empty:
+                item = None
+
+            if item is _STOP:
+                try:
+                    self._deliver_pending()
+                finally:
+                    self.connection.close()
+                return
+            try:
+                if isinstance(item, threading.Event):
+                    self._deliver_pending()
+                    continue
+                if item is not None:
+                    self._add(item)
+                if self.window_end is not None and time.monotonic() >= self.window_end:
+                    self._deliver_pending()
+            except Exception as e:
+                self._log('error', f"Error in alert dispatcher: {e}")
+            finally:
+                if isinstance(item, threading.Event):
+                    item.set()
+
+    def _add(self, alert):
+        now = time.monotonic()
+        fingerprint = alert_fingerprint(alert)
+        sent_at = self.sent_at.get(fingerprint)
+        if sent_at is not None and now - sent_at < self.dedup_seconds:
+            self.counts['suppressed'] += 1
+            entry = self.suppressed.setdefault(fingerprint, {'alert': alert, 'count': 0})
+            entry['count'] += 1
+            return
+        entry = self.pending.get(fingerprint)
+        if entry is None:
+            self.pending[fingerprint] = {'alert': alert, 'count': 1, 'last_timestamp': alert.get('timestamp')}
+        else:
+            entry['count'] += 1
+            entry['last_timestamp'] = alert.get('timestamp')
+        if self.window_end is None:
+            self.window_end = now + self.digest_seconds
+
+    def _deliver_pending(self):
+        self.window_end = None
+        if not self.pending:
+            return
+        entries = list(self.pending.values())
+        fingerprints = list(self.pending)
+        suppressed = list(self.suppressed.values())
+        self.pending, self.suppressed = {}, {}
+        alert_count = sum(entry['count'] for entry in entries)
+        started = time.perf_counter()
+        try:
+            sent = self._send_with_retry(self.build_message(entries, suppressed))
+        except Exception as e:
+            self._log('error', f"Failed to build alert digest: {e}")
+            sent = False
+        self.send_seconds += time.perf_counter() - started
+        if sent:
+            now = time.monotonic()
+            for fingerprint in fingerprints:
+                self.sent_at[fingerprint] = now
+            self.sent_at = {key: value for key, value in self.sent_at.items()
+                            if now - value < self.dedup_seconds}
+            self.counts['sent'] += alert_count
+            self._log('info', f"Alert digest sent with {alert_count} alerts")
+        else:
+            self.counts['failed'] += alert_count
+
+    def _send_with_retry(self, msg):
+        for attempt in range(self.max_retries + 1):
+            try:
+                self.connection.send(msg)
+                return True
+            except (smtplib.SMTPException, OSError) as e:
+                self.connection.close()
+                if attempt == self.max_retries:
+                    self._log('error', f"Failed to send alert digest: {e}")
+                    return False
+                delay = self.retry_backoff * 2 ** attempt
+                self._log('warning', f"Sending alert digest failed ({e}), retrying in {delay:.1f}s")
+                # Shutdown does not wait for the full backoff
+                self._stopping.wait(delay)
+        return False
@@ -1,18 +1,31 @@
-import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from datetime import datetime
+import numpy as np
+from alert_delivery import AlertDispatcher, SMTPConnection
 from config import Config
+from log_columns import LogColumns
 from utils import setup_rotating_logger
 
+ERROR_CODE = Config.SEVERITY_LEVELS.index('ERROR')
+HOUR_NS = 3600 * 10**9
+
 class AlertSystem:
-    def __init__(self, smtp_config=None):
+    def __init__(self, smtp_config=None, delivery_config=None, smtp_factory=None):
         self.smtp_config = smtp_config or Config.SMTP_CONFIG
+        self.delivery_config = {**Config.ALERT_DELIVERY_CONFIG, **(delivery_config or {})}
         self.thresholds = Config.ALERT_THRESHOLDS
         self.logger = setup_rotating_logger(
             'alert_system',
             Config.LOGS_DIR / 'alerts.log'
         )
+        self.connection = SMTPConnection(
+            self.smtp_config, smtp_factory,
+            timeout=self.delivery_config['timeout'],
+            idle_check=self.delivery_config['idle_check']
+        )
+        self.dispatcher = None
+        self.error_history = np.empty(0, dtype=np.int64)
 
     def create_alert_message(self, error_data):
         """Create an email message for the alert"""
@@ -37,31 +50,200 @@ class AlertSystem:
         
         return msg
 
+    def create_digest_message(self, entries, suppressed=()):
+        """Create one email for a window of alerts.
+
+        `entries` are dicts with the first 'alert' of a fingerprint, its
+        'count' and 'last_timestamp'; `suppressed` lists the duplicates of
+        recently sent alerts since the previous digest, with their 'count'.
+        A single alert with nothing suppressed keeps the regular format.
+        """
+        if len(entries) == 1 and entries[0]['count'] == 1 and not suppressed:
+            return self.create_alert_message(entries[0]['alert'])
+
+        total = sum(entry['count'] for entry in entries)
+        subject = (f"CRITICAL ALERT: Log Analysis Digest - {total} alerts - "
+                   f"{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        limit = self.delivery_config['max_digest_entries']
+        lines = []
+        for entry in entries[:limit]:
+            alert = entry['alert']
+            line = (f"- {entry['count']}x {alert.get('severity', 'N/A')} {alert.get('message', 'N/A')}"
+                    f" (first: {alert.get('timestamp', 'N/A')}")
+            if entry['count'] > 1:
+                line += f", last: {entry['last_timestamp']}"
+            if alert.get('response_time') is not None:
+                line += f", response_time={alert['response_time']}"
+            lines.append(line + ")")
+        if len(entries) > limit:
+            lines.append(f"- ... and {len(entries) - limit} more distinct alerts")
+        if suppressed:
+            lines.append(f"\nSuppressed as duplicates of recently sent alerts "
+                         f"({sum(entry['count'] for entry in suppressed)}):")
+            for entry in suppressed[:limit]:
+                alert = entry['alert']
+                lines.append(f"- {entry['count']}x {alert.get('severity', 'N/A')} {alert.get('message', 'N/A')}")
+            if len(suppressed) > limit:
+                lines.append(f"- ... and {len(suppressed) - limit} more distinct alerts")
+        body = "Critical Alert Digest from Log Analyzer\n\n" + "\n".join(lines) + "\n"
+
+        msg = MIMEMultipart()
+        msg['From'] = self.smtp_config['from_email']
+        msg['To'] = self.smtp_config['to_email']
+        msg['Subject'] = subject
+        msg.attach(MIMEText(body, 'plain'))
+        return msg
+
+    def _has_credentials(self):
+        if not all([self.smtp_config['username'], self.smtp_config['password']]):
+            self.logger.warning("SMTP credentials not configured. Skipping alert.")
+            return False
+        return True
+
     def send_alert(self, error_data):
-        """Send an email alert for critical errors"""
+        """Send an email alert for critical errors right away"""
         try:
-            if not all([self.smtp_config['username'], self.smtp_config['password']]):
-                self.logger.warning("SMTP credentials not configured. Skipping alert.")
+            if not self._has_credentials():
                 return False
 
             msg = self.create_alert_message(error_data)
-            
-            with smtplib.SMTP(self.smtp_config['server'], self.smtp_config['port']) as server:
-                server.starttls()
-                server.login(self.smtp_config['username'], self.smtp_config['password'])
-                server.send_message(msg)
+            self.connection.send(msg)
             
             self.logger.info(f"Alert sent successfully for error at {error_data.get('timestamp')}")
             return True
             
         except Exception as e:
+            self.connection.close()
             self.logger.error(f"Failed to send alert: {str(e)}")
             return False
 
+    def queue_alerts(self, alerts):
+        """Hand alerts to the background dispatcher; returns how many were queued.
+
+        Alerts are sent as digests (Config.ALERT_DELIVERY_CONFIG) without
+        blocking the caller. Call flush() or close() to send them sooner.
+        """
+        if not alerts or not self._has_credentials():
+            return 0
+        if self.dispatcher is None:
+            self.dispatcher = AlertDispatcher(
+                self.connection, self.create_digest_message, self.delivery_config, self.logger
+            )
+        return sum(self.dispatcher.submit(alert) for alert in alerts)
+
+    def delivery_stats(self):
+        """Alert delivery counts so far and the seconds spent sending them"""
+        if self.dispatcher is None:
+            return {'queued': 0, 'dropped': 0, 'suppressed': 0, 'sent': 0, 'failed': 0,
+                    'send_seconds': 0.0}
+        return {**self.dispatcher.counts, 'send_seconds': self.dispatcher.send_seconds}
+
+    def flush(self, timeout=None):
+        """Send all queued alerts now"""
+        if self.dispatcher is not None:
+            self.dispatcher.flush(timeout)
+
+    def close(self, timeout=None):
+        """Send all queued alerts and shut down the dispatcher and SMTP session"""
+        if self.dispatcher is not None:
+            self.dispatcher.close(timeout)
+            self.dispatcher = None
+        self.connection.close()
+
     def should_send_alert(self, error_data):
         """Determine if an alert should be sent based on error severity and thresholds"""
         if error_data['severity'] == 'ERROR':
             return True
         if error_data.get('response_time') and error_data['response_time'] > self.thresholds['response_time']:
             return True
-        return False
\ No newline at end of file
+        return False
+
+    def _alert_columns(self, data):
+        """Return (index, is_error, response_times, timestamps in ns) for a frame or LogColumns"""
+        if isinstance(data, LogColumns):
+            index = np.arange(len(data))
+            is_error = np.frombuffer(data.severities, dtype=np.int8) == ERROR_CODE
+            response_times = np.frombuffer(data.response_times, dtype=np.float32)
+            # NAT_SECONDS stays the NaT sentinel after the conversion to ns
+            timestamps = (np.frombuffer(data.timestamps, dtype=np.int64)
+                          .astype('datetime64[s]').astype('datetime64[ns]').view(np.int64))
+            return index, is_error, response_times, timestamps
+        is_error = (data['severity'] == 'ERROR').to_numpy(dtype=bool)
+        response_times = data['response_time'].to_numpy(dtype=np.float64, na_value=np.nan)
+        timestamps = data['timestamp'].to_numpy(dtype='datetime64[ns]').view(np.int64)
+        return data.index, is_error, response_times, timestamps
+
+    def error_rate_breaches(self, is_error, timestamps, history=None):
+        """Find where the number of errors in the trailing hour exceeds error_count.
+
+        Returns (position, error_count) pairs for the error rows at which the
+        rolling one-hour count first goes above the threshold; it has to drop
+        back to the threshold before another breach is reported. `history`
+        holds the sorted int64 times of errors from earlier batches; they
+        count towards the window but are never reported again.
+        """
+        positions = np.flatnonzero(is_error & (timestamps != np.iinfo(np.int64).min))
+        earlier = np.empty(0, dtype=np.int64) if history is None else history
+        if not len(positions) or len(positions) + len(earlier) <= self.thresholds['error_count']:
+            return []
+        # Earlier errors are marked with position -1
+        positions = np.concatenate([np.full(len(earlier), -1), positions])
+        times = np.concatenate([earlier, timestamps[positions[len(earlier):]]])
+        order = np.argsort(times, kind='stable')
+        positions, times = positions[order], times[order]
+        # Errors in (t - 1h, t] for every error time t
+        counts = np.arange(1, len(times) + 1) - np.searchsorted(times, times - HOUR_NS, side='right')
+        over = counts > self.thresholds['error_count']
+        starts = over & ~np.concatenate([[False], over[:-1]]) & (positions >= 0)
+        return [(positions[i], int(counts[i])) for i in np.flatnonzero(starts)]
+
+    def _evaluate_positions(self, data, history=None):
+        index, is_error, response_times, timestamps = self._alert_columns(data)
+        with np.errstate(invalid='ignore'):
+            slow = response_times > self.thresholds['response_time']
+        return index, np.flatnonzero(is_error | slow), self.error_rate_breaches(is_error, timestamps, history)
+
+    def _update_error_history(self, data):
+        """Keep the error times a following batch needs for its one-hour window"""
+        _, is_error, _, timestamps = self._alert_columns(data)
+        times = timestamps[is_error & (timestamps != np.iinfo(np.int64).min)]
+        times = np.sort(np.concatenate([self.error_history, times]))
+        if len(times):
+            # Two hours, so the counts of the latest earlier errors stay exact
+            times = times[times > times[-1] - 2 * HOUR_NS]
+        self.error_history = times
+
+    def evaluate(self, data):
+        """Apply all alert rules to a DataFrame or LogColumns batch in one pass.
+
+        Returns a dict with 'rows', the index labels (row positions for
+        LogColumns) of rows that are errors or exceed the response time
+        threshold, and 'error_rate', (label, error_count) pairs where the
+        errors in the trailing hour exceed the error_count threshold.
+        """
+        index, rows, breaches = self._evaluate_positions(data)
+        return {
+            'rows': index[rows],
+            'error_rate': [(index[position], count) for position, count in breaches]
+        }
+
+    def collect_alerts(self, df, carry_over=False):
+        """Build the alert payloads for a DataFrame of parsed logs.
+
+        With `carry_over` the error rate rule also counts errors from
+        previous calls, for batches that arrive a few lines at a time.
+        """
+        _, rows, breaches = self._evaluate_positions(df, self.error_history if carry_over else None)
+        if carry_over:
+            self._update_error_history(df)
+        alerts = df.iloc[rows][['timestamp', 'severity', 'message', 'response_time']]
+        alerts = alerts.astype(object).where(alerts.notna(), None).to_dict('records')
+        for position, count in breaches:
+            alerts.append({
+                'timestamp': df['timestamp'].iat[position],
+                'severity': 'ERROR',
+                'message': f"{count} errors within one hour "
+                           f"(threshold {self.thresholds['error_count']} per hour)",
+                'response_time': None
+            })
+        return alerts
\ No newline at end of file
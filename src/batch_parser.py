@@ -0,0 +1,128 @@
+import re
+import numpy as np
+import pandas as pd
+from config import Config
+from log_parser import NAT_SECONDS, LogParser
+from log_reader import iter_file_blocks
+
+# The vectorized timestamp conversion only handles the exact ASCII layout
+# of LogParser.TIMESTAMP_FORMAT; anything else goes through the scalar parser.
+ASCII_TIMESTAMP = r'[0-9]{4}-[0-9]{2}-[0-9]{2} [0-9]{2}:[0-9]{2}:[0-9]{2}'
+# What bytes.strip() removes; str.strip() would also take Unicode spaces
+ASCII_WHITESPACE = ' \t\n\r\x0b\x0c'
+
+class BatchParser:
+    """Vectorized parser for blocks of log lines.
+
+    Each batch is loaded into a pandas Series and split with one
+    ``str.extract`` call using the same combined layout pattern as
+    ``LogParser``, matched with ASCII rules as the bytes patterns of
+    ``LogParser.parse_fields`` are; timestamps are converted with ``pd.to_datetime`` and an
+    explicit format. Rows the vectorized path does not cover are handed to
+    ``LogParser.parse_fields``, so the result matches it row for row,
+    including the message body of standard-layout lines.
+    """
+
+    def __init__(self, parser=None, batch_size=None):
+        self.parser = parser or LogParser()
+        self.batch_size = batch_size or Config.BATCH_CONFIG['batch_size']
+        self.layout = self.parser.layout_re.pattern
+        self.guard = self.parser.guard_re.pattern
+        # str.extract names unnamed groups by their 0-based position
+        self._response_time_column = self.parser._response_time_group - 1
+        self._severity_codes = {}
+
+    def severity_code(self, level):
+        code = self._severity_codes.get(level)
+        if code is None:
+            code = Config.SEVERITY_LEVELS.index(self.parser.severity_for_level(level))
+            self._severity_codes[level] = code
+        return code
+
+    def parse_batch(self, lines):
+        """Parse a list of str lines into (timestamps, codes, messages, response_times)"""
+        messages = pd.Series(lines, dtype=object).str.strip(ASCII_WHITESPACE)
+        parts = messages.str.extract(self.layout, flags=re.ASCII)
+
+        body = parts['body'].fillna(parts['plain'])
+        fast = parts['timestamp'].str.fullmatch(ASCII_TIMESTAMP).fillna(False).astype(bool)
+        # str.count rather than str.contains, as the guard has a capture group
+        fast &= ~(body.str.count(self.guard, flags=re.ASCII).fillna(0) > 0)
+        timestamps = pd.to_datetime(parts['timestamp'].where(fast), format=LogParser.TIMESTAMP_FORMAT,
+                                    errors='coerce')
+        # Impossible dates and times take the scalar path, which rejects them
+        fast &= timestamps.notna()
+
+        timestamps = timestamps.to_numpy(dtype='datetime64[ns]', copy=True)
+        codes = parts['level'].map(self.severity_code, na_action='ignore')
+        codes = codes.fillna(0).to_numpy(dtype=np.int8, copy=True)
+        response_times = pd.to_numeric(parts[self._response_time_column]).to_numpy(dtype=np.float64, copy=True)
+        # Standard-layout lines keep only their body, as in LogParser.parse_fields
+        messages = body.str.strip(ASCII_WHITESPACE).fillna('').where(fast, messages).to_numpy(dtype=object, copy=True)
+
+        keep = fast.to_numpy(dtype=bool, copy=True)
+        for i in np.flatnonzero(~keep):
+            fields = self.parser.parse_fields(lines[i].encode('utf-8'))
+            if fields is None:
+                continue
+            keep[i] = True
+            seconds, codes[i], response_times[i], message = fields
+            timestamps[i] = np.datetime64('NaT') if seconds == NAT_SECONDS else np.datetime64(seconds, 's')
+            messages[i] = message.decode('utf-8')
+
+        if keep.all():
+            return timestamps, codes, messages, response_times
+        return timestamps[keep], codes[keep], messages[keep], response_times[keep]
+
+    def iter_batches(self, log_files):
+        """Yield lists of at most batch_size str lines from the given files"""
+        block_size = Config.STREAMING_CONFIG['block_size']
+        for log_file in log_files:
+            with open(log_file, 'rb') as f:
+                size = f.seek(0, 2)
+            for block in iter_file_blocks(log_file, 0, size, block_size):
+                lines = block.decode('utf-8', 'replace').split('\n')
+                if not lines[-1]:
+                    lines.pop()
+                for start in range(0, len(lines), self.batch_size):
+                    yield lines[start:start + self.batch_size]
+
+    def parse_lines(self, lines):
+        """Parse an iterable of str lines into the analysis DataFrame"""
+        batch = []
+        batches = []
+        for line in lines:
+            batch.append(line)
+            if len(batch) == self.batch_size:
+                batches.append(batch)
+                batch = []
+        if batch:
+            batches.append(batch)
+        return self.to_frame(self.parse_batch(batch) for batch in batches)
+
+    def parse_files(self, log_files, logger=None):
+        """Parse log files batch by batch into the analysis DataFrame"""
+        results = []
+        for log_file in log_files:
+            try:
+                results.extend(self.parse_batch(batch) for batch in self.iter_batches([log_file]))
+            except Exception as e:
+                if logger:
+                    logger.error(f"Error processing file {log_file}: {e}")
+        return self.to_frame(results)
+
+    @staticmethod
+    def to_frame(results):
+        """Concatenate parse_batch results into the same frame as LogColumns.to_frame"""
+        results = list(results)
+        if not results:
+            results = [(np.array([], dtype='datetime64[ns]'), np.array([], dtype=np.int8),
+                        np.array([], dtype=object), np.array([], dtype=np.float64))]
+        timestamps, codes, messages, response_times = (np.concatenate(column) for column in zip(*results))
+        return pd.DataFrame({
+            'timestamp': timestamps,
+            'severity': pd.Categorical.from_codes(codes, categories=Config.SEVERITY_LEVELS),
+            # Categories in order of first appearance, as LogColumns interns them
+            'message': pd.Categorical(messages, categories=pd.unique(messages)),
+            'response_time': response_times.astype(np.float32)
+        })
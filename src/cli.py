@@ -3,46 +3,191 @@ import sys
 from pathlib import Path
 from datetime import datetime, timedelta
 import logging
-from log_analyzer import LogAnalyzer
-from visualizer import LogVisualizer
-from alert_system import AlertSystem
 from config import Config
-from utils import validate_config, get_system_metrics
-from tqdm import tqdm
+
+# pandas, matplotlib, psutil and tqdm are imported inside the commands that
+# need them, so cheap commands such as `metrics` and `cleanup` start fast.
+
+# Options of the top-level parser that a command repeats are given
+# default=SUPPRESS on the command, so a value passed before the command
+# name is not overwritten by the command's default.
+SUPPRESS = argparse.SUPPRESS
+# Top-level options each command also takes. The others are rejected when
+# given before a command that doesn't use them, rather than ignored.
+COMMAND_OPTIONS = {
+    'metrics': [],
+    'cleanup': ['report_dir'],
+    'history': ['since', 'until'],
+    'query': ['log_dir', 'since', 'until', 'workers'],
+}
+
+def add_analysis_arguments(parser, suppress_defaults=False):
+    default = (lambda value: SUPPRESS) if suppress_defaults else (lambda value: value)
+    parser.add_argument('--log-dir', type=str, default=default(None), help='Directory containing log files')
+    parser.add_argument('--report-dir', type=str, default=default(None), help='Directory for saving reports')
+    parser.add_argument('--vis-dir', type=str, default=default(None), help='Directory for saving visualizations')
+    parser.add_argument('--since', type=str, default=default(None),
+                        help='Analyze logs since (YYYY-MM-DD or YYYY-MM-DD HH:MM:SS)')
+    parser.add_argument('--until', type=str, default=default(None),
+                        help='Analyze logs before (YYYY-MM-DD or YYYY-MM-DD HH:MM:SS)')
+    parser.add_argument('--alert', action='store_true', default=default(False), help='Enable email alerts')
+    parser.add_argument('--metrics', action='store_true', default=default(False), help='Show system metrics')
+    parser.add_argument('--cleanup', action='store_true', default=default(False), help='Clean up old files')
+    parser.add_argument('--workers', type=int, default=default(Config.PARALLEL_CONFIG['workers']),
+                        help='Number of worker processes for parsing logs')
+    parser.add_argument('--summary-only', action='store_true', default=default(False),
+                        help='Only write the summary report, streaming it in constant memory')
 
 def setup_argparse():
     parser = argparse.ArgumentParser(description='Log Analyzer CLI')
-    parser.add_argument('--log-dir', type=str, help='Directory containing log files')
-    parser.add_argument('--report-dir', type=str, help='Directory for saving reports')
-    parser.add_argument('--vis-dir', type=str, help='Directory for saving visualizations')
-    parser.add_argument('--since', type=str, help='Analyze logs since (YYYY-MM-DD)')
-    parser.add_argument('--alert', action='store_true', help='Enable email alerts')
-    parser.add_argument('--metrics', action='store_true', help='Show system metrics')
-    parser.add_argument('--cleanup', action='store_true', help='Clean up old files')
+    # Without a command the CLI analyzes logs, as it always has
+    add_analysis_arguments(parser)
+    subparsers = parser.add_subparsers(dest='command', metavar='command')
+    analyze_parser = subparsers.add_parser('analyze', help='Analyze logs and write a report (default)')
+    add_analysis_arguments(analyze_parser, suppress_defaults=True)
+    subparsers.add_parser('metrics', help='Show system metrics')
+    cleanup_parser = subparsers.add_parser('cleanup', help='Delete reports older than the retention period')
+    cleanup_parser.add_argument('--report-dir', type=str, default=SUPPRESS,
+                                help='Directory of the reports to clean up')
+    history_parser = subparsers.add_parser('history', help='Show log volume, error rate and response times '
+                                                           'over time from the service history',
+                                           description='Reads only the history database of '
+                                                       'Config.HISTORY_CONFIG (or --db); it does not '
+                                                       'read log files or reports.')
+    history_parser.add_argument('--since', type=str, default=SUPPRESS,
+                                help='Start (YYYY-MM-DD or YYYY-MM-DD HH:MM:SS)')
+    history_parser.add_argument('--until', type=str, default=SUPPRESS,
+                                help='End, exclusive (YYYY-MM-DD or YYYY-MM-DD HH:MM:SS)')
+    history_parser.add_argument('--resolution', type=str, default='1D',
+                                help='Bucket size, e.g. 1min, 1h or 1D (default: 1D)')
+    history_parser.add_argument('--db', type=str, help='History database (default: from HISTORY_CONFIG)')
+    query_parser = subparsers.add_parser('query', help='Filter, group and count parsed log rows')
+    query_parser.add_argument('--log-dir', type=str, default=SUPPRESS, help='Directory containing log files')
+    query_parser.add_argument('--since', type=str, default=SUPPRESS,
+                              help='Rows since (YYYY-MM-DD or YYYY-MM-DD HH:MM:SS)')
+    query_parser.add_argument('--until', type=str, default=SUPPRESS,
+                              help='Rows before (YYYY-MM-DD or YYYY-MM-DD HH:MM:SS)')
+    query_parser.add_argument('--severity', type=str, nargs='+', help='Keep only these severity levels')
+    query_parser.add_argument('--contains', type=str, help='Keep messages containing this text')
+    query_parser.add_argument('--regex', type=str, help='Keep messages matching this regular expression')
+    query_parser.add_argument('-i', '--ignore-case', action='store_true',
+                              help='Match --contains and --regex case-insensitively')
+    query_parser.add_argument('--min-response-time', type=float, help='Keep rows with at least this response time (ms)')
+    query_parser.add_argument('--max-response-time', type=float, help='Keep rows with at most this response time (ms)')
+    query_parser.add_argument('--group-by', type=str, nargs='+', metavar='KEY',
+                              help='Count rows per severity, message, template, minute, hour and/or day')
+    query_parser.add_argument('--top', type=int, help='Only show the N largest groups')
+    query_parser.add_argument('--limit', type=int, default=20, help='Rows shown without --group-by (default: 20)')
+    query_parser.add_argument('--workers', type=int, default=SUPPRESS,
+                              help='Number of worker processes for parsing uncached logs')
     return parser
 
-def process_logs_with_progress(analyzer, log_dir):
-    """Process logs with progress bar"""
-    log_files = list(Path(log_dir).glob('*.log'))
-    all_logs = []
-    
-    for log_file in tqdm(log_files, desc="Processing log files"):
-        try:
-            with open(log_file, 'r') as f:
-                lines = f.readlines()
-                for line in tqdm(lines, desc=f"Processing {log_file.name}", leave=False):
-                    parsed = analyzer.parse_log_line(line)
-                    if parsed:
-                        all_logs.append(parsed)
-        except Exception as e:
-            logging.error(f"Error processing {log_file}: {e}")
-    
-    return analyzer.analyze_logs()
+def process_logs_with_progress(analyzer, log_dir, workers=1, summary_only=False,
+                               since=None, until=None):
+    """Parse all logs once with a progress bar over the bytes consumed.
+
+    Returns the parsed DataFrame, or the streamed summary dict when
+    `summary_only` is set, followed by the throughput line. With `since` or
+    `until` only rows in that range are returned, and the bar counts the
+    bytes actually read.
+    """
+    from ingestion import IngestionStats
+    from log_reader import list_log_files
+    from tqdm import tqdm
+
+    log_files = list_log_files(log_dir, Config.ARCHIVE_CONFIG['enabled'])
+    total_bytes = sum(log_file.stat().st_size for log_file in log_files)
+    with tqdm(total=total_bytes, unit='B', unit_scale=True, unit_divisor=1024,
+              desc="Processing logs") as progress:
+        stats = IngestionStats(progress.update)
+        if summary_only:
+            result = analyzer.summarize_logs(workers=workers, since=since, until=until,
+                                             stats=stats)
+        else:
+            result = analyzer.analyze_logs(workers=workers, stats=stats, since=since,
+                                           until=until)
+        # Bytes skipped through the time index were never read
+        progress.total = stats.bytes
+        progress.refresh()
+    print(f"Parsed {stats}")
+    return result
+
+def show_metrics():
+    """Print CPU, memory and disk usage"""
+    from utils import get_system_metrics
+
+    metrics = get_system_metrics()
+    if metrics:
+        print("\nSystem Metrics:")
+        print(f"CPU Usage: {metrics['cpu_percent']}%")
+        print(f"Memory Usage: {metrics['memory_percent']}%")
+        if metrics['disk_usage']:
+            print(f"Disk Usage: {metrics['disk_usage']['percent']:.1f}%")
+
+def run_cleanup(report_dir=None):
+    """Delete reports older than Config.RETENTION_DAYS"""
+    from utils import cleanup_files
+
+    cleaned = cleanup_files(Path(report_dir) if report_dir else Config.REPORTS_DIR, Config.RETENTION_DAYS)
+    if cleaned > 0:
+        print(f"\nCleaned up {cleaned} old files")
+    return cleaned
+
+def show_history(args):
+    """Print log counts, error rate and response times per bucket from the history store"""
+    from history_store import HistoryStore
+
+    store = HistoryStore(args.db)
+    rollup = store.rollup(datetime.fromisoformat(args.since) if args.since else None,
+                          datetime.fromisoformat(args.until) if args.until else None,
+                          args.resolution)
+    if not len(rollup):
+        print("No history recorded for this range")
+        return rollup
+    frame = rollup.frame
+    totals = frame[Config.SEVERITY_LEVELS].sum(axis=1)
+    mean = frame['response_time_sum'] / frame['response_time_count'].where(frame['response_time_count'] > 0)
+    print(f"{'Bucket':<20}{'Logs':>12}{'Errors':>10}{'Error %':>9}{'Mean (ms)':>11}{'Max (ms)':>11}")
+    for bucket, total, errors, mean_time, max_time in zip(frame.index, totals, frame['ERROR'], mean,
+                                                          frame['response_time_max']):
+        print(f"{bucket:%Y-%m-%d %H:%M}    {total:>12,}{errors:>10,}{errors / total:>9.2%}"
+              f"{mean_time:>11.1f}{max_time:>11.1f}")
+    return rollup
+
+def run_query(args):
+    """Print the log rows, or the groups of rows, matching the query options"""
+    import time
+    import pandas as pd
+    from log_analyzer import LogAnalyzer
+    from log_query import LogQuery, group_rows
+
+    start = time.perf_counter()
+    try:
+        query = LogQuery(since=datetime.fromisoformat(args.since) if args.since else None,
+                         until=datetime.fromisoformat(args.until) if args.until else None,
+                         severities=args.severity, contains=args.contains, regex=args.regex,
+                         ignore_case=args.ignore_case, min_response_time=args.min_response_time,
+                         max_response_time=args.max_response_time)
+        analyzer = LogAnalyzer(args.log_dir if args.log_dir else Config.LOGS_DIR)
+        df = analyzer.query(query, workers=args.workers)
+        result = group_rows(df, args.group_by, args.top) if args.group_by else df.head(args.limit)
+    except Exception as e:
+        logging.error(f"Error during query: {e}")
+        sys.exit(1)
+    elapsed = time.perf_counter() - start
+
+    if len(result):
+        with pd.option_context('display.max_colwidth', 80, 'display.width', 200):
+            print(result.to_string(index=False, float_format=lambda value: f"{value:.1f}"))
+    blocks = f", {query.blocks_read:,} of {query.blocks_total:,} cached blocks read" if query.blocks_total else ""
+    print(f"\n{len(df):,} of {query.rows_scanned:,} rows scanned matched in {elapsed:.2f}s{blocks}")
+    return result
+
+def run_analysis(args):
+    """Analyze logs, write the report and charts and optionally send alerts"""
+    from log_analyzer import LogAnalyzer
+    from utils import validate_config
 
-def main():
-    parser = setup_argparse()
-    args = parser.parse_args()
-    
     # Validate configuration
     if not validate_config():
         logging.error("Configuration validation failed")
@@ -50,43 +195,52 @@ def main():
     
     # Setup components
     analyzer = LogAnalyzer(args.log_dir if args.log_dir else Config.LOGS_DIR)
-    visualizer = LogVisualizer(args.vis_dir if args.vis_dir else Config.VISUALIZATIONS_DIR)
-    alert_system = AlertSystem() if args.alert else None
+    alert_system = None
+    if args.alert:
+        from alert_system import AlertSystem
+        alert_system = AlertSystem()
     
     # Show system metrics if requested
     if args.metrics:
-        metrics = get_system_metrics()
-        if metrics:
-            print("\nSystem Metrics:")
-            print(f"CPU Usage: {metrics['cpu_percent']}%")
-            print(f"Memory Usage: {metrics['memory_percent']}%")
-            if metrics['disk_usage']:
-                print(f"Disk Usage: {metrics['disk_usage']['percent']:.1f}%")
+        show_metrics()
     
     try:
-        # Process logs with progress bar
+        since_date = datetime.fromisoformat(args.since) if args.since else None
+        until_date = datetime.fromisoformat(args.until) if args.until else None
+
         print("\nAnalyzing logs...")
-        df = process_logs_with_progress(analyzer, args.log_dir or Config.LOGS_DIR)
-        
-        if df.empty:
-            print("No logs found to analyze")
-            return
-        
-        # Filter by date if specified
-        if args.since:
-            since_date = datetime.strptime(args.since, '%Y-%m-%d')
-            df = df[df['timestamp'] >= since_date]
-        
-        # Generate and save report
-        summary = analyzer.generate_summary(df)
+        if args.summary_only:
+            # Streamed summary; parsed rows are never held in memory
+            df = None
+            summary = process_logs_with_progress(analyzer, analyzer.log_dir, args.workers,
+                                                 summary_only=True, since=since_date,
+                                                 until=until_date)
+            if summary['total_logs'] == 0:
+                print("No logs found to analyze")
+                return
+        else:
+            df = process_logs_with_progress(analyzer, analyzer.log_dir, args.workers,
+                                            since=since_date, until=until_date)
+
+            if df.empty:
+                print("No logs found to analyze")
+                return
+            summary = analyzer.generate_summary(df)
+
+        # Save report
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         report_dir = Path(args.report_dir) if args.report_dir else Config.REPORTS_DIR
         report_file = report_dir / f"log_summary_{timestamp}.json"
         analyzer.save_report(summary, report_file)
         
         # Generate visualizations
-        print("\nGenerating visualizations...")
-        visualizer.generate_all_visualizations(df)
+        if df is not None:
+            from visualizer import LogVisualizer
+
+            print("\nGenerating visualizations...")
+            visualizer = LogVisualizer(args.vis_dir if args.vis_dir else Config.VISUALIZATIONS_DIR)
+            visualizer.generate_all_visualizations(df)
+            visualizer.close()
         
         # Show summary
         print("\nAnalysis Summary:")
@@ -95,29 +249,61 @@ def main():
         print(f"Warning Count: {summary['warning_count']}")
         print(f"Info Count: {summary['info_count']}")
         print(f"Average Response Time: {summary['avg_response_time']:.2f}ms")
+        print(f"Response Time p50/p95/p99: {summary['p50_response_time']:.2f}/"
+              f"{summary['p95_response_time']:.2f}/{summary['p99_response_time']:.2f}ms")
+        print(f"Distinct Messages: ~{summary['distinct_messages']:,}")
+        top_errors = summary.get('top_templates', {}).get('ERROR', [])[:3]
+        if top_errors:
+            print("Top Error Messages:")
+            for entry in top_errors:
+                print(f"  {entry['count']:>10,}  {entry['template']}")
         
         # Handle alerts if enabled
-        if args.alert and alert_system:
-            critical_logs = df[df['severity'] == 'ERROR']
-            if not critical_logs.empty:
+        if args.alert and alert_system and df is not None:
+            alerts = alert_system.collect_alerts(df)
+            if alerts:
                 print("\nSending alerts for critical errors...")
-                for _, log in critical_logs.iterrows():
-                    if alert_system.should_send_alert(log):
-                        alert_system.send_alert(log)
+                alert_system.queue_alerts(alerts)
+                # Send the digest now rather than waiting for the window to close
+                alert_system.close()
         
         # Cleanup if requested
         if args.cleanup:
-            from utils import cleanup_files
-            cleaned = cleanup_files(Config.REPORTS_DIR, Config.RETENTION_DAYS)
-            if cleaned > 0:
-                print(f"\nCleaned up {cleaned} old files")
+            run_cleanup()
         
         print(f"\nReport saved to: {report_file}")
-        print(f"Visualizations saved to: {visualizer.output_dir}")
+        if df is not None:
+            print(f"Visualizations saved to: {visualizer.output_dir}")
         
     except Exception as e:
         logging.error(f"Error during analysis: {e}")
         sys.exit(1)
 
+def parse_args(argv=None):
+    """Parse the command line, rejecting top-level options the command does not use"""
+    parser = setup_argparse()
+    args = parser.parse_args(argv)
+    if args.command in COMMAND_OPTIONS:
+        defaults = vars(parser.parse_args([]))
+        unused = [f"--{dest.replace('_', '-')}" for dest, default in defaults.items()
+                  if dest != 'command' and dest not in COMMAND_OPTIONS[args.command]
+                  and getattr(args, dest) != default]
+        if unused:
+            parser.error(f"{', '.join(unused)} cannot be used with the {args.command} command")
+    return args
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.command == 'metrics':
+        show_metrics()
+    elif args.command == 'cleanup':
+        run_cleanup(args.report_dir)
+    elif args.command == 'history':
+        show_history(args)
+    elif args.command == 'query':
+        run_query(args)
+    else:
+        run_analysis(args)
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -7,6 +7,8 @@ class Config:
     LOGS_DIR = BASE_DIR / "logs"
     REPORTS_DIR = BASE_DIR / "reports"
     VISUALIZATIONS_DIR = BASE_DIR / "visualizations"
+    STATE_DIR = BASE_DIR / "state"
+    CACHE_DIR = BASE_DIR / "cache"
 
     # Log analysis configuration
     LOG_PATTERNS = {
@@ -17,6 +19,92 @@ class Config:
         'response_time': r'response_time=(\d+\.?\d*)',
     }
 
+    # Severity categories, in the order used for categorical codes
+    SEVERITY_LEVELS = ['INFO', 'WARNING', 'ERROR']
+
+    # Incremental analysis configuration
+    INCREMENTAL_CONFIG = {
+        'enabled': True,  # Only parse data appended since the last cycle
+        'state_file': STATE_DIR / "tail_state.json",
+        'chunk_size': 8 * 1024 * 1024,  # bytes read per chunk
+        'hash_bytes': 256,  # bytes hashed to detect replaced files
+        'idle_seconds': 300,  # treat an unterminated last line as complete after this
+    }
+
+    # Parallel ingestion configuration
+    PARALLEL_CONFIG = {
+        'workers': 1,  # processes used by analyze_logs; 1 parses in-process
+        'chunk_size': 64 * 1024 * 1024,  # files larger than this are split
+    }
+
+    # Rotated archives (*.log.gz, *.log.bz2, *.log.zst) read with the plain logs;
+    # .zst needs the optional zstandard package
+    ARCHIVE_CONFIG = {
+        'enabled': True,
+    }
+
+    # Streaming summary configuration
+    STREAMING_CONFIG = {
+        'block_size': 4 * 1024 * 1024,  # bytes parsed per block
+    }
+
+    # Time-bucketed rollups the visualizer plots from
+    ROLLUP_CONFIG = {
+        'enabled': True,  # Keep persisted rollups next to the incremental state
+        'bucket': '1min',  # Finest time resolution stored
+        'max_points': 1500,  # Time series are coarsened to stay below this
+    }
+
+    # Message template mining (Drain); top templates per severity go in the summary
+    TEMPLATE_CONFIG = {
+        'enabled': True,
+        'depth': 4,  # prefix tree depth, counting the root and token-count levels
+        'similarity': 0.4,  # share of equal tokens needed to join a template
+        'max_children': 100,  # children per tree node before tokens share a wildcard branch
+        'top_n': 10,  # templates listed per severity in the summary
+    }
+
+    # Mergeable sketches behind the response-time percentiles and distinct message counts
+    SKETCH_CONFIG = {
+        'quantiles': [0.5, 0.95, 0.99],  # reported as p50/p95/p99_response_time
+        'relative_accuracy': 0.01,  # DDSketch: percentiles within 1% of the exact value
+        'max_bins': 2048,  # DDSketch bins before the lowest ones are collapsed
+        'hll_precision': 12,  # HyperLogLog: 4 KB per sketch, 1.6% standard error
+        'bucket': '1h',  # sketches are kept per time bucket of this size
+        'max_buckets': 24 * 31,  # older buckets only count towards the overall summary
+    }
+
+    # History of cycle summaries and rollups in SQLite, downsampled instead of deleted
+    HISTORY_CONFIG = {
+        'enabled': True,
+        'path': STATE_DIR / "history.db",
+        # Rollup tiers from fine to coarse: (name, bucket size, days before
+        # buckets are compacted into the next tier; None keeps them)
+        'tiers': [('minute', '1min', 7), ('hour', '1h', 90), ('day', '1D', None)],
+        'json_reports': False,  # also write reports/log_summary_<time>.json and cycle_metrics_<time>.json every cycle
+    }
+
+    # Vectorized batch parsing configuration
+    BATCH_CONFIG = {
+        'batch_size': 50000,  # lines per pandas str.extract call
+    }
+
+    # Parsed-column cache configuration
+    CACHE_CONFIG = {
+        'enabled': True,  # reuse parsed columns of unchanged log files
+        'cache_dir': CACHE_DIR,
+        'max_bytes': 1024 * 1024 * 1024,  # least recently used entries are evicted above this
+        'hash_bytes': 64 * 1024,  # bytes hashed at each end of a file for its fingerprint
+        'block_rows': 64 * 1024,  # rows per block with its own zone map, for query pushdown
+    }
+
+    # Time-range index configuration
+    INDEX_CONFIG = {
+        'enabled': True,  # let --since/--until skip files and blocks outside the range
+        'index_dir': CACHE_DIR / "index",
+        'block_size': 1024 * 1024,  # bytes per indexed block
+    }
+
     # Alert configuration
     ALERT_THRESHOLDS = {
         'response_time': 5000,  # ms
@@ -24,6 +112,18 @@ class Config:
         'disk_usage': 90,  # percentage
     }
 
+    # Alert delivery configuration
+    ALERT_DELIVERY_CONFIG = {
+        'queue_size': 10000,  # alerts beyond this are dropped instead of blocking analysis
+        'digest_seconds': 60,  # alerts queued within this window are sent as one email
+        'dedup_seconds': 3600,  # identical alerts are sent at most once per this period
+        'max_digest_entries': 50,  # distinct alerts listed in one digest
+        'max_retries': 3,
+        'retry_backoff': 2.0,  # seconds before the first retry, doubled after each failure
+        'timeout': 30,  # SMTP socket timeout in seconds
+        'idle_check': 60,  # seconds idle before the SMTP session is checked with NOOP
+    }
+
     # Email configuration
     SMTP_CONFIG = {
         'server': os.getenv('SMTP_SERVER', 'smtp.gmail.com'),
@@ -39,12 +139,32 @@ class Config:
         'figure_size': (12, 8),
         'style': 'seaborn',
         'color_palette': 'husl',
-        'dpi': 100
+        'dpi': 100,
+        'render_workers': None,  # processes rendering charts; None = one per chart up to the CPU count, 1 = in-process
+        'skip_unchanged': True  # Don't redraw charts whose input is unchanged
+    }
+
+    # Per-cycle instrumentation of the service
+    METRICS_CONFIG = {
+        'enabled': True,  # write stage timings and counters with each report
+        'prometheus_file': STATE_DIR / "metrics.prom",  # Prometheus text format; None to disable
+        'cprofile': False,  # dump a cProfile of every cycle to profile_dir
+        'tracemalloc': False,  # record peak memory and top allocation sites of every cycle
+        'top_allocations': 25,
+        'profile_dir': REPORTS_DIR / "profiles",
     }
 
     # Retention configuration
     RETENTION_DAYS = 7  # How long to keep old reports and visualizations
 
+    # Watch mode: follow the log directory and alert as lines are written
+    WATCH_CONFIG = {
+        'use_inotify': True,     # Falls back to polling where unavailable
+        'poll_interval': 0.2,    # seconds between scans when polling
+        'wait_timeout': 1.0,     # seconds between checks for scheduled jobs
+        'state_file': STATE_DIR / 'watch_state.json'
+    }
+
     # Scheduling configuration
     SCHEDULE_CONFIG = {
         'analysis_interval': 60,  # minutes
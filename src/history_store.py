@@ -0,0 +1,240 @@
+import json
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from config import Config
+from log_parser import epoch_seconds
+from rollups import Rollup
+
+SEVERITY_COLUMNS = [level.lower() for level in Config.SEVERITY_LEVELS]
+RESPONSE_TIME_COLUMNS = ['response_time_sum', 'response_time_count', 'response_time_max']
+ROLLUP_COLUMNS = SEVERITY_COLUMNS + RESPONSE_TIME_COLUMNS
+# Aggregates that combine buckets into coarser ones
+AGGREGATE_COLUMNS = ', '.join(
+    [f"sum({column}) AS {column}" for column in ROLLUP_COLUMNS[:-1]]
+    + ["max(response_time_max) AS response_time_max"]
+)
+# How a bucket that already exists absorbs new rows for it
+MERGE_COLUMNS = ', '.join(
+    [f"{column} = {column} + excluded.{column}" for column in ROLLUP_COLUMNS[:-1]]
+    + ["response_time_max = max(coalesce(response_time_max, excluded.response_time_max),"
+       " coalesce(excluded.response_time_max, response_time_max))"]
+)
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS summaries (
+    time INTEGER PRIMARY KEY,
+    summary TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS metrics (
+    time INTEGER PRIMARY KEY,
+    metrics TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS rollups (
+    tier TEXT NOT NULL,
+    bucket INTEGER NOT NULL,
+    {', '.join(f'{column} INTEGER NOT NULL' for column in SEVERITY_COLUMNS)},
+    response_time_sum REAL NOT NULL,
+    response_time_count INTEGER NOT NULL,
+    response_time_max REAL,
+    PRIMARY KEY (tier, bucket)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+def _seconds(value):
+    """Epoch seconds of a naive datetime, as used for log timestamps"""
+    return None if value is None else epoch_seconds(pd.Timestamp(value).to_pydatetime())
+
+class HistoryStore:
+    """Summaries and severity/response-time rollups of every cycle in SQLite.
+
+    Each cycle's summary is one row of ``summaries`` and its stage timings
+    and counters one row of ``metrics``; the rows it analyzed are added to
+    ``rollups`` as per-minute buckets. Rollups are kept in tiers (minute,
+    hour and day by default): ``compact`` folds buckets that have outlived
+    their tier into the next coarser one, and keeps only the last summary
+    and metrics of each day once they are older than
+    ``Config.RETENTION_DAYS``, so history is downsampled rather than
+    deleted. Every row lives in exactly one tier, so a range query sums
+    across tiers. The primary keys are the time columns, which keeps range
+    queries to an index scan.
+
+    The database runs in WAL mode, so the CLI can read it while the
+    service writes. One connection is kept open, as closing the last one
+    checkpoints the WAL; calls are serialized by a lock, so a store can be
+    shared between threads.
+    """
+
+    def __init__(self, path=None, tiers=None):
+        config = Config.HISTORY_CONFIG
+        self.path = Path(path or config['path'])
+        self.tiers = tiers or config['tiers']
+        self.steps = {name: int(pd.Timedelta(bucket).total_seconds()) for name, bucket, _ in self.tiers}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        """The connection, inside a transaction"""
+        with self._lock, self._conn:
+            yield self._conn
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _add(self, table, value, time):
+        seconds = _seconds(time or datetime.now())
+        with self._connect() as conn:
+            conn.execute(f"INSERT OR REPLACE INTO {table} VALUES (?, ?)",
+                         (seconds, json.dumps(value, default=str)))
+
+    def _records(self, table, column, since, until):
+        query, params = f"SELECT time, {column} FROM {table} WHERE 1", []
+        if since is not None:
+            query, params = query + " AND time >= ?", params + [_seconds(since)]
+        if until is not None:
+            query, params = query + " AND time < ?", params + [_seconds(until)]
+        with self._connect() as conn:
+            rows = conn.execute(query + " ORDER BY time", params).fetchall()
+        return [(pd.Timestamp(seconds, unit='s'), json.loads(value)) for seconds, value in rows]
+
+    def add_summary(self, summary, time=None):
+        """Record the summary of a cycle; `time` defaults to now"""
+        self._add('summaries', summary, time)
+
+    def summaries(self, since=None, until=None):
+        """(time, summary) pairs recorded in [since, until), oldest first"""
+        return self._records('summaries', 'summary', since, until)
+
+    def add_metrics(self, metrics, time=None):
+        """Record the metrics of a cycle (CycleMetrics.to_dict()); `time` defaults to now"""
+        self._add('metrics', metrics, time)
+
+    def metrics(self, since=None, until=None):
+        """(time, metrics) pairs recorded in [since, until), oldest first"""
+        return self._records('metrics', 'metrics', since, until)
+
+    def latest_summary(self):
+        with self._connect() as conn:
+            row = conn.execute("SELECT summary FROM summaries ORDER BY time DESC LIMIT 1").fetchone()
+        return json.loads(row[0]) if row else None
+
+    def add_rollup(self, rollup, replace=False):
+        """Add the buckets of a Rollup to the finest tier.
+
+        Rollups of new rows, as in incremental cycles, are added to what is
+        stored. With `replace` the buckets are taken to cover all rows of
+        their minute, as when every cycle re-reads all logs, and overwrite
+        the stored ones. Buckets already compacted into a coarser tier are
+        skipped then, as they are counted there.
+        """
+        frame = rollup.frame
+        if not len(frame):
+            return 0
+        tier = self.tiers[0][0]
+        step = self.steps[tier]
+        buckets = frame.index.to_numpy(dtype='datetime64[s]').view(np.int64) // step * step
+        values = np.column_stack([frame[level].to_numpy(dtype=np.float64) for level in Config.SEVERITY_LEVELS]
+                                 + [frame[column].to_numpy(dtype=np.float64) for column in RESPONSE_TIME_COLUMNS])
+        rows = [
+            (tier, int(bucket), *(int(value) for value in row[:len(SEVERITY_COLUMNS)]),
+             float(row[-3]), int(row[-2]), None if np.isnan(row[-1]) else float(row[-1]))
+            for bucket, row in zip(buckets, values)
+        ]
+        placeholders = ', '.join('?' * (2 + len(ROLLUP_COLUMNS)))
+        with self._connect() as conn:
+            if replace:
+                compacted = self._compacted_until(conn, tier)
+                rows = [row for row in rows if row[1] >= compacted]
+                conn.executemany(f"INSERT OR REPLACE INTO rollups VALUES ({placeholders})", rows)
+            else:
+                conn.executemany(f"INSERT INTO rollups VALUES ({placeholders}) "
+                                 f"ON CONFLICT(tier, bucket) DO UPDATE SET {MERGE_COLUMNS}", rows)
+        return len(rows)
+
+    @staticmethod
+    def _compacted_until(conn, tier):
+        row = conn.execute("SELECT value FROM meta WHERE key = ?", (f"compacted:{tier}",)).fetchone()
+        return row[0] if row else -2**63
+
+    def rollup(self, since=None, until=None, resolution='1h'):
+        """A Rollup of [since, until) at `resolution`, summed across tiers.
+
+        Buckets of a tier coarser than `resolution` keep their own size, at
+        their start.
+        """
+        step = int(pd.Timedelta(resolution).total_seconds())
+        query = f"SELECT bucket - bucket % ? AS start, {AGGREGATE_COLUMNS} FROM rollups WHERE tier = ?"
+        bounds = []
+        if since is not None:
+            query, bounds = query + " AND bucket >= ?", bounds + [_seconds(since)]
+        if until is not None:
+            query, bounds = query + " AND bucket < ?", bounds + [_seconds(until)]
+        # One indexed range scan per tier
+        query = " UNION ALL ".join([query + " GROUP BY start"] * len(self.tiers))
+        params = [value for name, _, _ in self.tiers for value in (step, name, *bounds)]
+        with self._connect() as conn:
+            rows = conn.execute(f"SELECT start, {AGGREGATE_COLUMNS} FROM ({query}) "
+                                f"GROUP BY start ORDER BY start", params).fetchall()
+        rollup = Rollup(bucket=resolution)
+        if rows:
+            data = np.array(rows, dtype=np.float64).reshape(len(rows), -1)
+            frame = pd.DataFrame({
+                **{level: data[:, 1 + i].astype(np.int64) for i, level in enumerate(Config.SEVERITY_LEVELS)},
+                'response_time_sum': data[:, -3],
+                'response_time_count': data[:, -2].astype(np.int64),
+                'response_time_max': data[:, -1],
+            }, index=pd.DatetimeIndex(data[:, 0].astype(np.int64).astype('datetime64[s]'), name='bucket'))
+            frame.index = frame.index.as_unit('ns')
+            rollup.frame = frame
+        return rollup
+
+    def compact(self, now=None):
+        """Downsample history that has outlived its tier; returns the rows removed.
+
+        Buckets older than their tier's retention are summed into the next
+        tier, a whole coarse bucket at a time. Summaries and metrics older
+        than Config.RETENTION_DAYS are reduced to the last of each day.
+        """
+        now = _seconds(now or datetime.now())
+        removed = 0
+        with self._connect() as conn:
+            for (tier, _, days), (coarser, _, _) in zip(self.tiers, self.tiers[1:]):
+                if days is None:
+                    continue
+                step = self.steps[coarser]
+                cutoff = (now - days * 86400) // step * step
+                conn.execute(
+                    f"INSERT INTO rollups SELECT ?, bucket - bucket % ?, {AGGREGATE_COLUMNS} "
+                    f"FROM rollups WHERE tier = ? AND bucket < ? GROUP BY 2 "
+                    f"ON CONFLICT(tier, bucket) DO UPDATE SET {MERGE_COLUMNS}",
+                    (coarser, step, tier, cutoff)
+                )
+                removed += conn.execute("DELETE FROM rollups WHERE tier = ? AND bucket < ?",
+                                        (tier, cutoff)).rowcount
+                conn.execute("INSERT INTO meta VALUES (?, ?) "
+                             "ON CONFLICT(key) DO UPDATE SET value = max(value, excluded.value)",
+                             (f"compacted:{tier}", cutoff))
+
+            cutoff = now - Config.RETENTION_DAYS * 86400
+            for table in ('summaries', 'metrics'):
+                removed += conn.execute(
+                    f"DELETE FROM {table} WHERE time < ? AND time NOT IN "
+                    f"(SELECT max(time) FROM {table} WHERE time < ? GROUP BY time / 86400)",
+                    (cutoff, cutoff)
+                ).rowcount
+        return removed
@@ -0,0 +1,266 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+from config import Config
+from log_columns import LogColumns
+from log_parser import NAT_SECONDS, LogParser
+from log_reader import count_lines, is_compressed, iter_file_blocks
+from summary_aggregator import SummaryAggregator
+
+# Parser used by the current (worker) process, created on first use
+_worker_parser = None
+
+def _init_worker(log_patterns):
+    global _worker_parser
+    _worker_parser = LogParser(log_patterns)
+
+def _get_worker_parser():
+    global _worker_parser
+    if _worker_parser is None:
+        _worker_parser = LogParser()
+    return _worker_parser
+
+class IngestionStats:
+    """Bytes and lines consumed by one ingestion run.
+
+    `lines` counts parsed rows; `parse_failures` the lines that were
+    dropped or kept without a timestamp (see count_parse_failures).
+
+    `progress`, if given, is called with the number of bytes of every
+    block (sequential) or range (process pool) as soon as it is consumed,
+    e.g. a tqdm bar's `update`.
+    """
+    def __init__(self, progress=None):
+        self.progress = progress
+        self.files = 0
+        self.bytes = 0
+        self.lines = 0
+        self.parse_failures = 0
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+
+    def add(self, nbytes, lines, parse_failures=0):
+        self.bytes += nbytes
+        self.lines += lines
+        self.parse_failures += parse_failures
+        self.elapsed = time.perf_counter() - self.started
+        if self.progress:
+            self.progress(nbytes)
+
+    @property
+    def lines_per_second(self):
+        return self.lines / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def mb_per_second(self):
+        return self.bytes / 2**20 / self.elapsed if self.elapsed else 0.0
+
+    def __str__(self):
+        return (f"{self.lines:,} lines ({self.bytes / 2**20:.1f} MB) in {self.elapsed:.2f}s: "
+                f"{self.lines_per_second:,.0f} lines/s, {self.mb_per_second:.1f} MB/s")
+
+def count_parse_failures(block, columns, added):
+    """Lines of `block` that did not parse into a timestamped row.
+
+    `added` is the number of rows the block just appended to `columns`.
+    Unrecognised lines are kept as rows without a timestamp, so those
+    count as well as lines the parser dropped.
+    """
+    untimed = columns.timestamps[len(columns) - added:].count(NAT_SECONDS) if added else 0
+    return count_lines(block) - added + untimed
+
+def plan_ranges(log_files, chunk_size, spans=None):
+    """Split files into (path, start, end) byte ranges aligned to line starts.
+
+    Every range except the last of a file ends right after a newline, so
+    each line belongs to exactly one range. `spans(path)` may return the
+    line-aligned (start, end) spans of a file that need reading, e.g. from
+    a TimeIndex; by default files are read in full. A compressed file is
+    always one range covering the whole file, as it can only be
+    decompressed from the start.
+    """
+    ranges = []
+    for log_file in log_files:
+        if is_compressed(log_file):
+            ranges.append((str(log_file), 0, Path(log_file).stat().st_size))
+            continue
+        if spans is None:
+            file_spans = [(0, Path(log_file).stat().st_size)]
+        else:
+            file_spans = spans(str(log_file))
+        for span_start, span_end in file_spans:
+            if span_end - span_start <= chunk_size:
+                ranges.append((str(log_file), span_start, span_end))
+                continue
+            with open(log_file, 'rb') as f:
+                start = span_start
+                while start < span_end:
+                    f.seek(min(start + chunk_size, span_end))
+                    f.readline()
+                    end = min(f.tell(), span_end)
+                    ranges.append((str(log_file), start, end))
+                    start = end
+    return ranges
+
+def parse_range(task, parser=None, columns=None, stats=None):
+    """Parse one (path, start, end) byte range into (new or given) LogColumns"""
+    parser = parser or _get_worker_parser()
+    path, start, end = task
+    if columns is None:
+        columns = LogColumns()
+    for block in iter_file_blocks(path, start, end, Config.STREAMING_CONFIG['block_size']):
+        added = columns.add_buffer(block, parser.parse_fields)
+        if stats:
+            stats.add(len(block), added, count_parse_failures(block, columns, added))
+    return columns
+
+def summarize_range(task, parser=None, since=None, until=None, stats=None):
+    """Fold one byte range into a SummaryAggregator, one block at a time.
+
+    Only one block of parsed rows is held at a time, so memory use does
+    not depend on the size of the range.
+    """
+    parser = parser or _get_worker_parser()
+    path, start, end = task
+    aggregator = SummaryAggregator()
+    for block in iter_file_blocks(path, start, end, Config.STREAMING_CONFIG['block_size']):
+        # Messages are only interned, for the distinct message count
+        columns = LogColumns()
+        added = columns.add_buffer(block, parser.parse_fields)
+        aggregator.update_columns(columns, since, until)
+        if stats:
+            stats.add(len(block), added, count_parse_failures(block, columns, added))
+    return aggregator
+
+def _run_task(func, kwargs, task):
+    """Worker entry point; errors are returned so one bad file doesn't stop the map"""
+    try:
+        return func(task, **kwargs), None
+    except Exception as e:
+        return None, str(e)
+
+def _run_counted_task(func, kwargs, task):
+    """Worker entry point that also returns the bytes read and lines parsed and failed"""
+    stats = IngestionStats()
+    result, error = _run_task(func, dict(kwargs, stats=stats), task)
+    return result, error, (stats.bytes, stats.lines, stats.parse_failures)
+
+def map_ranges(log_files, func, workers=1, chunk_size=None, parser=None, logger=None,
+               stats=None, with_tasks=False, spans=None, **kwargs):
+    """Apply `func(task, parser=..., **kwargs)` to every byte range of `log_files`.
+
+    Yields the results in file and offset order. With `with_tasks` it yields
+    (task, result) pairs instead, including failed ranges with a None
+    result. With more than one worker the ranges are processed by a
+    ProcessPoolExecutor; `func` must then be a module-level function so it
+    can be sent to the workers. `spans` restricts the ranges as in
+    plan_ranges.
+
+    With an IngestionStats, `func` must accept a `stats` argument. It is
+    updated per block when running in-process, and per range as the
+    results come back from the pool.
+    """
+    chunk_size = chunk_size or Config.PARALLEL_CONFIG['chunk_size']
+    tasks = []
+    for log_file in log_files:
+        try:
+            tasks.extend(plan_ranges([log_file], chunk_size, spans))
+        except Exception as e:
+            if logger:
+                logger.error(f"Error processing file {log_file}: {e}")
+    if stats:
+        stats.files += len({task[0] for task in tasks})
+
+    if workers <= 1 or len(tasks) <= 1:
+        kwargs['parser'] = parser or LogParser(logger=logger)
+        if stats:
+            kwargs['stats'] = stats
+        for task in tasks:
+            result, error = _run_task(func, kwargs, task)
+            if error is not None and logger:
+                logger.error(f"Error processing file {task[0]}: {error}")
+            if with_tasks:
+                yield task, result
+            elif error is None:
+                yield result
+        return
+
+    log_patterns = parser.log_patterns if parser else Config.LOG_PATTERNS
+    with ProcessPoolExecutor(max_workers=min(workers, len(tasks)), initializer=_init_worker,
+                             initargs=(log_patterns,)) as executor:
+        if stats:
+            results = executor.map(partial(_run_counted_task, func, kwargs), tasks)
+        else:
+            results = ((result, error, None) for result, error in
+                       executor.map(partial(_run_task, func, kwargs), tasks))
+        for task, (result, error, counts) in zip(tasks, results):
+            if stats:
+                # Decompressed bytes for archives, so MB/s compares with plain files
+                stats.add(*counts)
+            if error is not None and logger:
+                logger.error(f"Error processing file {task[0]}: {error}")
+            if with_tasks:
+                yield task, result
+            elif error is None:
+                yield result
+
+def parse_files(log_files, workers=1, chunk_size=None, parser=None, logger=None, stats=None,
+                spans=None):
+    """Parse log files into one LogColumns, optionally across a process pool.
+
+    Files larger than `chunk_size` are split at newline-aligned offsets so
+    a single big file also spreads over the workers. Partial results are
+    concatenated in file and offset order, so the output is identical for
+    any number of workers. Progress and throughput go to `stats`, and
+    `spans` limits which parts of each file are read (see plan_ranges).
+    """
+    columns = LogColumns()
+    if workers <= 1:
+        # Parse straight into the result instead of concatenating partials
+        for _ in map_ranges(log_files, parse_range, 1, chunk_size, parser, logger, stats,
+                            spans=spans, columns=columns):
+            pass
+        return columns
+
+    for partial_columns in map_ranges(log_files, parse_range, workers, chunk_size, parser,
+                                      logger, stats, spans=spans):
+        columns.extend(partial_columns)
+    return columns
+
+def parse_each_file(log_files, workers=1, chunk_size=None, parser=None, logger=None, stats=None,
+                    spans=None):
+    """Like parse_files, but yield one (path, LogColumns) pair per file.
+
+    All files still share one process pool. A file whose ranges did not
+    all parse is skipped, since its columns would be incomplete.
+    """
+    current, columns = None, None
+    ranges = map_ranges(log_files, parse_range, workers, chunk_size, parser, logger, stats,
+                        with_tasks=True, spans=spans)
+    for (path, _, _), partial_columns in ranges:
+        if path != current:
+            if columns is not None:
+                yield current, columns
+            current, columns = path, partial_columns
+        elif columns is not None and partial_columns is not None:
+            columns.extend(partial_columns)
+        else:
+            columns = None
+    if columns is not None:
+        yield current, columns
+
+def summarize_files(log_files, workers=1, chunk_size=None, parser=None, logger=None,
+                    since=None, until=None, stats=None, spans=None):
+    """Compute a SummaryAggregator over log files in constant memory.
+
+    `since` and `until` are optional epoch-second bounds (inclusive start,
+    exclusive end); rows without a timestamp are skipped when either is set.
+    `spans` can skip the parts of files outside those bounds.
+    """
+    aggregator = SummaryAggregator()
+    for partial_aggregator in map_ranges(log_files, summarize_range, workers, chunk_size,
+                                         parser, logger, stats, spans=spans,
+                                         since=since, until=until):
+        aggregator.merge(partial_aggregator)
+    return aggregator
@@ -0,0 +1,136 @@
+import cProfile
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+
+METRIC_PREFIX = 'log_analyzer'
+
+class CycleMetrics:
+    """Stage timers and counters of one analysis cycle.
+
+    ``stage(name)`` times a block of the cycle; timings of a stage entered
+    more than once add up. ``counters`` hold the sizes of this cycle
+    (files, bytes, lines, alerts, ...). ``totals`` are cumulative over
+    the life of the service, such as alerts delivered by the background
+    dispatcher, and are exported as Prometheus counters.
+    """
+
+    def __init__(self):
+        self.started_at = time.time()
+        self._started = time.perf_counter()
+        self.elapsed = 0.0
+        self.stages = {}
+        self.counters = {}
+        self.totals = {}
+
+    @contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - started
+
+    def count(self, name, value=1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def add_ingestion(self, stats):
+        """Copy the counters of an ingestion.IngestionStats"""
+        self.count('files', stats.files)
+        self.count('bytes', stats.bytes)
+        self.count('lines', stats.lines)
+        self.count('parse_failures', stats.parse_failures)
+
+    def finish(self):
+        """Stop the cycle clock; returns the cycle's wall time"""
+        self.elapsed = time.perf_counter() - self._started
+        return self.elapsed
+
+    def to_dict(self):
+        return {
+            'started_at': self.started_at,
+            'seconds': self.elapsed,
+            'stages': dict(self.stages),
+            'counters': dict(self.counters),
+            'totals': dict(self.totals),
+        }
+
+    def to_prometheus(self):
+        """The metrics in the Prometheus text exposition format"""
+        lines = [
+            f"# HELP {METRIC_PREFIX}_cycle_timestamp_seconds Start of the last analysis cycle.",
+            f"# TYPE {METRIC_PREFIX}_cycle_timestamp_seconds gauge",
+            f"{METRIC_PREFIX}_cycle_timestamp_seconds {self.started_at:.3f}",
+            f"# HELP {METRIC_PREFIX}_cycle_seconds Wall time of the last analysis cycle.",
+            f"# TYPE {METRIC_PREFIX}_cycle_seconds gauge",
+            f"{METRIC_PREFIX}_cycle_seconds {self.elapsed:.6f}",
+            f"# HELP {METRIC_PREFIX}_stage_seconds Wall time of each stage of the last analysis cycle.",
+            f"# TYPE {METRIC_PREFIX}_stage_seconds gauge",
+        ]
+        lines += [f'{METRIC_PREFIX}_stage_seconds{{stage="{name}"}} {seconds:.6f}'
+                  for name, seconds in self.stages.items()]
+        for name, value in self.counters.items():
+            metric = f"{METRIC_PREFIX}_last_cycle_{name}"
+            lines += [f"# HELP {metric} {name.replace('_', ' ').capitalize()} in the last analysis cycle.",
+                      f"# TYPE {metric} gauge",
+                      f"{metric} {value}"]
+        for name, value in self.totals.items():
+            metric = f"{METRIC_PREFIX}_{name}_total"
+            lines += [f"# HELP {metric} {name.replace('_', ' ').capitalize()} since the service started.",
+                      f"# TYPE {metric} counter",
+                      f"{metric} {value}"]
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path):
+        """Atomically write the Prometheus text file, e.g. for node_exporter's textfile collector"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + '.tmp')
+        tmp_path.write_text(self.to_prometheus())
+        os.replace(tmp_path, path)
+
+@contextmanager
+def profile_cycle(output_dir, name, cprofile=False, trace_memory=False, top_allocations=25):
+    """Optionally profile the enclosed block.
+
+    With `cprofile` the cProfile statistics are dumped to
+    ``<output_dir>/<name>.prof`` (readable with pstats or snakeviz). With
+    `trace_memory` the peak traced memory and the `top_allocations`
+    source lines still holding the most memory at the end are written to
+    ``<output_dir>/<name>.tracemalloc.txt``. Yields a list that receives
+    the paths of the files written.
+    """
+    written = []
+    if not (cprofile or trace_memory):
+        yield written
+        return
+
+    profiler = cProfile.Profile() if cprofile else None
+    started_tracing = trace_memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    if profiler:
+        profiler.enable()
+    try:
+        yield written
+    finally:
+        if profiler:
+            profiler.disable()
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        if profiler:
+            profile_file = output_dir / f"{name}.prof"
+            profiler.dump_stats(profile_file)
+            written.append(profile_file)
+        if trace_memory:
+            snapshot = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            if started_tracing:
+                tracemalloc.stop()
+            report = [f"Peak traced memory: {peak / 2**20:.1f} MB", ""]
+            report += [str(stat) for stat in snapshot.statistics('lineno')[:top_allocations]]
+            memory_file = output_dir / f"{name}.tracemalloc.txt"
+            memory_file.write_text('\n'.join(report) + '\n')
+            written.append(memory_file)
@@ -1,59 +1,220 @@
-import re
-import pandas as pd
-from datetime import datetime
-import logging
 from pathlib import Path
 from utils import setup_rotating_logger, save_json, get_timestamp_str
 from config import Config
+from log_parser import LogParser, epoch_seconds
+from batch_parser import BatchParser
+from ingestion import parse_each_file, parse_files, summarize_files
+from log_columns import LogColumns
+from log_reader import is_compressed, list_log_files
+from parse_cache import ParseCache
+from sketches import TimeSketches
+from log_tailer import LogTailer
+from template_miner import TemplateMiner
+from time_index import TimeIndex
 
 class LogAnalyzer:
-    def __init__(self, log_dir=None):
+    def __init__(self, log_dir=None, cache_dir=None):
         self.log_dir = Path(log_dir) if log_dir else Config.LOGS_DIR
         self.log_patterns = Config.LOG_PATTERNS
         self.logger = setup_rotating_logger(
             'log_analyzer',
             Config.LOGS_DIR / 'analyzer.log'
         )
+        self.parser = LogParser(self.log_patterns, self.logger)
+        self.tailer = None
+        self.cache = None
+        if Config.CACHE_CONFIG['enabled']:
+            self.cache = ParseCache(cache_dir, logger=self.logger)
+        self.time_index = None
+        if Config.INDEX_CONFIG['enabled']:
+            index_dir = Path(cache_dir) / 'index' if cache_dir else None
+            self.time_index = TimeIndex(index_dir, log_patterns=self.log_patterns, logger=self.logger)
 
     def parse_log_line(self, line):
         """Parse a single log line and extract relevant information."""
-        try:
-            timestamp_match = re.search(self.log_patterns['timestamp'], line)
-            timestamp = datetime.strptime(timestamp_match.group(), '%Y-%m-%d %H:%M:%S') if timestamp_match else None
-            
-            severity = 'INFO'
-            if re.search(self.log_patterns['error'], line):
-                severity = 'ERROR'
-            elif re.search(self.log_patterns['warning'], line):
-                severity = 'WARNING'
-            
-            response_time_match = re.search(self.log_patterns['response_time'], line)
-            response_time = float(response_time_match.group(1)) if response_time_match else None
-            
-            return {
-                'timestamp': timestamp,
-                'severity': severity,
-                'message': line.strip(),
-                'response_time': response_time
-            }
-        except Exception as e:
-            self.logger.error(f"Error parsing log line: {e}")
+        return self.parser.parse(line)
+
+    def analyze_logs(self, workers=None, stats=None, since=None, until=None):
+        """Analyze all log files in the log directory.
+
+        With more than one worker, files and newline-aligned chunks of large
+        files are parsed in a process pool (Config.PARALLEL_CONFIG). Pass an
+        ingestion.IngestionStats to follow progress and throughput. Files
+        that did not change since an earlier call are loaded from the parse
+        cache (Config.CACHE_CONFIG) instead of being parsed again. Rotated
+        .gz/.bz2/.zst archives are decompressed as streams, one process
+        per archive (Config.ARCHIVE_CONFIG).
+
+        `since`/`until` keep only rows with since <= timestamp < until; the
+        time index (Config.INDEX_CONFIG) lets files and blocks outside that
+        range be skipped without reading them.
+        """
+        workers = workers or Config.PARALLEL_CONFIG['workers']
+        log_files = self.log_files()
+        spans = self._time_spans(since, until)
+        if self.cache is None:
+            columns = parse_files(log_files, workers, parser=self.parser,
+                                  logger=self.logger, stats=stats, spans=spans)
+        else:
+            columns = self._cached_columns(log_files, workers, stats, spans)
+        df = columns.to_frame()
+        if since or until:
+            keep = df['timestamp'].notna()
+            if since:
+                keep &= df['timestamp'] >= since
+            if until:
+                keep &= df['timestamp'] < until
+            df = df[keep].reset_index(drop=True)
+            # Blocks are read whole, so drop messages seen only outside the range
+            df['message'] = df['message'].cat.remove_unused_categories()
+        return df
+
+    def query(self, query, workers=None, stats=None):
+        """Rows matching a log_query.LogQuery, as an analysis DataFrame.
+
+        Files the time index places outside the query's time range are not
+        read. With the parse cache, files cached before are loaded block by
+        block, skipping blocks whose zone maps rule out a match; the others
+        are parsed in full and cached, so later queries get the same
+        pruning.
+        """
+        workers = workers or Config.PARALLEL_CONFIG['workers']
+        log_files = self.log_files()
+        spans = self._time_spans(query.since, query.until)
+        if self.cache is None:
+            columns = parse_files(log_files, workers, parser=self.parser,
+                                  logger=self.logger, stats=stats, spans=spans)
+        else:
+            if spans:
+                log_files = [log_file for log_file in log_files if spans(str(log_file))]
+            columns = self._cached_columns(log_files, workers, stats, blocks=query.block_filter)
+        return query.apply(columns)
+
+    def log_files(self):
+        """The log files to analyze, including archives if enabled"""
+        return list_log_files(self.log_dir, Config.ARCHIVE_CONFIG['enabled'])
+
+    def _time_spans(self, since, until):
+        """Return a spans(path) function limiting reads to [since, until), or None"""
+        if self.time_index is None or not (since or until):
             return None
+        file_spans = {}
+        def spans(path):
+            if is_compressed(path):
+                # Archives are not indexed; they are always decompressed in full
+                return [(0, Path(path).stat().st_size)]
+            if path not in file_spans:
+                file_spans[path] = self.time_index.spans(path, since, until)
+            return file_spans[path]
+        return spans
+
+    def _cached_columns(self, log_files, workers, stats=None, spans=None, blocks=None):
+        """Load unchanged files from the parse cache and parse the others.
 
-    def analyze_logs(self):
-        """Analyze all log files in the log directory."""
-        all_logs = []
-        for log_file in self.log_dir.glob('*.log'):
+        Files are only cached when parsed in full; with `spans`, files
+        without any span in range are skipped and changed files are only
+        parsed where the spans say. Archives are always parsed in full, so
+        each one is decompressed only once while it stays unchanged.
+        `blocks` is passed on to ParseCache.load to read only some blocks
+        of cached files.
+        """
+        parsed, keys, changed = {}, {}, []
+        for log_file in log_files:
+            if spans and not spans(str(log_file)):
+                continue
             try:
-                with open(log_file, 'r') as f:
-                    for line in f:
-                        parsed = self.parse_log_line(line)
-                        if parsed:
-                            all_logs.append(parsed)
-            except Exception as e:
+                key = self.cache.fingerprint(log_file)
+            except OSError as e:
                 self.logger.error(f"Error processing file {log_file}: {e}")
-        
-        return pd.DataFrame(all_logs)
+                continue
+            columns = self.cache.load(log_file, key, blocks)
+            if columns is None:
+                keys[str(log_file)] = key
+                changed.append(log_file)
+                continue
+            parsed[str(log_file)] = columns
+            if stats:
+                stats.files += 1
+                stats.add(log_file.stat().st_size, len(columns))
+
+        for path, columns in parse_each_file(changed, workers, parser=self.parser,
+                                             logger=self.logger, stats=stats, spans=spans):
+            if spans is None or is_compressed(path):
+                self.cache.store(path, columns, keys[path])
+            parsed[path] = columns
+
+        result = LogColumns()
+        for log_file in log_files:
+            if str(log_file) in parsed:
+                result.extend(parsed[str(log_file)])
+        return result
+
+    def analyze_logs_batch(self, batch_size=None):
+        """Analyze all log files with the vectorized pandas batch parser.
+
+        Produces the same DataFrame as analyze_logs; which one is faster
+        depends on the batch size (see benchmarks/bench_batch.py).
+        """
+        batch_parser = BatchParser(self.parser, batch_size)
+        return batch_parser.parse_files(self.log_files(), self.logger)
+
+    def summarize_logs(self, workers=None, since=None, until=None, stats=None):
+        """Generate the summary for all log files without building a DataFrame.
+
+        Rows are parsed and folded into a SummaryAggregator block by block,
+        so memory use stays constant regardless of the amount of log data.
+        `since`/`until` optionally restrict the summary to a time range, and
+        only the parts of files the time index places in that range are read.
+        """
+        workers = workers or Config.PARALLEL_CONFIG['workers']
+        aggregator = summarize_files(
+            self.log_files(), workers,
+            parser=self.parser, logger=self.logger,
+            since=epoch_seconds(since) if since else None,
+            until=epoch_seconds(until) if until else None,
+            stats=stats, spans=self._time_spans(since, until)
+        )
+        return aggregator.to_summary()
+
+    def analyze_incremental(self, state_file=None, stats=None, exclude=None):
+        """Analyze only the log data appended since the previous call.
+
+        Returns a DataFrame of the new rows and a summary covering all rows
+        seen so far, including earlier cycles and service restarts. The
+        matching Rollup is available as ``self.tailer.rollup``. Pass an
+        ingestion.IngestionStats as `stats` to collect throughput. Files
+        whose resolved path is in `exclude` are not read. With
+        template mining enabled the new rows get a 'template_id' column and
+        the summary lists the top templates of all rows so far.
+
+        Nothing is persisted yet: call ``self.tailer.commit()`` once the
+        rows were handled, or ``self.tailer.rollback()`` to read them again
+        on the next call. If folding the rows fails, they are rolled back
+        before the error is raised.
+        """
+        if self.tailer is None:
+            self.tailer = LogTailer(self.log_dir, self.parser, state_file, self.logger,
+                                    rollups=Config.ROLLUP_CONFIG['enabled'],
+                                    templates=Config.TEMPLATE_CONFIG['enabled'])
+        df = self.tailer.read_new(stats=stats, exclude=exclude).to_frame()
+        try:
+            self.tailer.fold(df)
+            summary = self.tailer.aggregator.to_summary()
+            if self.tailer.templates is not None:
+                summary['top_templates'] = self.tailer.templates.top_templates()
+        except Exception:
+            # A fold that failed partway must not leave its rows counted
+            self.tailer.rollback()
+            raise
+        return df, summary
+
+    def mine_templates(self, df):
+        """Group the messages of `df` into templates.
+
+        Returns a TemplateMiner of the rows and their int32 template IDs.
+        """
+        miner = TemplateMiner()
+        return miner, miner.add_frame(df)
 
     def generate_summary(self, df):
         """Generate a summary of the analyzed logs."""
@@ -62,11 +223,18 @@ class LogAnalyzer:
             'error_count': len(df[df['severity'] == 'ERROR']),
             'warning_count': len(df[df['severity'] == 'WARNING']),
             'info_count': len(df[df['severity'] == 'INFO']),
-            'avg_response_time': df['response_time'].mean(),
-            'max_response_time': df['response_time'].max(),
+            'avg_response_time': float(df['response_time'].mean()),
+            'max_response_time': float(df['response_time'].max()),
             'start_time': df['timestamp'].min(),
             'end_time': df['timestamp'].max()
         }
+        # Percentiles and distinct messages come from the same sketches as the streamed summary
+        sketches = TimeSketches()
+        sketches.update_frame(df)
+        summary.update(sketches.summary())
+        if Config.TEMPLATE_CONFIG['enabled']:
+            miner, _ = self.mine_templates(df)
+            summary['top_templates'] = miner.top_templates()
         return summary
 
     def save_report(self, summary, output_file=None):
@@ -0,0 +1,174 @@
+from array import array
+import numpy as np
+import pandas as pd
+from config import Config
+from log_parser import NAT_SECONDS
+
+class LogColumns:
+    """Column-oriented accumulator for parsed log rows.
+
+    Rows are appended straight into typed arrays: epoch seconds (int64),
+    severity codes (int8), response times (float32) and a message code
+    (int32). Message bodies are interned: ``vocabulary`` maps each distinct
+    UTF-8 body to its code, in order of first appearance, so a body that
+    repeats on a million lines is stored once. ``to_frame`` turns the
+    arrays into the DataFrame returned by ``LogAnalyzer.analyze_logs``,
+    with ``message`` as a categorical over the vocabulary.
+
+    With ``keep_messages=False`` message text is skipped entirely, for
+    consumers such as the streaming summary that only need the numbers.
+    """
+
+    def __init__(self, keep_messages=True):
+        self.keep_messages = keep_messages
+        self.timestamps = array('q')
+        self.severities = array('b')
+        self.response_times = array('f')
+        self.message_codes = array('i')
+        self.vocabulary = {}
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def append(self, seconds, severity_code, response_time, message):
+        """Append one row of column values as produced by LogParser.parse_fields"""
+        self.timestamps.append(seconds)
+        self.severities.append(severity_code)
+        self.response_times.append(response_time)
+        if self.keep_messages:
+            vocabulary = self.vocabulary
+            self.message_codes.append(vocabulary.setdefault(message, len(vocabulary)))
+
+    def add_lines(self, lines, parse_fields):
+        """Parse an iterable of bytes lines and append every parsed row"""
+        timestamps = self.timestamps.append
+        severities = self.severities.append
+        response_times = self.response_times.append
+        message_codes = self.message_codes.append
+        vocabulary = self.vocabulary
+        intern = vocabulary.setdefault
+        added = 0
+        if not self.keep_messages:
+            for line in lines:
+                fields = parse_fields(line)
+                if fields is None:
+                    continue
+                timestamps(fields[0])
+                severities(fields[1])
+                response_times(fields[2])
+                added += 1
+            return added
+
+        for line in lines:
+            fields = parse_fields(line)
+            if fields is None:
+                continue
+            timestamps(fields[0])
+            severities(fields[1])
+            response_times(fields[2])
+            message_codes(intern(fields[3], len(vocabulary)))
+            added += 1
+        return added
+
+    def add_buffer(self, data, parse_fields):
+        """Parse a bytes buffer of newline-separated lines and append the rows"""
+        lines = data.split(b'\n')
+        if not lines[-1]:
+            lines.pop()
+        return self.add_lines(lines, parse_fields)
+
+    def extend(self, other):
+        """Append all rows of another LogColumns instance"""
+        self.timestamps.extend(other.timestamps)
+        self.severities.extend(other.severities)
+        self.response_times.extend(other.response_times)
+        if not self.keep_messages:
+            return
+        if not self.vocabulary:
+            self.vocabulary = dict(other.vocabulary)
+            self.message_codes.extend(other.message_codes)
+            return
+        # Re-code the other vocabulary into this one
+        vocabulary = self.vocabulary
+        mapping = np.fromiter((vocabulary.setdefault(message, len(vocabulary)) for message in other.vocabulary),
+                              dtype=np.int32, count=len(other.vocabulary))
+        if len(other.message_codes):
+            codes = mapping[np.frombuffer(other.message_codes, dtype=np.int32)]
+            self.message_codes.frombytes(codes.tobytes())
+
+    def block_stats(self, block_rows):
+        """Zone maps of consecutive blocks of `block_rows` rows.
+
+        Returns a dict of arrays with one entry per block: the first and
+        last timestamp of its timed rows (``min_time``/``max_time``, epoch
+        seconds), a bitmask of the severity codes it holds and the smallest
+        and largest response time (NaN if it has none). Queries use them to
+        skip blocks that cannot hold a matching row.
+        """
+        starts = np.arange(0, len(self), block_rows)
+        if not len(starts):
+            return {name: np.array([], dtype=dtype) for name, dtype in
+                    [('min_time', np.int64), ('max_time', np.int64), ('severities', np.int64),
+                     ('min_response_time', np.float64), ('max_response_time', np.float64)]}
+        timestamps = np.frombuffer(self.timestamps, dtype=np.int64)
+        response_times = np.frombuffer(self.response_times, dtype=np.float32).astype(np.float64)
+        severity_bits = np.left_shift(1, np.frombuffer(self.severities, dtype=np.int8).astype(np.int64))
+        return {
+            # NAT_SECONDS is the smallest int64, so untimed rows never set max_time
+            'min_time': np.minimum.reduceat(np.where(timestamps == NAT_SECONDS, np.iinfo(np.int64).max,
+                                                     timestamps), starts),
+            'max_time': np.maximum.reduceat(timestamps, starts),
+            'severities': np.bitwise_or.reduceat(severity_bits, starts),
+            # fmin/fmax ignore NaN
+            'min_response_time': np.fmin.reduceat(response_times, starts),
+            'max_response_time': np.fmax.reduceat(response_times, starts),
+        }
+
+    def message_categorical(self, rows=None):
+        """The message codes as a pandas Categorical of decoded bodies.
+
+        With `rows`, only those rows are taken and categories no row uses
+        are dropped.
+        """
+        categories = [message.decode('utf-8', 'replace') for message in self.vocabulary]
+        codes = np.frombuffer(self.message_codes, dtype=np.int32)
+        if rows is not None:
+            used = np.unique(codes[rows])
+            remap = np.full(len(categories), -1, dtype=np.int32)
+            remap[used] = np.arange(len(used), dtype=np.int32)
+            categories, codes = [categories[code] for code in used], remap[codes[rows]]
+        if len(set(categories)) < len(categories):
+            # Different invalid byte sequences can decode to the same text
+            first_code = {}
+            remap = np.array([first_code.setdefault(category, len(first_code)) for category in categories],
+                             dtype=np.int32)
+            categories, codes = list(first_code), remap[codes]
+        return pd.Categorical.from_codes(codes, categories=categories)
+
+    def message_list(self):
+        """Decode the messages into one str per row"""
+        categories = [message.decode('utf-8', 'replace') for message in self.vocabulary]
+        return [categories[code] for code in self.message_codes]
+
+    def to_frame(self, rows=None):
+        """Build the analysis DataFrame from the accumulated columns.
+
+        `rows` (an index array) limits the frame to those rows.
+        """
+        select = (lambda column: column) if rows is None else (lambda column: column[rows])
+        timestamps = (
+            select(np.frombuffer(self.timestamps, dtype=np.int64))
+            .astype('datetime64[s]')
+            .astype('datetime64[ns]')
+        )
+        severities = pd.Categorical.from_codes(
+            select(np.frombuffer(self.severities, dtype=np.int8)),
+            categories=Config.SEVERITY_LEVELS
+        )
+        response_times = select(np.frombuffer(self.response_times, dtype=np.float32)).copy()
+
+        columns = {'timestamp': timestamps, 'severity': severities}
+        if self.keep_messages:
+            columns['message'] = self.message_categorical(rows)
+        columns['response_time'] = response_times
+        return pd.DataFrame(columns)
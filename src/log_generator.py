@@ -1,8 +1,118 @@
 import random
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
 import argparse
 from pathlib import Path
 import logging
+import numpy as np
+
+# Response time range in ms per severity, as in generate_response_time
+RESPONSE_TIME_RANGES = {'INFO': (50, 1000), 'WARNING': (1000, 5000), 'ERROR': (5000, 15000)}
+TIMESTAMP_WIDTH = 19  # 'YYYY-MM-DD HH:MM:SS'
+NUMBER_WIDTH = 7  # '15000.0'
+
+def format_batch(seconds, prefixes, prefix_codes, tenths):
+    """Format log lines into one bytes buffer without a per-line Python loop.
+
+    `seconds` are epoch seconds, `prefixes` a list of encoded
+    'SEVERITY message response_time=' strings indexed by `prefix_codes`,
+    and `tenths` the response times in tenths of a millisecond (below
+    100,000 ms). Each line is laid out in a fixed-width uint8 matrix and
+    the padding is dropped with a length mask. Returns (buffer, line end
+    offsets).
+    """
+    count = len(seconds)
+    prefix_lengths = np.array([len(prefix) for prefix in prefixes])
+    prefix_width = prefix_lengths.max()
+    prefix_table = np.zeros((len(prefixes), prefix_width), dtype=np.uint8)
+    for i, prefix in enumerate(prefixes):
+        prefix_table[i, :len(prefix)] = np.frombuffer(prefix, dtype=np.uint8)
+
+    width = TIMESTAMP_WIDTH + 1 + prefix_width + NUMBER_WIDTH + 1
+    lines = np.empty((count, width), dtype=np.uint8)
+    stamps = np.datetime_as_string(seconds.astype('datetime64[s]')).astype(f'S{TIMESTAMP_WIDTH}')
+    lines[:, :TIMESTAMP_WIDTH] = stamps.view(np.uint8).reshape(count, TIMESTAMP_WIDTH)
+    lines[:, 10] = ord(' ')
+    lines[:, TIMESTAMP_WIDTH] = ord(' ')
+    lines[:, TIMESTAMP_WIDTH + 1:TIMESTAMP_WIDTH + 1 + prefix_width] = prefix_table[prefix_codes]
+
+    # Response time as '<integer digits>.<tenths digit>'; positions past the
+    # integer digits are overwritten by the point, the tenths and the newline
+    whole = tenths // 10
+    digits = np.floor(np.log10(np.maximum(whole, 1))).astype(np.int64) + 1
+    number = np.empty((count, NUMBER_WIDTH), dtype=np.uint8)
+    for position in range(NUMBER_WIDTH - 2):
+        number[:, position] = whole // 10 ** np.maximum(digits - 1 - position, 0) % 10 + ord('0')
+    rows = np.arange(count)
+    number[rows, digits] = ord('.')
+    number[rows, digits + 1] = tenths % 10 + ord('0')
+
+    number_start = TIMESTAMP_WIDTH + 1 + prefix_lengths[prefix_codes]
+    lines[rows[:, None], number_start[:, None] + np.arange(NUMBER_WIDTH)] = number
+    line_lengths = number_start + digits + 3
+    lines[rows, line_lengths - 1] = ord('\n')
+
+    buffer = lines[np.arange(width) < line_lengths[:, None]]
+    return buffer.tobytes(), np.cumsum(line_lengths)
+
+def _wall_clock_seconds(value):
+    """Seconds since 1970 of the datetime's wall-clock time, which is what gets printed"""
+    return int((value.replace(tzinfo=None) - datetime(1970, 1, 1)).total_seconds())
+
+def _write_bulk_file(task):
+    """Worker entry point: generate one output file, rotated into parts.
+
+    `task` is a dict built by LogGenerator.generate_bulk; returns the
+    paths written.
+    """
+    rng = np.random.default_rng(task['seed'])
+    entries, batch_size = task['entries'], task['batch_size']
+    start, end = task['start'], task['end']
+    prefixes, probabilities = task['prefixes'], task['probabilities']
+    low, high = task['low_tenths'], task['high_tenths']
+    severities = task['prefix_severities']
+
+    paths = []
+    part, part_bytes, f = 0, 0, None
+    try:
+        for batch_start in range(0, entries, batch_size):
+            count = min(batch_size, entries - batch_start)
+            codes = rng.choice(len(prefixes), size=count, p=probabilities)
+            if task['order'] == 'sorted':
+                # Each batch covers its share of the time range, so the file is sorted
+                batch_low = start + (end - start) * batch_start // entries
+                batch_high = start + (end - start) * (batch_start + count) // entries
+                seconds = np.sort(rng.integers(batch_low, max(batch_high, batch_low + 1), count))
+            else:
+                seconds = rng.integers(start, end + 1, count)
+            tenths = rng.integers(low[severities[codes]], high[severities[codes]] + 1)
+            buffer, line_ends = format_batch(seconds, prefixes, codes, tenths)
+
+            written = 0
+            while written < len(buffer):
+                if f is None:
+                    path = task['output_dir'] / f"{task['stem']}_{task['file']:03d}_{part:04d}.log"
+                    f = open(path, 'wb')
+                    paths.append(str(path))
+                cut_end = len(buffer)
+                if task['rotate_bytes']:
+                    # End of the last whole line that still fits in this part
+                    fit = np.searchsorted(line_ends, written + task['rotate_bytes'] - part_bytes, side='right')
+                    cut_end = int(line_ends[fit - 1]) if fit else 0
+                    if cut_end <= written:
+                        # Nothing fits; a fresh part takes at least one line
+                        cut_end = written if part_bytes else int(
+                            line_ends[np.searchsorted(line_ends, written, side='right')])
+                f.write(buffer[written:cut_end])
+                part_bytes += cut_end - written
+                written = cut_end
+                if written < len(buffer):
+                    f.close()
+                    f, part, part_bytes = None, part + 1, 0
+    finally:
+        if f is not None:
+            f.close()
+    return paths
 
 class LogGenerator:
     def __init__(self, output_dir):
@@ -39,6 +149,63 @@ class LogGenerator:
             ]
         }
 
+    def generate_bulk(self, num_entries, start_time=None, end_time=None, files=1, workers=1,
+                      rotate_bytes=None, seed=None, order='random', batch_size=500000):
+        """Generate a large data set with vectorized NumPy batches.
+
+        Entries are split evenly over `files` output files, generated by up
+        to `workers` processes. A file is continued in a new part once it
+        reaches `rotate_bytes`. `order` is 'random' or 'sorted' (timestamps
+        ascending within each file). Lines have the same format and
+        distributions as generate_logs. With the same `seed`, `files` and
+        `batch_size` the output is identical for any number of workers.
+        Returns the paths written.
+        """
+        if order not in ('random', 'sorted'):
+            raise ValueError(f"order must be 'random' or 'sorted', not {order!r}")
+        end_time = end_time or datetime.now()
+        start_time = start_time or end_time - timedelta(days=1)
+
+        # One (severity, message) prefix per combination, weighted so that
+        # severities keep their probabilities and messages are uniform
+        levels = list(self.severities)
+        prefixes, probabilities, prefix_severities = [], [], []
+        for level_index, level in enumerate(levels):
+            for message in self.messages[level]:
+                prefixes.append(f"{level} {message} response_time=".encode())
+                probabilities.append(self.severities[level] / len(self.messages[level]))
+                prefix_severities.append(level_index)
+        probabilities = np.array(probabilities) / sum(probabilities)
+
+        stem = f"generated_logs_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        streams = np.random.SeedSequence(seed).spawn(files)
+        tasks = [{
+            'file': file,
+            'entries': num_entries // files + (1 if file < num_entries % files else 0),
+            'seed': streams[file],
+            'start': _wall_clock_seconds(start_time),
+            'end': _wall_clock_seconds(end_time),
+            'order': order,
+            'batch_size': batch_size,
+            'rotate_bytes': rotate_bytes,
+            'prefixes': prefixes,
+            'probabilities': probabilities,
+            'prefix_severities': np.array(prefix_severities),
+            'low_tenths': np.array([RESPONSE_TIME_RANGES[level][0] * 10 for level in levels]),
+            'high_tenths': np.array([RESPONSE_TIME_RANGES[level][1] * 10 for level in levels]),
+            'output_dir': self.output_dir,
+            'stem': stem,
+        } for file in range(files)]
+
+        if workers <= 1 or files <= 1:
+            results = [_write_bulk_file(task) for task in tasks]
+        else:
+            with ProcessPoolExecutor(max_workers=min(workers, files)) as executor:
+                results = list(executor.map(_write_bulk_file, tasks))
+        paths = [path for file_paths in results for path in file_paths]
+        print(f"Generated {num_entries} log entries in {len(paths)} files under {self.output_dir}")
+        return paths
+
     def generate_timestamp(self, start_time, end_time):
         time_diff = end_time - start_time
         random_seconds = random.randint(0, int(time_diff.total_seconds()))
@@ -91,6 +258,17 @@ def main():
                         help='Number of log entries to generate')
     parser.add_argument('--days', type=int, default=1,
                         help='Number of days to spread the logs over')
+    parser.add_argument('--bulk', action='store_true',
+                        help='Generate with vectorized NumPy batches (for large data sets)')
+    parser.add_argument('--files', type=int, default=1,
+                        help='Number of output files (--bulk)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Processes writing files in parallel (--bulk)')
+    parser.add_argument('--rotate-mb', type=float,
+                        help='Start a new part when a file reaches this size (--bulk)')
+    parser.add_argument('--order', choices=['random', 'sorted'], default='random',
+                        help='Timestamp order within each file (--bulk)')
+    parser.add_argument('--seed', type=int, help='Random seed for reproducible output')
     
     args = parser.parse_args()
     
@@ -98,7 +276,15 @@ def main():
     end_time = datetime.now()
     start_time = end_time - timedelta(days=args.days)
     
-    generator.generate_logs(args.entries, start_time, end_time)
+    if args.bulk:
+        rotate_bytes = int(args.rotate_mb * 1024 * 1024) if args.rotate_mb else None
+        generator.generate_bulk(args.entries, start_time, end_time, files=args.files,
+                                workers=args.workers, rotate_bytes=rotate_bytes,
+                                seed=args.seed, order=args.order)
+    else:
+        if args.seed is not None:
+            random.seed(args.seed)
+        generator.generate_logs(args.entries, start_time, end_time)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,210 @@
+import re
+from datetime import datetime, date
+from config import Config
+
+# Sentinel stored in int64 timestamp columns for lines without a timestamp;
+# numpy reads it back as NaT.
+NAT_SECONDS = -2**63
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+def epoch_seconds(timestamp):
+    """Seconds since the epoch for a naive datetime, treating it as UTC"""
+    return ((timestamp.toordinal() - EPOCH_ORDINAL) * 86400
+            + timestamp.hour * 3600 + timestamp.minute * 60 + timestamp.second)
+
+class LogParser:
+    """Compiled single-pass parser for log lines.
+
+    Lines in the standard layout (``<timestamp> <LEVEL> <message>
+    [response_time=<ms>]``) are handled by one anchored match and a
+    slice-based timestamp conversion. Anything else goes through
+    ``parse_fallback``, which reproduces the original search-anywhere rules.
+    """
+
+    TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+    def __init__(self, log_patterns=None, logger=None):
+        self.log_patterns = log_patterns or Config.LOG_PATTERNS
+        self.logger = logger
+
+        self.timestamp_re = re.compile(self.log_patterns['timestamp'])
+        self.error_re = re.compile(self.log_patterns['error'])
+        self.warning_re = re.compile(self.log_patterns['warning'])
+        self.response_time_re = re.compile(self.log_patterns['response_time'])
+
+        # The line body is matched greedily and the trailing response_time
+        # is found by backtracking from the end of the line. The
+        # response_time pattern has one capturing group, which directly
+        # follows the 'body' group.
+        layout = (
+            r'^(?P<timestamp>{timestamp})\s'
+            r'(?P<level>{error}|{warning}|{info})'
+            r'(?:(?P<body>\s.*)\s{response_time}|(?P<plain>\s.*))?$'.format(**self.log_patterns)
+        )
+        self.layout_re = re.compile(layout)
+        self.layout_bytes_re = re.compile(layout.encode())
+        self._response_time_group = self.layout_re.groupindex['body'] + 1
+
+        # Any of these inside the body means the fast path could disagree
+        # with the search-anywhere rules, so such lines take the fallback.
+        guard = '|'.join([
+            self.log_patterns['error'],
+            self.log_patterns['warning'],
+            self.log_patterns['response_time'],
+        ])
+        self.guard_re = re.compile(guard)
+        self.guard_bytes_re = re.compile(guard.encode())
+
+        self._level_cache = {}
+        self._level_code_cache = {}
+        self._day_cache = {}
+        self._last_timestamp_str = None
+        self._last_timestamp = None
+        self._last_seconds_key = None
+        self._last_seconds = None
+
+    def severity_for_level(self, level):
+        """Map a level token from the layout match to a severity"""
+        severity = self._level_cache.get(level)
+        if severity is None:
+            if self.error_re.search(level):
+                severity = 'ERROR'
+            elif self.warning_re.search(level):
+                severity = 'WARNING'
+            else:
+                severity = 'INFO'
+            self._level_cache[level] = severity
+        return severity
+
+    def severity_code_for_level(self, level):
+        """Map a bytes level token to its index in Config.SEVERITY_LEVELS"""
+        code = self._level_code_cache.get(level)
+        if code is None:
+            severity = self.severity_for_level(level.decode('ascii', 'replace'))
+            code = Config.SEVERITY_LEVELS.index(severity)
+            self._level_code_cache[level] = code
+        return code
+
+    def timestamp_seconds(self, value):
+        """Convert a b'YYYY-MM-DD HH:MM:SS' timestamp to epoch seconds"""
+        if value == self._last_seconds_key:
+            return self._last_seconds
+        day = value[:10]
+        day_seconds = self._day_cache.get(day)
+        if day_seconds is None:
+            ordinal = date(int(value[0:4]), int(value[5:7]), int(value[8:10])).toordinal()
+            day_seconds = (ordinal - EPOCH_ORDINAL) * 86400
+            self._day_cache[day] = day_seconds
+        hour, minute, second = int(value[11:13]), int(value[14:16]), int(value[17:19])
+        if hour > 23 or minute > 59 or second > 59:
+            raise ValueError(f"time out of range: {value!r}")
+        seconds = day_seconds + hour * 3600 + minute * 60 + second
+        self._last_seconds_key = value
+        self._last_seconds = seconds
+        return seconds
+
+    def parse_timestamp(self, value):
+        """Convert a 'YYYY-MM-DD HH:MM:SS' string without strptime"""
+        if value == self._last_timestamp_str:
+            return self._last_timestamp
+        timestamp = datetime(
+            int(value[0:4]), int(value[5:7]), int(value[8:10]),
+            int(value[11:13]), int(value[14:16]), int(value[17:19])
+        )
+        self._last_timestamp_str = value
+        self._last_timestamp = timestamp
+        return timestamp
+
+    def parse(self, line):
+        """Parse a single log line, using the fast path when the layout fits."""
+        message = line.strip()
+        match = self.layout_re.match(message)
+        if match is not None:
+            body = match.group('body') or match.group('plain')
+            if body is None or self.guard_re.search(body) is None:
+                timestamp_str = match.group('timestamp')
+                if len(timestamp_str) == 19 and timestamp_str.isascii():
+                    try:
+                        timestamp = self.parse_timestamp(timestamp_str)
+                    except ValueError:
+                        return self.parse_fallback(line)
+                    response_time = match.group(self._response_time_group)
+                    return {
+                        'timestamp': timestamp,
+                        'severity': self.severity_for_level(match.group('level')),
+                        'message': message,
+                        'response_time': float(response_time) if response_time else None
+                    }
+        return self.parse_fallback(line)
+
+    def parse_fallback(self, line):
+        """Parse a line with the original search-anywhere rules."""
+        try:
+            timestamp_match = self.timestamp_re.search(line)
+            timestamp = datetime.strptime(timestamp_match.group(), self.TIMESTAMP_FORMAT) if timestamp_match else None
+
+            severity = 'INFO'
+            if self.error_re.search(line):
+                severity = 'ERROR'
+            elif self.warning_re.search(line):
+                severity = 'WARNING'
+
+            response_time_match = self.response_time_re.search(line)
+            response_time = float(response_time_match.group(1)) if response_time_match else None
+
+            return {
+                'timestamp': timestamp,
+                'severity': severity,
+                'message': line.strip(),
+                'response_time': response_time
+            }
+        except Exception as e:
+            if self.logger:
+                self.logger.error(f"Error parsing log line: {e}")
+            return None
+
+    def parse_fields(self, line):
+        """Parse a raw bytes line into column values without building a dict.
+
+        Returns ``(epoch_seconds, severity_code, response_time, message)``
+        where the message stays as bytes, or None if the line is unparseable.
+        Missing timestamps are NAT_SECONDS and missing response times NaN.
+        For lines in the standard layout the message is only the body, as
+        the timestamp, level and response_time have columns of their own;
+        such bodies repeat across lines and intern well. Other lines keep
+        their full text.
+        """
+        message = line.strip()
+        match = self.layout_bytes_re.match(message)
+        if match is not None:
+            body = match.group('body') or match.group('plain')
+            if body is None or self.guard_bytes_re.search(body) is None:
+                timestamp = match.group('timestamp')
+                if len(timestamp) == 19:
+                    try:
+                        seconds = self.timestamp_seconds(timestamp)
+                    except ValueError:
+                        return self.parse_fields_fallback(line)
+                    response_time = match.group(self._response_time_group)
+                    return (
+                        seconds,
+                        self.severity_code_for_level(match.group('level')),
+                        float(response_time) if response_time else float('nan'),
+                        body.strip() if body else b''
+                    )
+        return self.parse_fields_fallback(line)
+
+    def parse_fields_fallback(self, line):
+        """Column-value variant of parse_fallback for raw bytes lines"""
+        parsed = self.parse_fallback(line.decode('utf-8', 'replace'))
+        if parsed is None:
+            return None
+        timestamp = parsed['timestamp']
+        seconds = NAT_SECONDS if timestamp is None else epoch_seconds(timestamp)
+        response_time = parsed['response_time']
+        return (
+            seconds,
+            Config.SEVERITY_LEVELS.index(parsed['severity']),
+            float('nan') if response_time is None else response_time,
+            parsed['message'].encode('utf-8')
+        )
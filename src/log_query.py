@@ -0,0 +1,148 @@
+import re
+import numpy as np
+import pandas as pd
+from config import Config
+from log_parser import NAT_SECONDS, epoch_seconds
+from template_miner import TemplateMiner
+
+# Time buckets available as group keys
+TIME_GROUPS = {'minute': '1min', 'hour': '1h', 'day': '1D'}
+GROUP_KEYS = ['severity', 'message', 'template', *TIME_GROUPS]
+
+def _bound(timestamp):
+    """Epoch seconds of a time bound, rounded up as log timestamps are whole seconds"""
+    return epoch_seconds(timestamp) + (timestamp.microsecond > 0)
+
+class LogQuery:
+    """Filters over parsed log rows, evaluated as close to the data as possible.
+
+    A query keeps rows with since <= timestamp < until, one of
+    `severities`, a message containing `contains` and/or matching `regex`
+    (``re.search``) and a response time within the given bounds; unset
+    filters match everything.
+
+    The filters are pushed down in three steps: ``block_filter`` rules out
+    whole cached blocks by their zone maps, ``message_filter`` tests each
+    distinct message of a vocabulary once rather than every row, and
+    ``rows`` combines the column tests into one vectorized mask. The counts
+    of blocks and rows seen are kept for reporting.
+    """
+
+    def __init__(self, since=None, until=None, severities=None, contains=None, regex=None,
+                 ignore_case=False, min_response_time=None, max_response_time=None):
+        self.since = since
+        self.until = until
+        self.since_seconds = _bound(since) if since else None
+        self.until_seconds = _bound(until) if until else None
+        self.severity_codes = None
+        if severities:
+            levels = [level.upper() for level in severities]
+            unknown = sorted(set(levels) - set(Config.SEVERITY_LEVELS))
+            if unknown:
+                raise ValueError(f"Unknown severity: {', '.join(unknown)}")
+            self.severity_codes = np.zeros(len(Config.SEVERITY_LEVELS), dtype=bool)
+            self.severity_codes[[Config.SEVERITY_LEVELS.index(level) for level in levels]] = True
+        self.ignore_case = ignore_case
+        self.contains = contains.casefold() if contains and ignore_case else contains
+        self.regex = re.compile(regex, re.IGNORECASE if ignore_case else 0) if regex else None
+        self.min_response_time = min_response_time
+        self.max_response_time = max_response_time
+        self.blocks_read = 0
+        self.blocks_total = 0
+        self.rows_scanned = 0
+
+    @property
+    def filters_messages(self):
+        return bool(self.contains or self.regex)
+
+    def block_filter(self, stats):
+        """Which blocks may hold a matching row, given their zone maps (see LogColumns.block_stats)"""
+        keep = np.ones(len(stats['min_time']), dtype=bool)
+        if self.since_seconds is not None:
+            keep &= stats['max_time'] >= self.since_seconds
+        if self.until_seconds is not None:
+            keep &= stats['min_time'] < self.until_seconds
+        if self.severity_codes is not None:
+            mask = int(np.sum(np.left_shift(1, np.flatnonzero(self.severity_codes))))
+            keep &= (stats['severities'] & mask) != 0
+        # Comparisons with NaN are false, so blocks without response times drop out
+        if self.min_response_time is not None:
+            keep &= stats['max_response_time'] >= self.min_response_time
+        if self.max_response_time is not None:
+            keep &= stats['min_response_time'] <= self.max_response_time
+        self.blocks_read += int(keep.sum())
+        self.blocks_total += len(keep)
+        return keep
+
+    def message_filter(self, vocabulary):
+        """A boolean array over the codes of `vocabulary`: whether each message matches"""
+        matches = np.ones(len(vocabulary), dtype=bool)
+        for code, message in enumerate(vocabulary):
+            text = message.decode('utf-8', 'replace')
+            if self.contains:
+                matches[code] = self.contains in (text.casefold() if self.ignore_case else text)
+            if self.regex and matches[code]:
+                matches[code] = self.regex.search(text) is not None
+        return matches
+
+    def rows(self, columns):
+        """Indices of the rows of a LogColumns that match"""
+        timestamps = np.frombuffer(columns.timestamps, dtype=np.int64)
+        self.rows_scanned += len(timestamps)
+        mask = np.ones(len(timestamps), dtype=bool)
+        if self.since or self.until:
+            mask &= timestamps != NAT_SECONDS
+            if self.since_seconds is not None:
+                mask &= timestamps >= self.since_seconds
+            if self.until_seconds is not None:
+                mask &= timestamps < self.until_seconds
+        if self.severity_codes is not None:
+            mask &= self.severity_codes[np.frombuffer(columns.severities, dtype=np.int8)]
+        if self.min_response_time is not None or self.max_response_time is not None:
+            response_times = np.frombuffer(columns.response_times, dtype=np.float32)
+            if self.min_response_time is not None:
+                mask &= response_times >= self.min_response_time
+            if self.max_response_time is not None:
+                mask &= response_times <= self.max_response_time
+        if self.filters_messages:
+            matches = self.message_filter(columns.vocabulary)
+            mask &= matches[np.frombuffer(columns.message_codes, dtype=np.int32)]
+        return np.flatnonzero(mask)
+
+    def apply(self, columns):
+        """The matching rows of a LogColumns as an analysis DataFrame"""
+        return columns.to_frame(self.rows(columns))
+
+def group_rows(df, group_by, top=None):
+    """Count the rows of a query result per group, with their response times.
+
+    `group_by` is a list of GROUP_KEYS. Returns one row per group with its
+    ``count`` and mean and max response time, most frequent first when
+    `top` is given (only the `top` largest groups are kept) and in key
+    order otherwise.
+    """
+    unknown = [key for key in group_by if key not in GROUP_KEYS]
+    if unknown:
+        raise ValueError(f"Cannot group by {', '.join(unknown)}; choose from {', '.join(GROUP_KEYS)}")
+    keys = []
+    for key in group_by:
+        if key in TIME_GROUPS:
+            values = df['timestamp'].dt.floor(TIME_GROUPS[key])
+        elif key == 'template':
+            miner = TemplateMiner()
+            template_ids = miner.add_frame(df)
+            templates = np.array([miner.template(i) for i in range(len(miner))], dtype=object)
+            values = pd.Series(templates[template_ids], index=df.index)
+        else:
+            values = df[key]
+        keys.append(values.rename(key))
+    result = (
+        df['response_time']
+        .groupby(keys, observed=True, dropna=False)
+        .agg(['size', 'mean', 'max'])
+        .rename(columns={'size': 'count', 'mean': 'avg_response_time', 'max': 'max_response_time'})
+        .reset_index()
+    )
+    if top:
+        result = result.nlargest(top, 'count', keep='first').reset_index(drop=True)
+    return result
@@ -0,0 +1,148 @@
+import bz2
+import gzip
+import mmap
+from pathlib import Path
+
+try:
+    import zstandard
+except ImportError:  # optional dependency; .zst archives can't be read without it
+    zstandard = None
+
+# Rotated archives read alongside the plain *.log files
+COMPRESSED_SUFFIXES = ('.gz', '.bz2', '.zst')
+
+def is_compressed(path):
+    return str(path).endswith(COMPRESSED_SUFFIXES)
+
+def is_rotated_archive(name):
+    """Whether a file name is a compressed rotation of a *.log file.
+
+    Covers the names logrotate gives archives: app.log.gz, numbered
+    (app.log.1.gz) and dated (app.log-20240101.gz).
+    """
+    if not is_compressed(name):
+        return False
+    _, log, rotation = name.rpartition('.log')
+    return bool(log) and rotation[:1] in ('.', '-')
+
+def list_log_files(log_dir, compressed=True):
+    """Sorted *.log files of `log_dir`, plus their rotated .gz/.bz2/.zst archives if `compressed`"""
+    log_dir = Path(log_dir)
+    log_files = list(log_dir.glob('*.log'))
+    if compressed:
+        log_files.extend(path for path in log_dir.glob('*.log*') if is_rotated_archive(path.name))
+    return sorted(log_files)
+
+def open_decompressed(path):
+    """Open a .gz, .bz2 or .zst file as a binary stream of its decompressed bytes"""
+    path = str(path)
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rb')
+    if path.endswith('.bz2'):
+        return bz2.open(path, 'rb')
+    if path.endswith('.zst'):
+        if zstandard is None:
+            raise RuntimeError("reading .zst files requires the zstandard package")
+        raw = open(path, 'rb')
+        # Rotation tools may append several frames to one file
+        return zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True,
+                                                          closefd=True)
+    raise ValueError(f"Not a compressed log file: {path}")
+
+def count_lines(data):
+    """Number of lines in a bytes buffer, counting an unterminated last line"""
+    return data.count(b'\n') + (1 if data and not data.endswith(b'\n') else 0)
+
+def iter_blocks(f, start, end, block_size, include_partial=True):
+    """Yield newline-terminated byte blocks covering [start, end) of file `f`.
+
+    Blocks are at most about `block_size` bytes plus one line. The bytes
+    after the last newline are only yielded when `include_partial` is set.
+    Works on any seekable binary stream, and a file truncated while it is
+    read just gives a short read; it is used to tail live files. See
+    iter_mapped_blocks for the mmap-backed variant used to ingest files in
+    batch.
+    """
+    f.seek(start)
+    pending = b''
+    remaining = end - start
+    while remaining > 0:
+        chunk = f.read(min(block_size, remaining))
+        if not chunk:
+            break
+        remaining -= len(chunk)
+        data = pending + chunk if pending else chunk
+        cut = data.rfind(b'\n') + 1
+        if remaining <= 0 and include_partial:
+            cut = len(data)
+        if cut:
+            yield data[:cut]
+        pending = data[cut:]
+
+def iter_decompressed_blocks(path, block_size, include_partial=True):
+    """Yield newline-terminated blocks of a compressed file's contents.
+
+    The file is decompressed as a stream, `block_size` decompressed bytes
+    at a time, so memory use does not depend on the size of the archive.
+    """
+    with open_decompressed(path) as f:
+        pending = b''
+        while True:
+            chunk = f.read(block_size)
+            if not chunk:
+                break
+            data = pending + chunk if pending else chunk
+            cut = data.rfind(b'\n') + 1
+            if cut:
+                yield data[:cut]
+            pending = data[cut:]
+        if pending and include_partial:
+            yield pending
+
+def iter_file_blocks(path, start, end, block_size, include_partial=True):
+    """Blocks of [start, end) of a log file, or all of a compressed one.
+
+    Compressed files can't be read from an offset, so they are always
+    decompressed in full and `start`/`end` are ignored.
+    """
+    if is_compressed(path):
+        return iter_decompressed_blocks(path, block_size, include_partial)
+    return iter_mapped_blocks(path, start, end, block_size, include_partial)
+
+def iter_mapped_blocks(path, start, end, block_size, include_partial=True):
+    """Yield newline-terminated blocks of [start, end) from a read-only mmap.
+
+    Block boundaries are found by scanning the mapping for newlines, and
+    each block is sliced straight out of the page cache: there is no read
+    buffer and no concatenation of partial lines. Pages behind the scan
+    are dropped with MADV_DONTNEED, so resident memory stays at roughly
+    one block no matter how large the file is.
+    """
+    if end <= start:
+        return
+    # mmap offsets must be a multiple of the allocation granularity
+    base = start - start % mmap.ALLOCATIONGRANULARITY
+    with open(path, 'rb') as f:
+        mapped = mmap.mmap(f.fileno(), end - base, access=mmap.ACCESS_READ, offset=base)
+    try:
+        can_drop = hasattr(mapped, 'madvise') and hasattr(mmap, 'MADV_DONTNEED')
+        pos, stop = start - base, end - base
+        while pos < stop:
+            limit = min(pos + block_size, stop)
+            if limit == stop:
+                cut = stop if include_partial else mapped.rfind(b'\n', pos, stop) + 1
+            else:
+                cut = mapped.rfind(b'\n', pos, limit) + 1
+                if cut <= pos:
+                    # A single line longer than the block size
+                    newline = mapped.find(b'\n', limit, stop)
+                    cut = newline + 1 if newline >= 0 else (stop if include_partial else 0)
+            if cut <= pos:
+                break
+            yield mapped[pos:cut]
+            if can_drop:
+                page_start = pos - pos % mmap.PAGESIZE
+                mapped.madvise(mmap.MADV_DONTNEED, page_start, cut - page_start)
+            pos = cut
+    finally:
+        mapped.close()
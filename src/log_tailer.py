@@ -0,0 +1,239 @@
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from config import Config
+from ingestion import count_parse_failures
+from log_reader import iter_blocks
+from log_columns import LogColumns
+from rollups import Rollup
+from sketches import TimeSketches
+from summary_aggregator import SummaryAggregator
+from template_miner import TemplateMiner
+
+class LogTailer:
+    """Incremental reader that only parses bytes appended since the last cycle.
+
+    A checkpoint is kept per file: inode, size, byte offset of the last
+    complete line consumed and a hash of the bytes just before that offset.
+    On each cycle the checkpoint tells whether a file was appended to (resume at the offset),
+    renamed (same inode under a new path), truncated (size below the offset)
+    or replaced (inode or line hash changed), in which case it is read from
+    the start. Checkpoints and the running SummaryAggregator are persisted
+    together so a restart resumes without double counting. With
+    ``rollups`` a time-bucketed Rollup of all rows is kept alongside, in
+    ``<state_file stem>.rollup.npz``. With ``templates`` a TemplateMiner
+    of all messages is kept in the state file. The aggregator's sketches
+    are saved to ``<state_file stem>.sketches.npz``; with
+    ``sketches=False`` (as for alerting only) they are not kept at all.
+    """
+
+    def __init__(self, log_dir, parser, state_file=None, logger=None, rollups=False,
+                 templates=False, sketches=True):
+        self.log_dir = Path(log_dir)
+        self.parser = parser
+        self.state_file = Path(state_file or Config.INCREMENTAL_CONFIG['state_file'])
+        self.logger = logger
+        self.chunk_size = Config.INCREMENTAL_CONFIG['chunk_size']
+        self.hash_bytes = Config.INCREMENTAL_CONFIG['hash_bytes']
+        self.idle_seconds = Config.INCREMENTAL_CONFIG['idle_seconds']
+        self.checkpoints = {}
+        self.pending_checkpoints = None
+        self.sketches = sketches
+        self.sketch_file = self.state_file.with_suffix('.sketches.npz')
+        self.aggregator = SummaryAggregator(sketches)
+        self.rollup_file = self.state_file.with_suffix('.rollup.npz') if rollups else None
+        self.rollup = Rollup() if rollups else None
+        self.templates = TemplateMiner() if templates else None
+        self.load_state()
+
+    def _reset(self):
+        self.checkpoints = {}
+        self.aggregator = SummaryAggregator(self.sketches)
+        self.rollup = Rollup() if self.rollup is not None else None
+        self.templates = TemplateMiner() if self.templates is not None else None
+
+    def load_state(self):
+        """Load checkpoints and running aggregates from the state file"""
+        self._reset()
+        if not self.state_file.exists():
+            return
+        try:
+            with open(self.state_file, 'r') as f:
+                state = json.load(f)
+            self.checkpoints = state.get('files', {})
+            self.aggregator = SummaryAggregator.from_dict(state.get('aggregates', {}), self.sketches)
+            if self.sketches and self.sketch_file.exists():
+                self.aggregator.sketches = TimeSketches.load(self.sketch_file)
+            if self.rollup is not None and self.rollup_file.exists():
+                self.rollup = Rollup.load(self.rollup_file)
+            if self.templates is not None:
+                self.templates = TemplateMiner.from_dict(state.get('templates', {}))
+        except Exception as e:
+            self._log('error', f"Error loading tail state {self.state_file}: {e}")
+            self._reset()
+
+    def save_state(self):
+        """Atomically persist checkpoints and running aggregates"""
+        self.state_file.parent.mkdir(parents=True, exist_ok=True)
+        if self.rollup is not None:
+            # Written first; a crash in between can at worst count a batch twice
+            self.rollup.save(self.rollup_file)
+        if self.aggregator.sketches is not None:
+            self.aggregator.sketches.save(self.sketch_file)
+        state = {'files': self.checkpoints, 'aggregates': self.aggregator.to_dict(include_sketches=False)}
+        if self.templates is not None:
+            state['templates'] = self.templates.to_dict()
+        tmp_file = self.state_file.with_suffix(self.state_file.suffix + '.tmp')
+        with open(tmp_file, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp_file, self.state_file)
+
+    def _log(self, level, message):
+        if self.logger:
+            getattr(self.logger, level)(message)
+
+    def _tail_hash(self, f, offset, length):
+        """Hash of the `length` bytes consumed just before `offset`"""
+        if length <= 0:
+            return None
+        f.seek(offset - length)
+        return hashlib.blake2b(f.read(length), digest_size=8).hexdigest()
+
+    def resume_offset(self, path, stat, f):
+        """Return the offset to resume from for `path`, or 0 to start over"""
+        checkpoint = self.checkpoints.get(str(path))
+        if checkpoint is None or checkpoint.get('inode') != stat.st_ino:
+            # The file may have been renamed by rotation; match on inode
+            checkpoint = next(
+                (c for c in self.checkpoints.values() if c.get('inode') == stat.st_ino),
+                None
+            )
+        if checkpoint is None:
+            return 0
+
+        offset = checkpoint.get('offset', 0)
+        if stat.st_size < offset:
+            self._log('info', f"Detected truncation of {path}, reading from start")
+            return 0
+        if self._tail_hash(f, offset, checkpoint.get('hash_length', 0)) != checkpoint.get('line_hash'):
+            self._log('info', f"Detected replaced content in {path}, reading from start")
+            return 0
+        return offset
+
+    def read_file(self, path, columns, checkpoints, stats=None):
+        """Parse the complete lines appended to `path` into `columns`.
+
+        The updated checkpoint for `path` is stored in `checkpoints`, and
+        bytes and lines read are added to `stats` if given.
+        """
+        stat = path.stat()
+        end = stat.st_size
+        # An idle file's unterminated last line is treated as complete
+        idle = time.time() - stat.st_mtime >= self.idle_seconds
+
+        with open(path, 'rb') as f:
+            offset = self.resume_offset(path, stat, f)
+            # Buffered reads, not mmap: a live file truncated while mapped
+            # (copytruncate rotation) would kill the process with SIGBUS
+            for block in iter_blocks(f, offset, end, self.chunk_size, include_partial=idle):
+                added = columns.add_buffer(block, self.parser.parse_fields)
+                offset += len(block)
+                if stats:
+                    stats.add(len(block), added, count_parse_failures(block, columns, added))
+
+            checkpoints[str(path)] = self._checkpoint(f, stat, offset)
+
+    def _checkpoint(self, f, stat, offset):
+        hash_length = min(offset, self.hash_bytes)
+        return {
+            'inode': stat.st_ino,
+            'size': stat.st_size,
+            'offset': offset,
+            'hash_length': hash_length,
+            'line_hash': self._tail_hash(f, offset, hash_length)
+        }
+
+    def _log_files(self, paths=None, exclude=None):
+        if paths is None:
+            log_files = self.log_dir.glob('*.log')
+        else:
+            log_files = (Path(path) for path in paths if Path(path).exists())
+        exclude = exclude or set()
+        return sorted(log_file for log_file in log_files if log_file.resolve() not in exclude)
+
+    def skip_existing(self, exclude=None):
+        """Checkpoint every log file after its last complete line without parsing it"""
+        checkpoints = {}
+        for log_file in self._log_files(exclude=exclude):
+            try:
+                stat = log_file.stat()
+                idle = time.time() - stat.st_mtime >= self.idle_seconds
+                with open(log_file, 'rb') as f:
+                    offset = stat.st_size
+                    if not idle and offset:
+                        # A line still being written is read once it is complete
+                        f.seek(max(offset - self.chunk_size, 0))
+                        tail = f.read(offset - f.tell())
+                        offset -= len(tail) - tail.rfind(b'\n') - 1
+                    checkpoints[str(log_file)] = self._checkpoint(f, stat, offset)
+            except OSError as e:
+                self._log('error', f"Error tailing file {log_file}: {e}")
+        self.checkpoints = checkpoints
+        self.pending_checkpoints = None
+        self.save_state()
+
+    def read_new(self, paths=None, stats=None, exclude=None):
+        """Parse everything appended since the last cycle.
+
+        Returns a LogColumns instance with the new rows only. Checkpoints
+        only advance when commit() is called after the rows were handled.
+        `paths` limits the read to files known to have changed, keeping the
+        checkpoints of all other files as they are. Files whose resolved
+        path is in `exclude` are never read. Throughput goes to `stats` (an
+        ingestion.IngestionStats).
+        """
+        columns = LogColumns()
+        log_files = self._log_files(paths, exclude)
+        self.pending_checkpoints = {} if paths is None else dict(self.checkpoints)
+        if stats:
+            stats.files += len(log_files)
+        for log_file in log_files:
+            try:
+                self.read_file(log_file, columns, self.pending_checkpoints, stats)
+            except Exception as e:
+                self._log('error', f"Error tailing file {log_file}: {e}")
+                if str(log_file) in self.checkpoints:
+                    self.pending_checkpoints[str(log_file)] = self.checkpoints[str(log_file)]
+        # Files that were deleted or rotated out of the glob are dropped
+        return columns
+
+    def fold(self, df):
+        """Fold the new rows into the in-memory aggregates without persisting.
+
+        With templates, `df` gets a 'template_id' column. Follow with
+        commit() once the rows were handled, or rollback() to forget them.
+        """
+        self.aggregator.update_frame(df)
+        if self.rollup is not None and len(df):
+            self.rollup.merge(Rollup.from_frame(df, self.rollup.bucket))
+        if self.templates is not None and len(df):
+            df['template_id'] = self.templates.add_frame(df)
+
+    def rollback(self):
+        """Drop rows read or folded since the last commit; they are read again next time"""
+        self.pending_checkpoints = None
+        self.load_state()
+
+    def commit(self, df=None):
+        """Advance the checkpoints and persist state.
+
+        `df`, if given, is folded first (see fold()).
+        """
+        if df is not None:
+            self.fold(df)
+        if self.pending_checkpoints is not None:
+            self.checkpoints = self.pending_checkpoints
+            self.pending_checkpoints = None
+        self.save_state()
@@ -0,0 +1,134 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import time
+from pathlib import Path
+from config import Config
+
+# inotify(7) event masks
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE
+              | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF)
+# Events after which the set of files has changed and everything is rescanned
+RESCAN_MASK = IN_MOVED_FROM | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_Q_OVERFLOW
+EVENT_HEADER = struct.Struct('iIII')
+
+class InotifyWatcher:
+    """Directory watcher backed by Linux inotify, loaded through ctypes.
+
+    ``wait`` returns the set of ``*.log`` paths written to since the last
+    call, or None when files were moved or deleted (e.g. by rotation) and
+    the caller should rescan the whole directory.
+    """
+
+    mode = 'inotify'
+
+    def __init__(self, log_dir):
+        self.log_dir = Path(log_dir)
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        if not hasattr(libc, 'inotify_init1'):
+            raise OSError("inotify is not available")
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        if libc.inotify_add_watch(self.fd, str(self.log_dir).encode(), WATCH_MASK) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f"inotify_add_watch failed for {self.log_dir}")
+
+    def wait(self, timeout=None):
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return set()
+        changed = set()
+        rescan = False
+        # Drain everything that is already queued so bursts become one batch
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                _, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+                name = data[offset + EVENT_HEADER.size:offset + EVENT_HEADER.size + length]
+                offset += EVENT_HEADER.size + length
+                if mask & RESCAN_MASK:
+                    rescan = True
+                name = name.rstrip(b'\0').decode('utf-8', 'surrogateescape')
+                if name.endswith('.log'):
+                    changed.add(self.log_dir / name)
+        return None if rescan else changed
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+class PollingWatcher:
+    """Portable watcher that compares the size, mtime and inode of ``*.log`` files.
+
+    Has the same ``wait`` contract as InotifyWatcher.
+    """
+
+    mode = 'polling'
+
+    def __init__(self, log_dir, interval=None):
+        self.log_dir = Path(log_dir)
+        self.interval = interval or Config.WATCH_CONFIG['poll_interval']
+        self.snapshot = self._scan()
+
+    def _scan(self):
+        snapshot = {}
+        for log_file in self.log_dir.glob('*.log'):
+            try:
+                stat = log_file.stat()
+            except FileNotFoundError:
+                continue
+            snapshot[log_file] = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        return snapshot
+
+    def wait(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            snapshot = self._scan()
+            previous, self.snapshot = self.snapshot, snapshot
+            if snapshot.keys() < previous.keys() or any(
+                    snapshot[path][0] != previous[path][0]
+                    for path in snapshot.keys() & previous.keys()):
+                return None
+            changed = {path for path, state in snapshot.items() if previous.get(path) != state}
+            if changed:
+                return changed
+            if deadline is not None and time.monotonic() >= deadline:
+                return set()
+            time.sleep(self.interval if deadline is None
+                       else max(min(self.interval, deadline - time.monotonic()), 0))
+
+    def close(self):
+        pass
+
+def create_watcher(log_dir, use_inotify=None, logger=None):
+    """Return an InotifyWatcher where the platform supports it, else a PollingWatcher"""
+    if use_inotify is None:
+        use_inotify = Config.WATCH_CONFIG['use_inotify']
+    if use_inotify:
+        try:
+            return InotifyWatcher(log_dir)
+        except (OSError, AttributeError) as e:
+            if logger:
+                logger.info(f"inotify unavailable ({e}), polling {log_dir} instead")
+    return PollingWatcher(log_dir)
@@ -1,13 +1,21 @@
+import argparse
+import threading
 import time
 import schedule
 from datetime import datetime
 from pathlib import Path
 import logging
 from log_analyzer import LogAnalyzer
+from log_tailer import LogTailer
+from log_watcher import create_watcher
 from visualizer import LogVisualizer
 from alert_system import AlertSystem
 from config import Config
-from utils import setup_rotating_logger
+from history_store import HistoryStore
+from ingestion import IngestionStats
+from instrumentation import CycleMetrics, profile_cycle
+from rollups import Rollup
+from utils import save_json, setup_rotating_logger
 
 class LogAnalyzerService:
     def __init__(self):
@@ -22,6 +30,7 @@ class LogAnalyzerService:
             self.analyzer = LogAnalyzer()
             self.visualizer = LogVisualizer()
             self.alert_system = AlertSystem()
+            self.history = HistoryStore() if Config.HISTORY_CONFIG['enabled'] else None
             self.create_directories()
             self.logger.info("Service initialization completed successfully")
         except Exception as e:
@@ -39,48 +48,191 @@ class LogAnalyzerService:
             raise
 
     def process_logs(self):
-        """Main function to process logs and generate reports"""
+        """Main function to process logs and generate reports.
+
+        Stage timings and counters of the cycle are returned as a
+        CycleMetrics and, with Config.METRICS_CONFIG enabled, recorded in
+        the history store (or written next to the report) and to a
+        Prometheus text file.
+        """
+        metrics = CycleMetrics()
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        metrics_config = Config.METRICS_CONFIG
         try:
             self.logger.info("Starting log analysis cycle...")
-            
-            # Analyze logs
-            df = self.analyzer.analyze_logs()
-            if df.empty:
-                self.logger.warning("No logs found to analyze")
-                return
+            with profile_cycle(metrics_config['profile_dir'], f"cycle_{timestamp}",
+                               metrics_config['cprofile'], metrics_config['tracemalloc'],
+                               metrics_config['top_allocations']) as profiles:
+                self._analysis_cycle(metrics, timestamp)
+            for profile_file in profiles:
+                self.logger.info(f"Cycle profile written to {profile_file}")
+        except Exception as e:
+            self.logger.error(f"Error in log analysis cycle: {str(e)}")
+        metrics.finish()
+        if metrics_config['enabled']:
+            self.write_metrics(metrics, timestamp)
+        return metrics
 
-            # Generate summary
+    def _analysis_cycle(self, metrics, timestamp):
+        stats = IngestionStats()
+        # Analyze logs
+        if Config.INCREMENTAL_CONFIG['enabled']:
+            # Only newly appended rows are parsed; the summary covers all
+            # rows seen so far through the persisted running aggregates. The
+            # service's own logs are skipped, as in watch mode.
+            with metrics.stage('parse'):
+                df, summary = self.analyzer.analyze_incremental(stats=stats,
+                                                                exclude=self._own_log_files())
+            metrics.add_ingestion(stats)
+            tailer = self.analyzer.tailer
+            # Charts cover everything seen so far, not just the new rows
+            chart_data = tailer.rollup if tailer.rollup is not None else df
+            try:
+                if summary['total_logs'] == 0:
+                    self.logger.warning("No logs found to analyze")
+                elif df.empty:
+                    self.logger.info("No new log entries since the last cycle")
+                else:
+                    self._report_cycle(metrics, timestamp, df, summary, chart_data)
+            except Exception:
+                # The checkpoints stay put, so the rows are handled again next cycle
+                tailer.rollback()
+                raise
+            tailer.commit()
+            return
+
+        with metrics.stage('parse'):
+            df = self.analyzer.analyze_logs(stats=stats)
+        metrics.add_ingestion(stats)
+        if df.empty:
+            self.logger.warning("No logs found to analyze")
+            return
+
+        # Generate summary
+        with metrics.stage('summary'):
             summary = self.analyzer.generate_summary(df)
-            
-            # Save report
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            report_file = Config.REPORTS_DIR / f"log_summary_{timestamp}.json"
-            self.analyzer.save_report(summary, report_file)
-            
-            # Generate visualizations
-            viz_results = self.visualizer.generate_all_visualizations(df)
-            
-            # Check for critical errors and send alerts
-            critical_logs = df[df['severity'] == 'ERROR']
-            alerts_sent = 0
-            for _, log in critical_logs.iterrows():
-                if self.alert_system.should_send_alert(log):
-                    if self.alert_system.send_alert(log):
-                        alerts_sent += 1
-
-            self.logger.info(
-                f"Analysis cycle completed: "
-                f"Processed {len(df)} logs, "
-                f"Found {len(critical_logs)} critical issues, "
-                f"Sent {alerts_sent} alerts, "
-                f"Generated {sum(viz_results.values())}/{len(viz_results)} visualizations"
-            )
-            
+        self._report_cycle(metrics, timestamp, df, summary, df)
+
+    def _report_cycle(self, metrics, timestamp, df, summary, chart_data):
+        """Render the charts, queue alerts and save the report and history for `df`"""
+        # Generate visualizations
+        with metrics.stage('render'):
+            viz_results = self.visualizer.generate_all_visualizations(chart_data)
+        metrics.count('charts_rendered', sum(viz_results.values()))
+
+        # Check for critical errors and send alerts
+        # Alerts are delivered as digests by a background thread
+        with metrics.stage('alerts'):
+            critical_count = int((df['severity'] == 'ERROR').sum())
+            alerts = self.alert_system.collect_alerts(df)
+            alerts_queued = self.alert_system.queue_alerts(alerts)
+        metrics.count('alerts', len(alerts))
+        metrics.count('alerts_queued', alerts_queued)
+
+        # Save report; last, so a cycle that fails earlier and is retried
+        # does not add its rows to the history twice
+        with metrics.stage('save_report'):
+            if self.history is not None:
+                self.history.add_summary(summary)
+                # Incremental cycles see each row once; full cycles re-read every row
+                self.history.add_rollup(Rollup.from_frame(df),
+                                        replace=not Config.INCREMENTAL_CONFIG['enabled'])
+            if self.history is None or Config.HISTORY_CONFIG['json_reports']:
+                report_file = Config.REPORTS_DIR / f"log_summary_{timestamp}.json"
+                self.analyzer.save_report(summary, report_file)
+
+        self.logger.info(
+            f"Analysis cycle completed: "
+            f"Processed {len(df)} logs, "
+            f"Found {critical_count} critical issues, "
+            f"Queued {alerts_queued} alerts, "
+            f"Generated {sum(viz_results.values())}/{len(viz_results)} visualizations"
+        )
+
+    def write_metrics(self, metrics, timestamp):
+        """Record the cycle metrics in the history, or next to the report, and in the Prometheus file"""
+        # SMTP delivery runs in the background, so it is reported as running totals
+        delivery = self.alert_system.delivery_stats()
+        metrics.totals.update({f"alerts_{name}": value for name, value in delivery.items()
+                               if name != 'send_seconds'})
+        metrics.totals['alert_send_seconds'] = delivery['send_seconds']
+        try:
+            if self.history is not None:
+                self.history.add_metrics(metrics.to_dict())
+            if self.history is None or Config.HISTORY_CONFIG['json_reports']:
+                save_json(metrics.to_dict(), Config.REPORTS_DIR / f"cycle_metrics_{timestamp}.json")
+            if Config.METRICS_CONFIG['prometheus_file']:
+                metrics.write_prometheus(Config.METRICS_CONFIG['prometheus_file'])
         except Exception as e:
-            self.logger.error(f"Error in log analysis cycle: {str(e)}")
+            self.logger.error(f"Failed to write cycle metrics: {str(e)}")
+            return
+        stages = ', '.join(f"{name} {seconds:.2f}s" for name, seconds in metrics.stages.items())
+        self.logger.info(f"Cycle took {metrics.elapsed:.2f}s ({stages})")
+
+    def _own_log_files(self):
+        """Files the service itself logs to, which incremental cycles and watch mode must not read"""
+        loggers = [self.logger, self.analyzer.logger, self.alert_system.logger, self.visualizer.logger]
+        return {
+            Path(handler.baseFilename).resolve()
+            for logger in loggers
+            for handler in logger.handlers if hasattr(handler, 'baseFilename')
+        }
+
+    def process_new_lines(self, tailer, paths=None, on_alerts=None, exclude=None):
+        """Run the alert rules on lines appended to `paths` (all files if None).
+
+        Files in `exclude` are not read. Returns the number of alerts queued.
+        """
+        try:
+            df = tailer.read_new(paths, exclude=exclude).to_frame()
+            alerts = self.alert_system.collect_alerts(df, carry_over=True) if len(df) else []
+            if on_alerts:
+                on_alerts(df, alerts)
+            alerts_queued = self.alert_system.queue_alerts(alerts)
+            tailer.commit(df)
+            if alerts_queued:
+                self.logger.info(f"Queued {alerts_queued} alerts from {len(df)} new log lines")
+            return alerts_queued
+        except Exception as e:
+            self.logger.error(f"Error processing new log lines: {str(e)}")
+            return 0
+
+    def watch(self, stop_event=None, on_alerts=None):
+        """Follow the log directory like tail -F and alert on lines as they are written.
+
+        Uses inotify where available and polling otherwise. On the first run
+        existing content is skipped; afterwards the watch state resumes where
+        the previous run stopped. Scheduled jobs keep running in between.
+        Runs until `stop_event` is set. `on_alerts(df, alerts)` is called
+        with every batch of new lines once the alert rules have run.
+        """
+        stop_event = stop_event or threading.Event()
+        log_dir = self.analyzer.log_dir
+        # Separate from the incremental state, so scheduled reports still see every line
+        tailer = LogTailer(log_dir, self.analyzer.parser, Config.WATCH_CONFIG['state_file'], self.logger,
+                           sketches=False)
+        first_run = not tailer.state_file.exists()
+        watcher = create_watcher(log_dir, logger=self.logger)
+        own_log_files = self._own_log_files()
+        self.logger.info(f"Watching {log_dir} for new log lines ({watcher.mode})")
+        try:
+            if first_run:
+                tailer.skip_existing(exclude=own_log_files)
+            else:
+                self.process_new_lines(tailer, None, on_alerts, own_log_files)
+            while not stop_event.is_set():
+                changed = watcher.wait(Config.WATCH_CONFIG['wait_timeout'])
+                if changed is not None:
+                    changed = {path for path in changed if path.resolve() not in own_log_files}
+                if changed is None or changed:
+                    # On a rescan (None) the tailer filters the service's own logs itself
+                    self.process_new_lines(tailer, changed, on_alerts, own_log_files)
+                schedule.run_pending()
+        finally:
+            watcher.close()
 
     def cleanup_old_files(self, days_to_keep=None):
-        """Clean up old reports and visualizations"""
+        """Clean up old reports and visualizations and compact the history"""
         days_to_keep = days_to_keep or Config.RETENTION_DAYS
         try:
             self.logger.info(f"Starting cleanup of files older than {days_to_keep} days")
@@ -101,6 +253,11 @@ class LogAnalyzerService:
                                 self.logger.error(f"Failed to delete file {file}: {str(e)}")
             
             self.logger.info(f"Cleanup completed. Deleted {deleted_count} old files")
+
+            # History is downsampled rather than deleted
+            if self.history is not None:
+                compacted = self.history.compact()
+                self.logger.info(f"History compacted: {compacted} rows downsampled")
             
         except Exception as e:
             self.logger.error(f"Error during cleanup: {str(e)}")
@@ -123,7 +280,13 @@ def setup_schedules(service):
         logging.error(f"Failed to setup schedules: {str(e)}")
         return False
 
-def main():
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description='Log Analyzer Service')
+    arg_parser.add_argument('--watch', action='store_true',
+                            help='Follow the log directory and alert on new lines as they are written')
+    args = arg_parser.parse_args(argv)
+
+    service = None
     try:
         service = LogAnalyzerService()
         if setup_schedules(service):
@@ -135,6 +298,10 @@ def main():
         # Run initial analysis
         service.process_logs()
         
+        if args.watch:
+            service.watch()
+            return
+
         # Keep running
         service.logger.info("Starting main service loop")
         while True:
@@ -146,7 +313,13 @@ def main():
     except Exception as e:
         logging.error(f"Fatal error in main service: {str(e)}")
     finally:
+        if service is not None:
+            # Deliver alerts that are still queued
+            service.alert_system.close()
+            service.visualizer.close()
+            if service.history is not None:
+                service.history.close()
         logging.info("Service shutdown complete")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
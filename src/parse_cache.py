@@ -0,0 +1,213 @@
+import hashlib
+import json
+import os
+from array import array
+from pathlib import Path
+import numpy as np
+from config import Config
+from log_columns import LogColumns
+
+# Part of every fingerprint, so entries written in an older layout are never read
+FORMAT_VERSION = 3
+
+BLOCK_STATS = ['min_time', 'max_time', 'severities', 'min_response_time', 'max_response_time']
+
+try:
+    import pyarrow as pa
+    from pyarrow import feather
+except ImportError:  # optional dependency; fall back to numpy archives
+    pa = None
+
+class ParseCache:
+    """On-disk cache of the parsed columns of each log file.
+
+    Entries are keyed by a fingerprint of the source file (resolved path,
+    size, mtime and a hash of its first and last bytes) and of the parser
+    configuration (``Config.LOG_PATTERNS`` and ``Config.SEVERITY_LEVELS``),
+    so a file is only parsed again after it or the way it is parsed
+    changes. Columns are stored as Feather files when
+    pyarrow is installed and as uncompressed .npz archives otherwise.
+    Entries are evicted least recently used first once the cache grows
+    past ``max_bytes``.
+
+    Rows are stored in blocks of ``block_rows`` with a zone map each (see
+    ``LogColumns.block_stats``); ``load`` can be given a predicate over the
+    zone maps to read only the blocks that may match. With Feather, the
+    other blocks are never read from disk.
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=None, logger=None):
+        self.cache_dir = Path(cache_dir or Config.CACHE_CONFIG['cache_dir'])
+        self.max_bytes = max_bytes or Config.CACHE_CONFIG['max_bytes']
+        self.hash_bytes = Config.CACHE_CONFIG['hash_bytes']
+        self.block_rows = Config.CACHE_CONFIG['block_rows']
+        self.logger = logger
+        self.suffix = '.feather' if pa is not None else '.npz'
+
+    def _log(self, level, message):
+        if self.logger:
+            getattr(self.logger, level)(message)
+
+    def fingerprint(self, path):
+        """Return the cache key for the current contents of `path`"""
+        path = Path(path).resolve()
+        stat = path.stat()
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(f"{FORMAT_VERSION}|{path}|{stat.st_size}|{stat.st_mtime_ns}".encode())
+        # Cached rows hold what the patterns extracted and the severity codes
+        digest.update(json.dumps([Config.LOG_PATTERNS, Config.SEVERITY_LEVELS], sort_keys=True).encode())
+        with open(path, 'rb') as f:
+            digest.update(f.read(self.hash_bytes))
+            if stat.st_size > self.hash_bytes:
+                f.seek(max(stat.st_size - self.hash_bytes, self.hash_bytes))
+                digest.update(f.read(self.hash_bytes))
+        return digest.hexdigest()
+
+    def _path_prefix(self, path):
+        """Entry name prefix shared by all cached versions of one source file"""
+        return hashlib.blake2b(str(Path(path).resolve()).encode(), digest_size=8).hexdigest()
+
+    def entry_path(self, path, key):
+        return self.cache_dir / f"{self._path_prefix(path)}-{key}{self.suffix}"
+
+    def load(self, path, key=None, blocks=None):
+        """Return the cached LogColumns for `path`, or None on a miss.
+
+        `blocks` is an optional function that takes the entry's zone maps
+        (a dict of arrays, one entry per block) and returns a boolean array
+        of the blocks to read; the rows of the other blocks are left out.
+        """
+        try:
+            entry = self.entry_path(path, key or self.fingerprint(path))
+            if not entry.exists():
+                return None
+            columns = self._read(entry, blocks)
+            # The entry's mtime is its last use, for LRU eviction
+            os.utime(entry)
+            return columns
+        except Exception as e:
+            self._log('error', f"Error loading cached columns for {path}: {e}")
+            return None
+
+    def store(self, path, columns, key=None):
+        """Cache `columns` for `path`, replacing older versions of the file"""
+        try:
+            entry = self.entry_path(path, key or self.fingerprint(path))
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            for stale in self.cache_dir.glob(f"{self._path_prefix(path)}-*"):
+                if stale != entry:
+                    stale.unlink(missing_ok=True)
+            tmp_entry = entry.with_name(entry.name + '.tmp')
+            self._write(tmp_entry, columns)
+            os.replace(tmp_entry, entry)
+            self.evict()
+        except Exception as e:
+            self._log('error', f"Error caching columns for {path}: {e}")
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits max_bytes"""
+        entries = []
+        for entry in self.cache_dir.glob(f"*{self.suffix}"):
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, entry))
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        evicted = 0
+        for _, size, entry in entries:
+            if total <= self.max_bytes:
+                break
+            entry.unlink(missing_ok=True)
+            total -= size
+            evicted += 1
+        return evicted
+
+    def _write(self, entry, columns):
+        timestamps = np.frombuffer(columns.timestamps, dtype=np.int64)
+        severities = np.frombuffer(columns.severities, dtype=np.int8)
+        response_times = np.frombuffer(columns.response_times, dtype=np.float32)
+        message_codes = np.frombuffer(columns.message_codes, dtype=np.int32)
+        vocabulary = b''.join(columns.vocabulary)
+        vocabulary_ends = np.cumsum([len(message) for message in columns.vocabulary], dtype=np.int64)
+        stats = columns.block_stats(self.block_rows)
+        if pa is None:
+            with open(entry, 'wb') as f:
+                np.savez(f, timestamps=timestamps, severities=severities,
+                         response_times=response_times, message_codes=message_codes,
+                         vocabulary=np.frombuffer(vocabulary, dtype=np.uint8),
+                         vocabulary_ends=vocabulary_ends, block_rows=np.int64(self.block_rows),
+                         **{f"block_{name}": stats[name] for name in BLOCK_STATS})
+            return
+        # Messages are stored as an Arrow dictionary array over the vocabulary
+        offsets = np.concatenate([np.zeros(1, dtype=np.int64), vocabulary_ends])
+        dictionary = pa.LargeBinaryArray.from_buffers(
+            pa.large_binary(), len(vocabulary_ends),
+            [None, pa.py_buffer(offsets), pa.py_buffer(vocabulary)]
+        )
+        table = pa.table({
+            'timestamp': pa.array(timestamps),
+            'severity': pa.array(severities),
+            'response_time': pa.array(response_times),
+            'message': pa.DictionaryArray.from_arrays(pa.array(message_codes), dictionary),
+        })
+        # One record batch per block, with the zone maps in the schema metadata
+        table = table.replace_schema_metadata({
+            'block_rows': str(self.block_rows),
+            'block_stats': json.dumps({name: stats[name].tolist() for name in BLOCK_STATS}),
+        })
+        feather.write_feather(table, str(entry), chunksize=self.block_rows)
+
+    @staticmethod
+    def _vocabulary(data, ends):
+        """Rebuild the message -> code dict from the joined vocabulary and its end offsets"""
+        vocabulary = {}
+        start = 0
+        for end in ends.tolist():
+            vocabulary[data[start:end]] = len(vocabulary)
+            start = end
+        return vocabulary
+
+    def _read(self, entry, blocks=None):
+        columns = LogColumns()
+        if pa is None:
+            with np.load(entry) as data:
+                rows = slice(None)
+                if blocks is not None:
+                    keep = blocks({name: data[f"block_{name}"] for name in BLOCK_STATS})
+                    rows = np.repeat(keep, int(data['block_rows']))[:len(data['timestamps'])]
+                columns.timestamps.frombytes(data['timestamps'][rows].tobytes())
+                columns.severities.frombytes(data['severities'][rows].tobytes())
+                columns.response_times.frombytes(data['response_times'][rows].tobytes())
+                columns.message_codes.frombytes(data['message_codes'][rows].tobytes())
+                columns.vocabulary = self._vocabulary(data['vocabulary'].tobytes(), data['vocabulary_ends'])
+            return columns
+        if blocks is None:
+            return self._from_table(feather.read_table(str(entry)), columns)
+        with pa.memory_map(str(entry)) as source:
+            reader = pa.ipc.open_file(source)
+            stats = json.loads(reader.schema.metadata[b'block_stats'])
+            keep = blocks({name: np.array(stats[name], dtype=np.float64 if 'response' in name else np.int64)
+                           for name in BLOCK_STATS})
+            # Every batch carries the same dictionary, so message codes stay valid
+            batches = [reader.get_batch(i) for i in np.flatnonzero(keep)]
+            if not batches:
+                return columns
+            return self._from_table(pa.Table.from_batches(batches, schema=reader.schema), columns)
+
+    def _from_table(self, table, columns):
+        """Fill `columns` from a table of cached rows"""
+        columns.timestamps = array('q', table['timestamp'].to_numpy().tobytes())
+        columns.severities = array('b', table['severity'].to_numpy().tobytes())
+        columns.response_times = array('f', table['response_time'].to_numpy().tobytes())
+        messages = table['message'].combine_chunks()
+        if len(messages) == 0:
+            return columns
+        columns.message_codes = array('i', messages.indices.to_numpy().astype(np.int32).tobytes())
+        dictionary = messages.dictionary
+        _, offsets, data = dictionary.buffers()
+        offsets = np.frombuffer(offsets, dtype=np.int64)[dictionary.offset:dictionary.offset + len(dictionary) + 1]
+        blob = memoryview(data)[offsets[0]:offsets[-1]].tobytes() if data is not None else b''
+        columns.vocabulary = self._vocabulary(blob, offsets[1:] - offsets[0])
+        return columns
@@ -0,0 +1,140 @@
+import os
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from config import Config
+
+RESPONSE_TIME_COLUMNS = ['response_time_sum', 'response_time_count', 'response_time_max']
+# Display resolutions tried in order by Rollup.series
+DISPLAY_FREQUENCIES = ['1min', '5min', '15min', '1h', '6h', '1D', '7D']
+
+class Rollup:
+    """Time-bucketed counts by severity and response-time aggregates.
+
+    ``frame`` has one row per bucket (a DatetimeIndex of bucket starts),
+    a count column per severity level and the sum, count and maximum of
+    the response times in the bucket. With one-minute buckets a month of
+    logs is at most 43,200 rows however many lines it had, so charts are
+    drawn from the rollup instead of the raw rows. Rollups of disjoint
+    rows merge by adding counts and sums.
+    """
+
+    def __init__(self, frame=None, bucket=None):
+        self.bucket = bucket or Config.ROLLUP_CONFIG['bucket']
+        if frame is None:
+            frame = pd.DataFrame(
+                {column: pd.Series(dtype='int64') for column in Config.SEVERITY_LEVELS},
+                index=pd.DatetimeIndex([], dtype='datetime64[ns]', name='bucket')
+            )
+            frame['response_time_sum'] = pd.Series(dtype='float64')
+            frame['response_time_count'] = pd.Series(dtype='int64')
+            frame['response_time_max'] = pd.Series(dtype='float64')
+        self.frame = frame
+
+    def __len__(self):
+        return len(self.frame)
+
+    @property
+    def empty(self):
+        return int(self.frame[Config.SEVERITY_LEVELS].to_numpy().sum()) == 0
+
+    @classmethod
+    def from_frame(cls, df, bucket=None):
+        """Build a rollup from a DataFrame of parsed rows in one vectorized pass"""
+        rollup = cls(bucket=bucket)
+        timestamps = df['timestamp'].to_numpy(dtype='datetime64[ns]')
+        valid = ~np.isnat(timestamps)
+        if not valid.any():
+            return rollup
+
+        step = pd.Timedelta(rollup.bucket).value
+        buckets, inverse = np.unique(timestamps[valid].view(np.int64) // step * step, return_inverse=True)
+        size = len(buckets)
+        codes = pd.Categorical(df['severity'], categories=Config.SEVERITY_LEVELS).codes[valid]
+        data = {
+            level: np.bincount(inverse[codes == code], minlength=size)
+            for code, level in enumerate(Config.SEVERITY_LEVELS)
+        }
+
+        response_times = df['response_time'].to_numpy(dtype=np.float64, na_value=np.nan)[valid]
+        has_time = ~np.isnan(response_times)
+        data['response_time_sum'] = np.bincount(inverse[has_time], weights=response_times[has_time],
+                                                minlength=size)
+        data['response_time_count'] = np.bincount(inverse[has_time], minlength=size)
+        maxima = np.full(size, -np.inf)
+        np.maximum.at(maxima, inverse[has_time], response_times[has_time])
+        data['response_time_max'] = np.where(np.isinf(maxima), np.nan, maxima)
+
+        index = pd.DatetimeIndex(buckets.view('datetime64[ns]'), name='bucket')
+        rollup.frame = pd.DataFrame(data, index=index)
+        return rollup
+
+    @staticmethod
+    def _combine(frame, grouper):
+        combined = frame.drop(columns='response_time_max').groupby(grouper).sum()
+        combined['response_time_max'] = frame['response_time_max'].groupby(grouper).max()
+        combined.index.name = 'bucket'
+        return combined
+
+    def merge(self, other):
+        """Fold another rollup with the same bucket size into this one"""
+        if len(other.frame):
+            frame = pd.concat([self.frame, other.frame]) if len(self.frame) else other.frame
+            self.frame = self._combine(frame, frame.index)
+        return self
+
+    def severity_totals(self):
+        """Total rows per severity level"""
+        return self.frame[Config.SEVERITY_LEVELS].sum()
+
+    def hourly_counts(self):
+        """Rows per hour of day (0-23) and severity level"""
+        counts = self.frame[Config.SEVERITY_LEVELS].groupby(self.frame.index.hour).sum()
+        counts.index.name = 'hour'
+        return counts
+
+    def display_frequency(self, max_points=None):
+        """Finest display resolution that keeps the time series under max_points"""
+        max_points = max_points or Config.ROLLUP_CONFIG['max_points']
+        if not len(self.frame):
+            return self.bucket
+        span = self.frame.index[-1] - self.frame.index[0]
+        minimum = pd.Timedelta(self.bucket)
+        for frequency in DISPLAY_FREQUENCIES:
+            step = pd.Timedelta(frequency)
+            if step >= minimum and span / step < max_points:
+                return frequency
+        return DISPLAY_FREQUENCIES[-1]
+
+    def series(self, max_points=None):
+        """Counts per severity and mean response time over time at display resolution.
+
+        Empty buckets inside the range are included with zero counts.
+        """
+        frequency = self.display_frequency(max_points)
+        frame = self.frame.resample(frequency)
+        counts = frame[Config.SEVERITY_LEVELS].sum()
+        sums = frame['response_time_sum'].sum()
+        numbers = frame['response_time_count'].sum()
+        counts['response_time_mean'] = sums / numbers.where(numbers > 0)
+        return counts
+
+    def save(self, path):
+        """Atomically write the rollup to an uncompressed .npz file"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + '.tmp')
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, bucket=np.array(self.bucket),
+                     index=self.frame.index.to_numpy(dtype='datetime64[ns]').view(np.int64),
+                     **{column: self.frame[column].to_numpy() for column in self.frame.columns})
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """Read a rollup written by save()"""
+        with np.load(path) as data:
+            index = pd.DatetimeIndex(data['index'].view('datetime64[ns]'), name='bucket')
+            columns = [*Config.SEVERITY_LEVELS, *RESPONSE_TIME_COLUMNS]
+            frame = pd.DataFrame({column: data[column] for column in columns}, index=index)
+            return cls(frame, str(data['bucket']))
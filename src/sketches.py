@@ -0,0 +1,424 @@
+import base64
+import hashlib
+import math
+import os
+import zlib
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from config import Config
+from log_parser import NAT_SECONDS
+
+class DDSketch:
+    """Mergeable quantile sketch with a relative-error guarantee (DDSketch).
+
+    Positive values are counted in logarithmic bins: value ``x`` goes to
+    bin ``ceil(log(x) / log(gamma))`` with ``gamma = (1 + a) / (1 - a)``
+    for a relative accuracy ``a``. Every quantile is then within ``a`` of
+    the exact value, relative to it (1% by default). Bins are
+    plain counts, so two sketches with the same accuracy merge exactly by
+    adding them. Memory grows with the log of the value range, not with
+    the number of values: response times from 1 ms to 1 hour fit in
+    about 750 bins. Beyond ``max_bins`` the lowest bins are collapsed,
+    which only affects the accuracy of the lowest quantiles.
+    """
+
+    def __init__(self, relative_accuracy=None, max_bins=None):
+        config = Config.SKETCH_CONFIG
+        self.relative_accuracy = relative_accuracy or config['relative_accuracy']
+        self.max_bins = max_bins or config['max_bins']
+        self.gamma = (1 + self.relative_accuracy) / (1 - self.relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.bins = np.zeros(0, dtype=np.int64)
+        self.offset = 0  # bin key of bins[0]
+        self.zero_count = 0  # values <= 0, which have no logarithm
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def __len__(self):
+        return self.count
+
+    def add(self, values):
+        """Add an array of values; NaN is ignored"""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return self
+        self.count += len(values)
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        positive = values[values > 0]
+        self.zero_count += len(values) - len(positive)
+        if len(positive):
+            keys = np.ceil(np.log(positive) / self._log_gamma).astype(np.int64)
+            low = int(keys.min())
+            self._add_bins(low, np.bincount(keys - low))
+        return self
+
+    def _add_bins(self, offset, counts):
+        """Add a run of bin counts starting at key `offset`"""
+        if not len(self.bins):
+            self.bins, self.offset = counts.astype(np.int64), offset
+        else:
+            low = min(self.offset, offset)
+            high = max(self.offset + len(self.bins), offset + len(counts))
+            bins = np.zeros(high - low, dtype=np.int64)
+            bins[self.offset - low:self.offset - low + len(self.bins)] += self.bins
+            bins[offset - low:offset - low + len(counts)] += counts
+            self.bins, self.offset = bins, low
+        if len(self.bins) > self.max_bins:
+            excess = len(self.bins) - self.max_bins
+            self.bins[excess] += self.bins[:excess].sum()
+            self.bins, self.offset = self.bins[excess:], self.offset + excess
+
+    def merge(self, other):
+        """Fold another sketch with the same accuracy into this one"""
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge sketches with different relative accuracy")
+        if not other.count:
+            return self
+        self.count += other.count
+        self.zero_count += other.zero_count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        if len(other.bins):
+            self._add_bins(other.offset, other.bins)
+        return self
+
+    def quantile(self, q):
+        """Estimated `q`-quantile (0 <= q <= 1); NaN for an empty sketch"""
+        if not self.count:
+            return math.nan
+        rank = q * (self.count - 1)
+        if rank < self.zero_count:
+            # Response times are never negative, so these are reported as 0
+            return min(max(0.0, self.min), self.max)
+        cumulative = np.cumsum(self.bins)
+        index = int(np.searchsorted(cumulative, rank - self.zero_count, side='right'))
+        index = min(index, len(self.bins) - 1)
+        value = 2 * self.gamma ** (self.offset + index) / (self.gamma + 1)
+        # The exact extremes are known, so estimates never leave their range
+        return min(max(value, self.min), self.max)
+
+    def _trimmed(self):
+        """(offset, bins) without leading and trailing empty bins"""
+        nonzero = np.flatnonzero(self.bins)
+        if not len(nonzero):
+            return self.offset, self.bins[:0]
+        return self.offset + int(nonzero[0]), self.bins[nonzero[0]:nonzero[-1] + 1]
+
+    def to_dict(self):
+        offset, bins = self._trimmed()
+        return {
+            'relative_accuracy': self.relative_accuracy,
+            'offset': offset,
+            'bins': bins.tolist(),
+            'zero_count': self.zero_count,
+            'count': self.count,
+            'min': self.min if self.count else None,
+            'max': self.max if self.count else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data['relative_accuracy'])
+        sketch.bins = np.array(data['bins'], dtype=np.int64)
+        sketch.offset = data['offset']
+        sketch.zero_count = data['zero_count']
+        sketch.count = data['count']
+        if sketch.count:
+            sketch.min, sketch.max = data['min'], data['max']
+        return sketch
+
+class HyperLogLog:
+    """Mergeable distinct-count sketch (HyperLogLog).
+
+    Values are hashed to 64 bits; the first ``precision`` bits pick one of
+    ``2**precision`` one-byte registers, which keeps the longest run of
+    leading zeros seen in the remaining bits. The standard error of the
+    estimate is ``1.04 / sqrt(2**precision)``, 1.6% at the default
+    precision of 12 (4 KB). Merging takes the register-wise maximum, which
+    gives exactly the sketch of the union. Hashes come from BLAKE2b, so
+    they agree across processes and restarts.
+    """
+
+    def __init__(self, precision=None):
+        self.precision = precision or Config.SKETCH_CONFIG['hll_precision']
+        self.registers = np.zeros(1 << self.precision, dtype=np.uint8)
+
+    @property
+    def relative_error(self):
+        return 1.04 / math.sqrt(len(self.registers))
+
+    @staticmethod
+    def hash_values(values):
+        """64-bit hashes of bytes or str values"""
+        return np.fromiter(
+            (int.from_bytes(hashlib.blake2b(value.encode('utf-8') if isinstance(value, str) else value,
+                                            digest_size=8).digest(), 'little')
+             for value in values),
+            dtype=np.uint64
+        )
+
+    def add(self, values):
+        """Add bytes or str values"""
+        return self.add_hashes(self.hash_values(values))
+
+    def add_hashes(self, hashes):
+        """Add values already hashed with hash_values"""
+        if not len(hashes):
+            return self
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        width = 64 - self.precision
+        index = (hashes >> np.uint64(width)).astype(np.intp)
+        rest = hashes & np.uint64((1 << width) - 1)
+        # frexp gives the bit length, exactly while `rest` fits a float's
+        # 53-bit mantissa (precision >= 11)
+        _, bit_length = np.frexp(rest.astype(np.float64))
+        rank = np.where(rest == 0, width + 1, width + 1 - bit_length).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+        return self
+
+    def merge(self, other):
+        """Fold another sketch with the same precision into this one"""
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge HyperLogLog sketches with different precision")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def estimate(self):
+        """Estimated number of distinct values added"""
+        m = len(self.registers)
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if zeros == m:
+            return 0
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / float(np.ldexp(1.0, -self.registers.astype(np.int32)).sum())
+        if raw <= 2.5 * m and zeros:
+            # Linear counting is more accurate for small cardinalities
+            return int(round(m * math.log(m / zeros)))
+        return int(round(raw))
+
+    def to_dict(self):
+        return {
+            'precision': self.precision,
+            'registers': base64.b64encode(zlib.compress(self.registers.tobytes())).decode('ascii'),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data['precision'])
+        registers = zlib.decompress(base64.b64decode(data['registers']))
+        sketch.registers = np.frombuffer(registers, dtype=np.uint8).copy()
+        return sketch
+
+class TimeSketches:
+    """Response-time and distinct-message sketches per time bucket.
+
+    Each bucket (one hour by default) holds a DDSketch of response times
+    and a HyperLogLog of message bodies, so percentiles and distinct
+    counts can be answered for any range of buckets by merging them.
+    Rows without a timestamp have a bucket of their own. Once there are
+    more than ``max_buckets`` timed buckets the oldest are folded into
+    ``expired``, which still counts towards the overall summary.
+    """
+
+    def __init__(self, bucket=None, max_buckets=None):
+        config = Config.SKETCH_CONFIG
+        self.bucket = bucket or config['bucket']
+        self.max_buckets = max_buckets or config['max_buckets']
+        self._step = int(pd.Timedelta(self.bucket).total_seconds())
+        self.buckets = {}  # bucket start in epoch seconds (None if untimed) -> (DDSketch, HyperLogLog)
+        self.expired = (DDSketch(), HyperLogLog())
+
+    def _sketches(self, key):
+        sketches = self.buckets.get(key)
+        if sketches is None:
+            sketches = self.buckets[key] = (DDSketch(), HyperLogLog())
+        return sketches
+
+    def update(self, seconds, response_times, message_codes=None, message_hashes=None):
+        """Fold rows given as arrays: epoch seconds (NAT_SECONDS if untimed),
+        response times and optionally message codes with the hash of each code.
+        """
+        seconds = np.asarray(seconds, dtype=np.int64)
+        if not len(seconds):
+            return
+        timed = seconds != NAT_SECONDS
+        keys = np.where(timed, seconds // self._step * self._step, NAT_SECONDS)
+        # Logs are mostly in time order, which the stable sort handles in close to linear time
+        order = np.argsort(keys, kind='stable')
+        keys = keys[order]
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+        ends = np.r_[starts[1:], len(keys)]
+        response_times = np.asarray(response_times)[order]
+        if message_codes is not None:
+            message_codes = np.asarray(message_codes)[order]
+
+        for start, end in zip(starts, ends):
+            key = int(keys[start])
+            response_sketch, message_sketch = self._sketches(None if key == NAT_SECONDS else key)
+            response_sketch.add(response_times[start:end])
+            if message_codes is not None:
+                codes = message_codes[start:end]
+                codes = codes[codes >= 0]
+                # Each distinct message of the bucket is hashed into the sketch once
+                if len(message_hashes) <= len(codes):
+                    present = np.flatnonzero(np.bincount(codes, minlength=len(message_hashes)))
+                else:
+                    present = np.unique(codes)
+                message_sketch.add_hashes(message_hashes[present])
+        self._expire()
+
+    def update_frame(self, df):
+        """Fold a DataFrame of parsed rows"""
+        timestamps = df['timestamp'].to_numpy(dtype='datetime64[s]')
+        seconds = np.where(np.isnat(timestamps), NAT_SECONDS, timestamps.view(np.int64))
+        codes = hashes = None
+        if 'message' in df:
+            messages = df['message']
+            if isinstance(messages.dtype, pd.CategoricalDtype):
+                codes, categories = messages.cat.codes.to_numpy(), messages.cat.categories
+            else:
+                codes, categories = pd.factorize(messages)
+            hashes = HyperLogLog.hash_values(categories)
+        response_times = df['response_time'].to_numpy(dtype=np.float64, na_value=np.nan)
+        self.update(seconds, response_times, codes, hashes)
+
+    def update_columns(self, columns, mask=None):
+        """Fold a LogColumns batch, optionally only the rows selected by `mask`"""
+        seconds = np.frombuffer(columns.timestamps, dtype=np.int64)
+        response_times = np.frombuffer(columns.response_times, dtype=np.float32)
+        codes = hashes = None
+        if columns.keep_messages:
+            codes = np.frombuffer(columns.message_codes, dtype=np.int32)
+            hashes = HyperLogLog.hash_values(columns.vocabulary)
+        if mask is not None:
+            seconds, response_times = seconds[mask], response_times[mask]
+            if codes is not None:
+                codes = codes[mask]
+        self.update(seconds, response_times, codes, hashes)
+
+    def _expire(self):
+        timed = sorted(key for key in self.buckets if key is not None)
+        for key in timed[:max(len(timed) - self.max_buckets, 0)]:
+            response_sketch, message_sketch = self.buckets.pop(key)
+            self.expired[0].merge(response_sketch)
+            self.expired[1].merge(message_sketch)
+
+    def merge(self, other):
+        """Fold another TimeSketches with the same bucket size into this one"""
+        for key, (response_sketch, message_sketch) in other.buckets.items():
+            sketches = self._sketches(key)
+            sketches[0].merge(response_sketch)
+            sketches[1].merge(message_sketch)
+        self.expired[0].merge(other.expired[0])
+        self.expired[1].merge(other.expired[1])
+        self._expire()
+        return self
+
+    def combined(self, since=None, until=None):
+        """One (DDSketch, HyperLogLog) pair over all buckets.
+
+        With `since`/`until` (epoch seconds) only the timed buckets that
+        overlap [since, until) are merged, so the range is widened to whole
+        buckets.
+        """
+        response_sketch, message_sketch = DDSketch(), HyperLogLog()
+        ranged = since is not None or until is not None
+        if not ranged:
+            response_sketch.merge(self.expired[0])
+            message_sketch.merge(self.expired[1])
+        for key, (bucket_response, bucket_messages) in self.buckets.items():
+            if ranged and (key is None
+                           or (since is not None and key + self._step <= since)
+                           or (until is not None and key >= until)):
+                continue
+            response_sketch.merge(bucket_response)
+            message_sketch.merge(bucket_messages)
+        return response_sketch, message_sketch
+
+    def summary(self, since=None, until=None):
+        """Percentile and distinct-message entries for a summary dict"""
+        response_sketch, message_sketch = self.combined(since, until)
+        summary = {
+            f"p{quantile * 100:g}_response_time": response_sketch.quantile(quantile)
+            for quantile in Config.SKETCH_CONFIG['quantiles']
+        }
+        summary['distinct_messages'] = message_sketch.estimate()
+        return summary
+
+    def to_dict(self):
+        return {
+            'bucket': self.bucket,
+            'buckets': [[key, response_sketch.to_dict(), message_sketch.to_dict()]
+                        for key, (response_sketch, message_sketch) in self.buckets.items()],
+            'expired': [self.expired[0].to_dict(), self.expired[1].to_dict()],
+        }
+
+    def save(self, path):
+        """Atomically write the sketches to an uncompressed .npz file.
+
+        Much smaller and faster than to_dict as JSON, for state that is
+        saved often.
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        pairs = [*self.buckets.values(), self.expired]
+        response_sketches = [response_sketch for response_sketch, _ in pairs]
+        trimmed = [response_sketch._trimmed() for response_sketch in response_sketches]
+        tmp_path = path.with_name(path.name + '.tmp')
+        with open(tmp_path, 'wb') as f:
+            np.savez(
+                f, bucket=np.array(self.bucket),
+                keys=np.array([NAT_SECONDS if key is None else key for key in self.buckets], dtype=np.int64),
+                relative_accuracy=np.array([sketch.relative_accuracy for sketch in response_sketches]),
+                offsets=np.array([offset for offset, _ in trimmed], dtype=np.int64),
+                bin_ends=np.cumsum([len(bins) for _, bins in trimmed], dtype=np.int64),
+                bins=np.concatenate([np.zeros(0, dtype=np.int64)] + [bins for _, bins in trimmed]),
+                zero_counts=np.array([sketch.zero_count for sketch in response_sketches], dtype=np.int64),
+                counts=np.array([sketch.count for sketch in response_sketches], dtype=np.int64),
+                extremes=np.array([[sketch.min, sketch.max] if sketch.count else [math.nan, math.nan]
+                                   for sketch in response_sketches], dtype=np.float64),
+                precisions=np.array([message_sketch.precision for _, message_sketch in pairs], dtype=np.int64),
+                registers=np.concatenate([message_sketch.registers for _, message_sketch in pairs]),
+            )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path, max_buckets=None):
+        """Read sketches written by save()"""
+        with np.load(path) as npz:
+            # Each item access reads the array from the archive again
+            data = {name: npz[name] for name in npz.files}
+        sketches = cls(str(data['bucket']), max_buckets)
+        keys = [None if key == NAT_SECONDS else key for key in data['keys'].tolist()]
+        bin_ends = data['bin_ends'].tolist()
+        register_ends = np.cumsum(np.left_shift(1, data['precisions'])).tolist()
+        pairs = []
+        for i, (start, end) in enumerate(zip([0] + bin_ends[:-1], bin_ends)):
+            response_sketch = DDSketch(float(data['relative_accuracy'][i]))
+            response_sketch.bins = data['bins'][start:end].copy()
+            response_sketch.offset = int(data['offsets'][i])
+            response_sketch.zero_count = int(data['zero_counts'][i])
+            response_sketch.count = int(data['counts'][i])
+            if response_sketch.count:
+                response_sketch.min, response_sketch.max = data['extremes'][i].tolist()
+            message_sketch = HyperLogLog(int(data['precisions'][i]))
+            register_start = register_ends[i] - (1 << message_sketch.precision)
+            message_sketch.registers = data['registers'][register_start:register_ends[i]].copy()
+            pairs.append((response_sketch, message_sketch))
+        sketches.buckets = dict(zip(keys, pairs[:-1]))
+        sketches.expired = pairs[-1]
+        return sketches
+
+    @classmethod
+    def from_dict(cls, data, max_buckets=None):
+        sketches = cls(data['bucket'], max_buckets)
+        for key, response_sketch, message_sketch in data['buckets']:
+            sketches.buckets[key] = (DDSketch.from_dict(response_sketch),
+                                     HyperLogLog.from_dict(message_sketch))
+        sketches.expired = (DDSketch.from_dict(data['expired'][0]),
+                            HyperLogLog.from_dict(data['expired'][1]))
+        return sketches
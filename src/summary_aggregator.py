@@ -0,0 +1,190 @@
+import math
+import numpy as np
+import pandas as pd
+from config import Config
+from log_parser import NAT_SECONDS
+from sketches import HyperLogLog, TimeSketches
+
+class SummaryAggregator:
+    """Running, mergeable state behind LogAnalyzer.generate_summary.
+
+    Holds per-severity counts, response-time sum/count/max, the time
+    range and per-bucket response-time and message sketches (TimeSketches),
+    so summaries can be kept up to date from successive batches of rows
+    without keeping the rows themselves. Percentiles are within
+    ``SKETCH_CONFIG['relative_accuracy']`` of the exact values and the
+    distinct message count is an estimate; both merge exactly.
+    With ``sketches=False`` they are not kept, and the summary has no
+    percentile or distinct-message entries.
+    """
+
+    def __init__(self, sketches=True):
+        self.total = 0
+        self.counts = {level: 0 for level in Config.SEVERITY_LEVELS}
+        self.response_time_sum = 0.0
+        self.response_time_count = 0
+        self.response_time_max = None
+        self.start_time = None
+        self.end_time = None
+        self.sketches = TimeSketches() if sketches else None
+
+    def update_frame(self, df):
+        """Fold a DataFrame of parsed rows into the running totals"""
+        if df.empty:
+            return
+        self.total += len(df)
+
+        counts = df['severity'].value_counts()
+        for level in self.counts:
+            self.counts[level] += int(counts.get(level, 0))
+
+        response_times = df['response_time'].dropna().to_numpy(dtype='float64')
+        if len(response_times):
+            self.response_time_sum += float(response_times.sum())
+            self.response_time_count += len(response_times)
+            self._update_max(float(response_times.max()))
+
+        timestamps = df['timestamp'].dropna()
+        if not timestamps.empty:
+            self._update_time_range(timestamps.min(), timestamps.max())
+        if self.sketches is not None:
+            self.sketches.update_frame(df)
+
+    def update(self, fields):
+        """Fold a single row, as returned by LogParser.parse_fields"""
+        seconds, severity_code, response_time = fields[0], fields[1], fields[2]
+        self.total += 1
+        self.counts[Config.SEVERITY_LEVELS[severity_code]] += 1
+        if response_time == response_time:  # not NaN
+            self.response_time_sum += response_time
+            self.response_time_count += 1
+            self._update_max(response_time)
+        if seconds != NAT_SECONDS:
+            timestamp = pd.Timestamp(seconds, unit='s')
+            self._update_time_range(timestamp, timestamp)
+        if self.sketches is not None:
+            self.sketches.update([seconds], [response_time], [0], HyperLogLog.hash_values([fields[3]]))
+
+    def update_columns(self, columns, since=None, until=None):
+        """Fold a LogColumns batch using vectorized numpy reductions.
+
+        `since`/`until` are optional epoch-second bounds (inclusive start,
+        exclusive end); when either is given, rows without a timestamp are
+        dropped, matching a DataFrame filter on the timestamp column.
+        """
+        if not len(columns):
+            return
+        timestamps = np.frombuffer(columns.timestamps, dtype=np.int64)
+        codes = np.frombuffer(columns.severities, dtype=np.int8)
+        response_times = np.frombuffer(columns.response_times, dtype=np.float32)
+
+        mask = None
+        if since is not None or until is not None:
+            mask = timestamps != NAT_SECONDS
+            if since is not None:
+                mask &= timestamps >= since
+            if until is not None:
+                mask &= timestamps < until
+            timestamps, codes, response_times = timestamps[mask], codes[mask], response_times[mask]
+            if not len(timestamps):
+                return
+        if self.sketches is not None:
+            self.sketches.update_columns(columns, mask)
+
+        self.total += len(codes)
+        counts = np.bincount(codes, minlength=len(Config.SEVERITY_LEVELS))
+        for level, count in zip(Config.SEVERITY_LEVELS, counts):
+            self.counts[level] += int(count)
+
+        response_times = response_times[~np.isnan(response_times)].astype(np.float64)
+        if len(response_times):
+            self.response_time_sum += float(response_times.sum())
+            self.response_time_count += len(response_times)
+            self._update_max(float(response_times.max()))
+
+        timestamps = timestamps[timestamps != NAT_SECONDS]
+        if len(timestamps):
+            self._update_time_range(
+                pd.Timestamp(int(timestamps.min()), unit='s'),
+                pd.Timestamp(int(timestamps.max()), unit='s')
+            )
+
+    def merge(self, other):
+        """Combine another aggregator's state into this one"""
+        self.total += other.total
+        for level, count in other.counts.items():
+            self.counts[level] = self.counts.get(level, 0) + count
+        self.response_time_sum += other.response_time_sum
+        self.response_time_count += other.response_time_count
+        if other.response_time_max is not None:
+            self._update_max(other.response_time_max)
+        if other.start_time is not None:
+            self._update_time_range(other.start_time, other.end_time)
+        if self.sketches is not None and other.sketches is not None:
+            self.sketches.merge(other.sketches)
+        return self
+
+    def _update_max(self, value):
+        if self.response_time_max is None or value > self.response_time_max:
+            self.response_time_max = value
+
+    def _update_time_range(self, start, end):
+        if self.start_time is None or start < self.start_time:
+            self.start_time = pd.Timestamp(start)
+        if self.end_time is None or end > self.end_time:
+            self.end_time = pd.Timestamp(end)
+
+    def to_summary(self):
+        """Return a summary dict with the same keys as generate_summary"""
+        return {
+            'total_logs': self.total,
+            'error_count': self.counts['ERROR'],
+            'warning_count': self.counts['WARNING'],
+            'info_count': self.counts['INFO'],
+            'avg_response_time': (
+                self.response_time_sum / self.response_time_count
+                if self.response_time_count else math.nan
+            ),
+            'max_response_time': (
+                self.response_time_max if self.response_time_max is not None else math.nan
+            ),
+            'start_time': self.start_time,
+            'end_time': self.end_time,
+            **(self.sketches.summary() if self.sketches is not None else {})
+        }
+
+    def to_dict(self, include_sketches=True):
+        """Serialize the state to JSON-compatible values.
+
+        Without `include_sketches` the sketches are left out, for callers
+        that persist them with TimeSketches.save.
+        """
+        data = {
+            'total': self.total,
+            'counts': dict(self.counts),
+            'response_time_sum': self.response_time_sum,
+            'response_time_count': self.response_time_count,
+            'response_time_max': self.response_time_max,
+            'start_time': self.start_time.isoformat() if self.start_time is not None else None,
+            'end_time': self.end_time.isoformat() if self.end_time is not None else None,
+        }
+        if include_sketches and self.sketches is not None:
+            data['sketches'] = self.sketches.to_dict()
+        return data
+
+    @classmethod
+    def from_dict(cls, data, sketches=True):
+        """Rebuild an aggregator from the output of to_dict"""
+        aggregator = cls(sketches)
+        aggregator.total = data.get('total', 0)
+        aggregator.counts.update(data.get('counts', {}))
+        aggregator.response_time_sum = data.get('response_time_sum', 0.0)
+        aggregator.response_time_count = data.get('response_time_count', 0)
+        aggregator.response_time_max = data.get('response_time_max')
+        if data.get('start_time'):
+            aggregator.start_time = pd.Timestamp(data['start_time'])
+        if data.get('end_time'):
+            aggregator.end_time = pd.Timestamp(data['end_time'])
+        if sketches and data.get('sketches'):
+            aggregator.sketches = TimeSketches.from_dict(data['sketches'])
+        return aggregator
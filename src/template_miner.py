@@ -0,0 +1,213 @@
+import re
+import numpy as np
+import pandas as pd
+from config import Config
+
+WILDCARD = '<*>'
+# Numbers (including dotted ones such as IPs and versions) and hex values
+# become parameters before lines are compared
+MASK_RE = re.compile(r'0x[0-9a-fA-F]+|\d+(?:\.\d+)*')
+# The timestamp and level at the start of a line are not part of the message
+PREFIX_RE = re.compile(
+    r'^\s*(?:' + Config.LOG_PATTERNS['timestamp'] + r')?\s*'
+    r'(?:\[?(?:INFO|WARN(?:ING)?|ERROR|CRITICAL|FATAL|DEBUG)\]?:?\s+)?'
+)
+
+class TemplateMiner:
+    """Online log template mining with a Drain-style fixed-depth prefix tree.
+
+    A message is stripped of its timestamp and level, numbers are masked
+    and the tokens are routed through the tree by token count and then by
+    their first ``depth - 2`` tokens. Among the clusters in the leaf the
+    most similar template is taken if at least ``similarity`` of its
+    tokens are equal; positions that differ become ``<*>``. Otherwise the
+    message starts a new cluster. Each message costs one descent of a
+    bounded tree, and messages that are equal once masked are answered
+    from a cache.
+
+    Every cluster counts its messages per severity code, so the miner
+    doubles as a mergeable aggregate: ``top_templates`` reports the most
+    frequent templates of each severity and ``to_dict``/``from_dict``
+    persist it, with the branch each template was filed under so the tree
+    is rebuilt exactly.
+    """
+
+    def __init__(self, depth=None, similarity=None, max_children=None, cache_size=100000):
+        config = Config.TEMPLATE_CONFIG
+        self.depth = max(depth or config['depth'], 3)
+        self.similarity = config['similarity'] if similarity is None else similarity
+        self.max_children = max_children or config['max_children']
+        self.cache_size = cache_size
+        self.templates = []  # token lists, indexed by template ID
+        self.counts = []  # messages per severity code, indexed by template ID
+        self.paths = []  # branch tokens leading to each template's leaf, indexed by template ID
+        self.root = {}
+        self._cache = {}
+
+    def __len__(self):
+        return len(self.templates)
+
+    @staticmethod
+    def content(message):
+        """A message without its timestamp and level"""
+        if isinstance(message, bytes):
+            message = message.decode('utf-8', 'replace')
+        return PREFIX_RE.sub('', message, count=1)
+
+    def masked(self, message):
+        """The content of a message with its numbers replaced by <*>"""
+        return MASK_RE.sub(WILDCARD, self.content(message))
+
+    def _leaf(self, tokens, create, path=None):
+        """The clusters of the leaf `tokens` route to; the branch tokens taken are added to `path`"""
+        node = self.root.get(len(tokens))
+        if node is None:
+            if not create:
+                return None
+            node = self.root[len(tokens)] = {}
+        for token in tokens[:self.depth - 2]:
+            if token not in node:
+                if not create:
+                    token = WILDCARD
+                    if token not in node:
+                        return None
+                # Tokens holding parameters, and any beyond max_children, share a wildcard branch
+                elif WILDCARD in token or len(node) >= self.max_children - 1:
+                    token = WILDCARD
+            node = node.setdefault(token, {})
+            if path is not None:
+                path.append(token)
+        # Keyed by None, which can't clash with a token
+        return node.setdefault(None, []) if create else node.get(None)
+
+    def _best_match(self, clusters, tokens):
+        best, best_score = None, None
+        for template_id in clusters:
+            template = self.templates[template_id]
+            equal = wildcards = 0
+            for template_token, token in zip(template, tokens):
+                if template_token == WILDCARD:
+                    wildcards += 1
+                elif template_token == token:
+                    equal += 1
+            score = (equal / len(tokens) if tokens else 1.0, wildcards)
+            if best_score is None or score > best_score:
+                best, best_score = template_id, score
+        if best is not None and best_score[0] >= self.similarity:
+            return best
+        return None
+
+    def _assign(self, message):
+        """Route `message` to a template, learning from it, without counting it"""
+        masked = self.masked(message)
+        template_id = self._cache.get(masked)
+        if template_id is None:
+            tokens = masked.split()
+            path = []
+            clusters = self._leaf(tokens, create=True, path=path)
+            template_id = self._best_match(clusters, tokens)
+            if template_id is None:
+                template_id = len(self.templates)
+                self.templates.append(tokens)
+                self.paths.append(path)
+                self.counts.append([0] * len(Config.SEVERITY_LEVELS))
+                clusters.append(template_id)
+            else:
+                template = self.templates[template_id]
+                for position, token in enumerate(tokens):
+                    if template[position] != token:
+                        template[position] = WILDCARD
+            if len(self._cache) >= self.cache_size:
+                self._cache.clear()
+            self._cache[masked] = template_id
+        return template_id
+
+    def add(self, message, severity_code=0):
+        """Assign `message` to a template; returns the template ID"""
+        template_id = self._assign(message)
+        self.counts[template_id][severity_code] += 1
+        return template_id
+
+    def match(self, message):
+        """The template ID `message` belongs to, without learning from it; None if unknown"""
+        tokens = self.masked(message).split()
+        clusters = self._leaf(tokens, create=False)
+        if not clusters:
+            return None
+        return self._best_match(clusters, tokens)
+
+    def add_frame(self, df):
+        """Mine the 'message' column of an analysis DataFrame; returns int32 template IDs"""
+        codes = df['severity'].cat.codes.to_numpy()
+        messages = df['message']
+        if not isinstance(messages.dtype, pd.CategoricalDtype):
+            add = self.add
+            return np.fromiter((add(message, code) for message, code in zip(messages, codes)),
+                               dtype=np.int32, count=len(df))
+
+        # Each distinct message is mined once, in order of first appearance,
+        # and the counts are added per (template, severity) in one bincount
+        message_codes = messages.cat.codes.to_numpy()
+        categories = messages.cat.categories
+        category_ids = np.zeros(len(categories), dtype=np.int32)
+        for code in pd.unique(message_codes):
+            category_ids[code] = self._assign(categories[code])
+        template_ids = category_ids[message_codes]
+        n_severities = len(Config.SEVERITY_LEVELS)
+        counts = np.bincount(template_ids.astype(np.int64) * n_severities + codes,
+                             minlength=len(self) * n_severities).reshape(-1, n_severities)
+        for template_id, code in zip(*np.nonzero(counts)):
+            self.counts[template_id][code] += int(counts[template_id, code])
+        return template_ids
+
+    def template(self, template_id):
+        return ' '.join(self.templates[template_id])
+
+    def parameters(self, message, template_id):
+        """The tokens of `message` at the wildcard positions of its template"""
+        tokens = self.content(message).split()
+        template = self.templates[template_id]
+        if len(tokens) != len(template):
+            return []
+        return [token for token, template_token in zip(tokens, template) if template_token == WILDCARD]
+
+    def top_templates(self, n=None):
+        """The `n` most frequent templates per severity, as JSON-ready dicts"""
+        n = n or Config.TEMPLATE_CONFIG['top_n']
+        counts = np.array(self.counts, dtype=np.int64).reshape(-1, len(Config.SEVERITY_LEVELS))
+        top = {}
+        for code, severity in enumerate(Config.SEVERITY_LEVELS):
+            order = np.argsort(-counts[:, code], kind='stable')[:n]
+            top[severity] = [
+                {'template_id': int(template_id), 'template': self.template(template_id),
+                 'count': int(counts[template_id, code])}
+                for template_id in order if counts[template_id, code] > 0
+            ]
+        return top
+
+    def to_dict(self):
+        return {'templates': [self.template(i) for i in range(len(self))], 'counts': self.counts,
+                'paths': self.paths}
+
+    @classmethod
+    def from_dict(cls, data, **kwargs):
+        """Rebuild a miner from to_dict(); template IDs and the prefix tree are preserved"""
+        miner = cls(**kwargs)
+        templates = data.get('templates', [])
+        # Older state has no paths; its templates are routed by their own tokens
+        paths = data.get('paths') or [None] * len(templates)
+        for template, counts, path in zip(templates, data.get('counts', []), paths):
+            tokens = template.split()
+            if path is None:
+                path = []
+                clusters = miner._leaf(tokens, create=True, path=path)
+            else:
+                node = miner.root.setdefault(len(tokens), {})
+                for token in path:
+                    node = node.setdefault(token, {})
+                clusters = node.setdefault(None, [])
+            clusters.append(len(miner.templates))
+            miner.templates.append(tokens)
+            miner.counts.append(list(counts))
+            miner.paths.append(list(path))
+        return miner
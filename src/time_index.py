@@ -0,0 +1,150 @@
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
+from config import Config
+from log_reader import iter_mapped_blocks
+
+class TimeIndex:
+    """Sidecar index of the timestamp range covered by each block of a log file.
+
+    For every block of about ``block_size`` bytes the index records its byte
+    offsets and the smallest and largest timestamp found in it, so a time
+    range query only reads the blocks that can contain matching rows and
+    skips files entirely when none do.
+
+    Timestamps are kept as 'YYYY-MM-DD HH:MM:SS' strings, which sort in
+    time order. Every timestamp match in a line is included, not just the
+    one the parser uses, so the recorded range can only be wider than the
+    real one and skipping a block never drops a row. Indexes are extended in
+    place when a file is appended to and rebuilt when it is replaced.
+    """
+
+    def __init__(self, index_dir=None, block_size=None, log_patterns=None, logger=None):
+        self.index_dir = Path(index_dir or Config.INDEX_CONFIG['index_dir'])
+        self.block_size = block_size or Config.INDEX_CONFIG['block_size']
+        self.logger = logger
+        # Matches must not run across a newline, otherwise one could hide
+        # the timestamp at the start of the next line
+        pattern = (log_patterns or Config.LOG_PATTERNS)['timestamp'].replace(r'\s', r'[^\S\n]')
+        self.timestamp_re = re.compile(pattern)
+        self.timestamp_bytes_re = re.compile(pattern.encode())
+        self.hash_bytes = 4096
+
+    def _log(self, level, message):
+        if self.logger:
+            getattr(self.logger, level)(message)
+
+    def index_path(self, path):
+        name = hashlib.blake2b(str(Path(path).resolve()).encode(), digest_size=8).hexdigest()
+        return self.index_dir / f"{name}.json"
+
+    def _head_hash(self, path, length):
+        with open(path, 'rb') as f:
+            return hashlib.blake2b(f.read(min(length, self.hash_bytes)), digest_size=8).hexdigest()
+
+    def block_range(self, block):
+        """Return the (min, max) timestamp strings in a block, or (None, None)"""
+        if block.isascii():
+            keys = {m[:10] + b' ' + m[11:] for m in self.timestamp_bytes_re.findall(block)}
+            keys = {key.decode('ascii') for key in keys} if keys else keys
+        else:
+            # Digits and spaces beyond ASCII also count for the text parser
+            keys = {
+                f"{int(m[0:4]):04d}-{int(m[5:7]):02d}-{int(m[8:10]):02d} "
+                f"{int(m[11:13]):02d}:{int(m[14:16]):02d}:{int(m[17:19]):02d}"
+                for m in self.timestamp_re.findall(block.decode('utf-8', 'replace'))
+            }
+        if not keys:
+            return None, None
+        return min(keys), max(keys)
+
+    def load(self, path):
+        index_file = self.index_path(path)
+        if not index_file.exists():
+            return None
+        try:
+            with open(index_file, 'r') as f:
+                return json.load(f)
+        except Exception as e:
+            self._log('error', f"Error loading time index {index_file}: {e}")
+            return None
+
+    def save(self, index):
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        index_file = self.index_path(index['path'])
+        tmp_file = index_file.with_suffix('.json.tmp')
+        with open(tmp_file, 'w') as f:
+            json.dump(index, f)
+        os.replace(tmp_file, index_file)
+
+    def get(self, path):
+        """Return the up-to-date index of `path`, building or extending it as needed"""
+        path = Path(path)
+        stat = path.stat()
+        index = self.load(path)
+        if index and index['size'] == stat.st_size and index['mtime_ns'] == stat.st_mtime_ns \
+                and index['inode'] == stat.st_ino:
+            return index
+
+        blocks, start = [], 0
+        if index and index['inode'] == stat.st_ino and stat.st_size >= index['indexed_end'] \
+                and index['head_hash'] == self._head_hash(path, index['indexed_end']):
+            # Appended to: keep the full blocks and re-read a short last block
+            blocks = index['blocks']
+            if blocks and blocks[-1][1] - blocks[-1][0] < self.block_size:
+                blocks.pop()
+            start = blocks[-1][1] if blocks else 0
+
+        for block in iter_mapped_blocks(path, start, stat.st_size, self.block_size,
+                                        include_partial=False):
+            end = start + len(block)
+            blocks.append([start, end, *self.block_range(block)])
+            start = end
+
+        index = {
+            'path': str(path.resolve()),
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'inode': stat.st_ino,
+            'indexed_end': start,
+            'head_hash': self._head_hash(path, start),
+            'blocks': blocks,
+        }
+        try:
+            self.save(index)
+        except OSError as e:
+            self._log('error', f"Error saving time index for {path}: {e}")
+        return index
+
+    def spans(self, path, since=None, until=None):
+        """Byte spans of `path` that may hold rows with since <= timestamp < until.
+
+        `since` and `until` are datetimes; either may be None. An unterminated
+        last line is not indexed and always included.
+        """
+        try:
+            index = self.get(path)
+        except Exception as e:
+            self._log('error', f"Error indexing {path}, reading it in full: {e}")
+            return [(0, Path(path).stat().st_size)]
+        since_key = since.strftime('%Y-%m-%d %H:%M:%S') if since else None
+        until_key = until.strftime('%Y-%m-%d %H:%M:%S') if until else None
+
+        spans = []
+        for start, end, low, high in index['blocks']:
+            if low is None:
+                continue
+            if (since_key and high < since_key) or (until_key and low >= until_key):
+                continue
+            if spans and spans[-1][1] == start:
+                spans[-1] = (spans[-1][0], end)
+            else:
+                spans.append((start, end))
+        if index['indexed_end'] < index['size']:
+            if spans and spans[-1][1] == index['indexed_end']:
+                spans[-1] = (spans[-1][0], index['size'])
+            else:
+                spans.append((index['indexed_end'], index['size']))
+        return spans
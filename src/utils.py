@@ -1,6 +1,5 @@
 import os
 import shutil
-import psutil
 from pathlib import Path
 from datetime import datetime
 import logging
@@ -47,6 +46,8 @@ def get_disk_usage(path):
 def get_system_metrics():
     """Get current system metrics"""
     try:
+        # Only needed here; keeps psutil out of every other import of utils
+        import psutil
         return {
             'cpu_percent': psutil.cpu_percent(interval=1),
             'memory_percent': psutil.virtual_memory().percent,
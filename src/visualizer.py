@@ -1,121 +1,260 @@
-import matplotlib.pyplot as plt
-import pandas as pd
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import ExitStack
 from pathlib import Path
+import matplotlib
+# Headless rendering; must be selected before pyplot is imported (seaborn does)
+matplotlib.use('Agg')
+from cycler import cycler
+from matplotlib import style as mpl_style
+from matplotlib.figure import Figure
+import pandas as pd
 import seaborn as sns
 from config import Config
+from rollups import Rollup
 from utils import setup_rotating_logger, get_timestamp_str
 
+CHARTS = ['severity_distribution', 'time_series', 'hourly_distribution']
+
+def _draw_severity_distribution(fig, severity_counts):
+    ax = fig.subplots()
+    ax.pie(severity_counts, labels=severity_counts.index, autopct='%1.1f%%')
+    ax.set_title('Distribution of Log Severity Levels')
+
+def _draw_time_series(fig, series):
+    ax1 = fig.subplots()
+    series[Config.SEVERITY_LEVELS].plot(kind='line', ax=ax1)
+    ax1.set_xlabel('Time')
+    ax1.set_ylabel('Number of Logs')
+
+    # Plot response times on secondary y-axis if available
+    if series['response_time_mean'].notna().any():
+        ax2 = ax1.twinx()
+        series['response_time_mean'].plot(
+            color='red', linestyle='--', ax=ax2, label='Avg Response Time'
+        )
+        ax2.set_ylabel('Response Time (ms)')
+    ax1.set_title('Log Events and Response Times Over Time')
+
+def _draw_hourly_distribution(fig, hourly_severity):
+    ax = fig.subplots()
+    sns.heatmap(hourly_severity, cmap='YlOrRd', annot=True, fmt='d', ax=ax)
+    ax.set_title('Hourly Distribution of Log Events by Severity')
+    ax.set_xlabel('Severity Level')
+    ax.set_ylabel('Hour of Day')
+
+_DRAW = {
+    'severity_distribution': _draw_severity_distribution,
+    'time_series': _draw_time_series,
+    'hourly_distribution': _draw_hourly_distribution,
+}
+
+def render_chart(name, data, path, options):
+    """Draw chart `name` from its prepared data and save it as a PNG at `path`.
+
+    Uses a standalone Figure rather than pyplot, so no global figure state
+    is touched and charts can be drawn in worker processes.
+    """
+    with ExitStack() as stack:
+        if options['style']:
+            stack.enter_context(mpl_style.context(options['style']))
+        if options['palette']:
+            stack.enter_context(matplotlib.rc_context({'axes.prop_cycle': cycler(color=options['palette'])}))
+        fig = Figure(figsize=options['figure_size'])
+        _DRAW[name](fig, data)
+        path = Path(path)
+        tmp_path = path.with_name(path.name + '.tmp')
+        fig.savefig(tmp_path, dpi=options['dpi'], format='png')
+        os.replace(tmp_path, path)
+    return True
+
+def content_hash(name, data, options):
+    """Hash of everything a chart is drawn from, to skip unchanged re-renders"""
+    digest = hashlib.blake2b(digest_size=16)
+    labels = list(data.columns) if isinstance(data, pd.DataFrame) else [data.name]
+    digest.update(json.dumps([name, options, labels], default=str).encode())
+    digest.update(pd.util.hash_pandas_object(data).to_numpy().tobytes())
+    return digest.hexdigest()
+
 class LogVisualizer:
-    def __init__(self, output_dir=None):
+    """Renders the analysis charts as PNG files.
+
+    Charts are drawn from a Rollup with the object-oriented matplotlib API
+    on the Agg backend. generate_all_visualizations renders them
+    concurrently in a process pool that is kept for later cycles. Each
+    worker only receives the compact prepared data of its chart. A chart
+    whose input hash matches the previous render is not drawn again.
+    """
+
+    def __init__(self, output_dir=None, workers=None):
         self.output_dir = Path(output_dir) if output_dir else Config.VISUALIZATIONS_DIR
         self.output_dir.mkdir(exist_ok=True)
         self.logger = setup_rotating_logger(
             'visualizer',
             Config.LOGS_DIR / 'visualizer.log'
         )
+        workers = workers if workers is not None else Config.VISUALIZATION_CONFIG['render_workers']
+        self.workers = workers if workers is not None else min(len(CHARTS), os.cpu_count() or 1)
+        self.executor = None
+        self.manifest_file = self.output_dir / '.render_manifest.json'
         self.setup_style()
 
     def setup_style(self):
-        """Set up the visual style for plots"""
+        """Resolve the configured style and color palette used for rendering"""
+        self.style = None
+        self.palette = None
         try:
-            plt.style.use(Config.VISUALIZATION_CONFIG['style'])
-            sns.set_palette(Config.VISUALIZATION_CONFIG['color_palette'])
+            style = Config.VISUALIZATION_CONFIG['style']
+            # matplotlib 3.6 renamed the bundled seaborn styles
+            if style not in mpl_style.available and f"{style}-v0_8" in mpl_style.available:
+                style = f"{style}-v0_8"
+            if style not in mpl_style.available:
+                raise ValueError(f"'{style}' is not an available matplotlib style")
+            self.style = style
+            self.palette = [tuple(color) for color in sns.color_palette(Config.VISUALIZATION_CONFIG['color_palette'])]
         except Exception as e:
             self.logger.error(f"Error setting up visualization style: {str(e)}")
 
-    def save_plot(self, filename, fig=None):
-        """Save plot with proper error handling"""
+    def render_options(self):
+        return {
+            'figure_size': tuple(Config.VISUALIZATION_CONFIG['figure_size']),
+            'dpi': Config.VISUALIZATION_CONFIG['dpi'],
+            'style': self.style,
+            'palette': self.palette,
+        }
+
+    def as_rollup(self, data):
+        """Plots take a Rollup, or a DataFrame of parsed rows that is rolled up first"""
+        return data if isinstance(data, Rollup) else Rollup.from_frame(data)
+
+    def chart_data(self, name, rollup):
+        """The compact data chart `name` is drawn from"""
+        if name == 'severity_distribution':
+            severity_counts = rollup.severity_totals()
+            return severity_counts[severity_counts > 0]
+        if name == 'time_series':
+            # Severity counts and mean response time per display bucket
+            return rollup.series()
+        hourly_severity = rollup.hourly_counts()
+        return hourly_severity.loc[:, hourly_severity.sum() > 0]
+
+    def _plot(self, name, data, filename, description):
         try:
-            if fig is None:
-                fig = plt.gcf()
-            filepath = self.output_dir / filename
-            fig.savefig(filepath, dpi=Config.VISUALIZATION_CONFIG['dpi'])
-            plt.close(fig)
+            if filename is None:
+                filename = f"{name}_{get_timestamp_str()}.png"
+            render_chart(name, self.chart_data(name, self.as_rollup(data)),
+                         self.output_dir / filename, self.render_options())
             self.logger.info(f"Successfully saved visualization: {filename}")
             return True
         except Exception as e:
-            self.logger.error(f"Error saving visualization {filename}: {str(e)}")
+            self.logger.error(f"Error creating {description} plot: {str(e)}")
             return False
 
-    def plot_severity_distribution(self, df, filename=None):
+    def plot_severity_distribution(self, data, filename=None):
         """Create a pie chart of log severity distribution"""
-        try:
-            if filename is None:
-                filename = f"severity_distribution_{get_timestamp_str()}.png"
-            
-            fig, ax = plt.subplots(figsize=Config.VISUALIZATION_CONFIG['figure_size'])
-            severity_counts = df['severity'].value_counts()
-            plt.pie(severity_counts, labels=severity_counts.index, autopct='%1.1f%%')
-            plt.title('Distribution of Log Severity Levels')
-            
-            return self.save_plot(filename, fig)
-        except Exception as e:
-            self.logger.error(f"Error creating severity distribution plot: {str(e)}")
-            return False
+        return self._plot('severity_distribution', data, filename, 'severity distribution')
 
-    def plot_time_series(self, df, filename=None):
+    def plot_time_series(self, data, filename=None):
         """Create a time series plot of errors and response times"""
-        try:
-            if filename is None:
-                filename = f"time_series_{get_timestamp_str()}.png"
-            
-            fig, ax1 = plt.subplots(figsize=Config.VISUALIZATION_CONFIG['figure_size'])
-            
-            # Create severity counts by time
-            severity_by_time = df.set_index('timestamp')['severity'].value_counts().unstack().fillna(0)
-            
-            # Plot severity counts
-            severity_by_time.plot(kind='line', ax=ax1)
-            ax1.set_xlabel('Time')
-            ax1.set_ylabel('Number of Logs')
-            
-            # Plot response times on secondary y-axis if available
-            if 'response_time' in df.columns and df['response_time'].notna().any():
-                ax2 = ax1.twinx()
-                df.set_index('timestamp')['response_time'].rolling(window=10).mean().plot(
-                    color='red', linestyle='--', ax=ax2, label='Avg Response Time'
-                )
-                ax2.set_ylabel('Response Time (ms)')
-            
-            plt.title('Log Events and Response Times Over Time')
-            return self.save_plot(filename, fig)
-        except Exception as e:
-            self.logger.error(f"Error creating time series plot: {str(e)}")
-            return False
+        return self._plot('time_series', data, filename, 'time series')
 
-    def plot_hourly_distribution(self, df, filename=None):
+    def plot_hourly_distribution(self, data, filename=None):
         """Create a heatmap of log events by hour and severity"""
+        return self._plot('hourly_distribution', data, filename, 'hourly distribution')
+
+    def _load_manifest(self):
         try:
-            if filename is None:
-                filename = f"hourly_distribution_{get_timestamp_str()}.png"
-            
-            fig, ax = plt.subplots(figsize=Config.VISUALIZATION_CONFIG['figure_size'])
-            
-            df['hour'] = df['timestamp'].dt.hour
-            hourly_severity = pd.crosstab(df['hour'], df['severity'])
-            
-            sns.heatmap(hourly_severity, cmap='YlOrRd', annot=True, fmt='d', ax=ax)
-            plt.title('Hourly Distribution of Log Events by Severity')
-            plt.xlabel('Severity Level')
-            plt.ylabel('Hour of Day')
-            
-            return self.save_plot(filename, fig)
-        except Exception as e:
-            self.logger.error(f"Error creating hourly distribution plot: {str(e)}")
-            return False
+            with open(self.manifest_file, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_manifest(self, manifest):
+        try:
+            with open(self.manifest_file, 'w') as f:
+                json.dump(manifest, f, indent=4)
+        except OSError as e:
+            self.logger.error(f"Error saving render manifest: {str(e)}")
 
-    def generate_all_visualizations(self, df):
-        """Generate all available visualizations"""
+    def _render_all(self, jobs, options):
+        """Render {name: (data, path)}; returns {name: success}"""
+        results = {}
+        if self.workers <= 1 or len(jobs) <= 1:
+            for name, (data, path) in jobs.items():
+                try:
+                    results[name] = render_chart(name, data, path, options)
+                except Exception as e:
+                    self.logger.error(f"Error creating {name} plot: {str(e)}")
+                    results[name] = False
+            return results
+
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=self.workers)
+        futures = {name: self.executor.submit(render_chart, name, data, path, options)
+                   for name, (data, path) in jobs.items()}
+        for name, future in futures.items():
+            try:
+                results[name] = future.result()
+            except BrokenProcessPool as e:
+                # Start a fresh pool on the next cycle
+                self.logger.error(f"Error creating {name} plot: {str(e)}")
+                results[name] = False
+                self.close()
+            except Exception as e:
+                self.logger.error(f"Error creating {name} plot: {str(e)}")
+                results[name] = False
+        return results
+
+    def generate_all_visualizations(self, data):
+        """Generate all available visualizations from a Rollup or DataFrame.
+
+        Charts are written as <chart name>.png in the output directory and
+        only re-rendered when their input changed. Returns {chart name: success}.
+        """
         self.logger.info("Starting visualization generation...")
-        
-        results = {
-            'severity_distribution': self.plot_severity_distribution(df),
-            'time_series': self.plot_time_series(df),
-            'hourly_distribution': self.plot_hourly_distribution(df)
-        }
-        
+        rollup = self.as_rollup(data)
+        options = self.render_options()
+        manifest = self._load_manifest()
+
+        results, jobs, hashes = {}, {}, {}
+        for name in CHARTS:
+            try:
+                chart_data = self.chart_data(name, rollup)
+                hashes[name] = content_hash(name, chart_data, options)
+            except Exception as e:
+                self.logger.error(f"Error preparing {name} plot: {str(e)}")
+                results[name] = False
+                continue
+            path = self.output_dir / f"{name}.png"
+            if (Config.VISUALIZATION_CONFIG['skip_unchanged'] and manifest.get(name) == hashes[name]
+                    and path.exists()):
+                results[name] = True
+                continue
+            jobs[name] = (chart_data, path)
+
+        for name, success in self._render_all(jobs, options).items():
+            results[name] = success
+            if success:
+                manifest[name] = hashes[name]
+            else:
+                manifest.pop(name, None)
+        self._save_manifest(manifest)
+        results = {name: results[name] for name in CHARTS}
+
         success_count = sum(results.values())
         total_count = len(results)
-        
-        self.logger.info(f"Visualization generation completed. {success_count}/{total_count} visualizations created successfully.")
-        return results
\ No newline at end of file
+
+        self.logger.info(
+            f"Visualization generation completed. {success_count}/{total_count} visualizations "
+            f"up to date, {len(jobs)} rendered."
+        )
+        return results
+
+    def close(self):
+        """Shut down the rendering pool"""
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+            self.executor = None
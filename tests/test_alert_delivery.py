@@ -0,0 +1,178 @@
+import smtplib
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+import pytest
+sys.path.append(str(Path(__file__).parent.parent / 'src'))
+
+from alert_delivery import alert_fingerprint
+from alert_system import AlertSystem
+
+class StubSMTP:
+    """Stand-in for smtplib.SMTP that records sessions and messages"""
+    instances = []
+    fail_sends = 0
+
+    def __init__(self, host, port, timeout=None):
+        self.host, self.port = host, port
+        self.calls = []
+        self.messages = []
+        StubSMTP.instances.append(self)
+
+    def starttls(self):
+        self.calls.append('starttls')
+
+    def login(self, username, password):
+        self.calls.append('login')
+
+    def noop(self):
+        return (250, b'OK')
+
+    def send_message(self, msg):
+        if StubSMTP.fail_sends:
+            StubSMTP.fail_sends -= 1
+            raise smtplib.SMTPServerDisconnected("connection lost")
+        self.messages.append(msg)
+
+    def quit(self):
+        self.calls.append('quit')
+
+    def close(self):
+        self.calls.append('close')
+
+SMTP_CONFIG = {
+    'server': 'localhost',
+    'port': 2525,
+    'username': 'test@example.com',
+    'password': 'test_password',
+    'from_email': 'test@example.com',
+    'to_email': 'admin@example.com'
+}
+
+@pytest.fixture
+def alert_system():
+    StubSMTP.instances = []
+    StubSMTP.fail_sends = 0
+    system = AlertSystem(SMTP_CONFIG, {'digest_seconds': 0.2, 'retry_backoff': 0.01},
+                         smtp_factory=StubSMTP)
+    yield system
+    system.close(timeout=5)
+
+def make_alerts(count, message="Database connection failed"):
+    start = datetime(2024, 3, 12, 1, 0, 0)
+    return [{
+        'timestamp': start + timedelta(seconds=i),
+        'severity': 'ERROR',
+        'message': f"{start + timedelta(seconds=i)} ERROR {message} response_time={5000 + i}.0",
+        'response_time': 5000.0 + i
+    } for i in range(count)]
+
+def sent_messages():
+    return [msg for smtp in StubSMTP.instances for msg in smtp.messages]
+
+def test_fingerprint_ignores_digits():
+    first, second = make_alerts(2)
+    assert alert_fingerprint(first) == alert_fingerprint(second)
+    assert alert_fingerprint(first) != alert_fingerprint(make_alerts(1, "Disk full")[0])
+
+def test_alerts_are_batched_into_one_digest(alert_system):
+    alerts = make_alerts(500) + make_alerts(3, "Authentication failed")
+    assert alert_system.queue_alerts(alerts) == 503
+    alert_system.close(timeout=5)
+
+    messages = sent_messages()
+    assert len(messages) == 1
+    assert '503 alerts' in messages[0]['Subject']
+    body = messages[0].get_payload()[0].get_payload()
+    assert '500x ERROR' in body and '3x ERROR' in body
+    # One session, one STARTTLS/login
+    assert len(StubSMTP.instances) == 1
+    assert StubSMTP.instances[0].calls[:2] == ['starttls', 'login']
+
+def test_digest_window_and_connection_reuse(alert_system):
+    alert_system.queue_alerts(make_alerts(2))
+    deadline = time.monotonic() + 5
+    while not sent_messages() and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert len(sent_messages()) == 1
+
+    alert_system.queue_alerts(make_alerts(1, "Disk full"))
+    alert_system.flush(timeout=5)
+    assert len(sent_messages()) == 2
+    assert len(StubSMTP.instances) == 1
+
+def test_duplicates_are_suppressed_after_sending(alert_system):
+    alert_system.queue_alerts(make_alerts(1))
+    alert_system.flush(timeout=5)
+    alert_system.queue_alerts(make_alerts(5))
+    alert_system.flush(timeout=5)
+
+    assert len(sent_messages()) == 1
+    assert alert_system.dispatcher.counts['suppressed'] == 5
+
+    # The next digest reports what was suppressed
+    alert_system.queue_alerts(make_alerts(1, "Disk full"))
+    alert_system.flush(timeout=5)
+    body = sent_messages()[1].get_payload()[0].get_payload()
+    assert 'Suppressed as duplicates of recently sent alerts (5)' in body
+    assert '5x ERROR' in body and 'Database connection failed' in body
+
+def test_dispatcher_survives_errors_building_a_digest(alert_system):
+    build_message = alert_system.create_digest_message
+    def failing_build_message(entries, suppressed):
+        raise ValueError("bad template")
+    alert_system.create_digest_message = failing_build_message
+    alert_system.queue_alerts(make_alerts(2))
+    assert alert_system.dispatcher.flush(timeout=5)
+    assert alert_system.dispatcher.counts['failed'] == 2
+
+    alert_system.dispatcher.build_message = build_message
+    alert_system.queue_alerts(make_alerts(1, "Disk full"))
+    assert alert_system.dispatcher.flush(timeout=5)
+    assert len(sent_messages()) == 1
+    assert alert_system.dispatcher.counts['sent'] == 1
+
+def test_failed_send_is_retried_on_a_new_connection(alert_system):
+    StubSMTP.fail_sends = 2
+    alert_system.queue_alerts(make_alerts(1))
+    alert_system.flush(timeout=5)
+
+    assert len(sent_messages()) == 1
+    assert len(StubSMTP.instances) == 3
+    assert alert_system.dispatcher.counts['sent'] == 1
+
+def test_gives_up_after_max_retries(alert_system):
+    StubSMTP.fail_sends = 10
+    alert_system.queue_alerts(make_alerts(1))
+    alert_system.flush(timeout=5)
+
+    assert sent_messages() == []
+    assert alert_system.dispatcher.counts['failed'] == 1
+    assert len(StubSMTP.instances) == alert_system.delivery_config['max_retries'] + 1
+
+def test_full_queue_drops_instead_of_blocking():
+    class BlockingSMTP(StubSMTP):
+        gate = threading.Event()
+
+        def send_message(self, msg):
+            BlockingSMTP.gate.wait(5)
+            super().send_message(msg)
+
+    StubSMTP.instances = []
+    StubSMTP.fail_sends = 0
+    system = AlertSystem(SMTP_CONFIG, {'queue_size': 1, 'digest_seconds': 0},
+                         smtp_factory=BlockingSMTP)
+    try:
+        system.queue_alerts(make_alerts(1))
+        # Wait until the worker is stuck sending the first digest
+        deadline = time.monotonic() + 5
+        while not StubSMTP.instances and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert system.queue_alerts(make_alerts(5, "Disk full")) == 1
+        assert system.dispatcher.counts['dropped'] == 4
+    finally:
+        BlockingSMTP.gate.set()
+        system.close(timeout=5)
+    assert len(sent_messages()) == 2
@@ -1,11 +1,14 @@
 import sys
 from pathlib import Path
 import pytest
-from datetime import datetime
+import pandas as pd
+from datetime import datetime, timedelta
 sys.path.append(str(Path(__file__).parent.parent / 'src'))
 
 from alert_system import AlertSystem
 from config import Config
+from log_columns import LogColumns
+from log_parser import LogParser
 
 @pytest.fixture
 def test_alert_system():
@@ -52,4 +55,78 @@ def test_create_alert_message(test_alert_system, sample_error_data):
     # Convert message to string to check content
     message_str = str(msg)
     assert 'Database connection failed' in message_str
-    assert 'response_time=6000.0' in message_str
\ No newline at end of file
+    assert 'response_time=6000.0' in message_str
+
+@pytest.fixture
+def log_lines():
+    start = datetime(2024, 3, 12, 1, 0, 0)
+    severities = ['INFO', 'ERROR', 'WARNING', 'INFO', 'ERROR']
+    lines = [
+        f"{start + timedelta(minutes=i * 7):%Y-%m-%d %H:%M:%S} {severities[i % 5]} "
+        f"Event {i} response_time={(i * 997) % 9000}.0"
+        for i in range(40)
+    ]
+    lines.append("no timestamp ERROR at all")
+    return lines
+
+def test_evaluate_matches_should_send_alert(test_alert_system, log_lines):
+    columns = LogColumns()
+    columns.add_buffer("\n".join(log_lines).encode(), LogParser().parse_fields)
+    df = columns.to_frame()
+    expected = [
+        index for index, row in df.iterrows()
+        if test_alert_system.should_send_alert(row.to_dict())
+    ]
+
+    assert list(test_alert_system.evaluate(df)['rows']) == expected
+    assert list(test_alert_system.evaluate(columns)['rows']) == expected
+    # Index labels rather than positions are returned for frames
+    assert list(test_alert_system.evaluate(df.iloc[::-1])['rows']) == expected[::-1]
+
+def test_error_rate_breaches(test_alert_system):
+    start = datetime(2024, 3, 12, 1, 0, 0)
+    # Six errors in 50 minutes, then a quiet period, then one more error
+    times = [start + timedelta(minutes=10 * i) for i in range(6)] + [start + timedelta(hours=5)]
+    df = pd.DataFrame({
+        'timestamp': times,
+        'severity': ['ERROR'] * 7,
+        'message': ['Database connection failed'] * 7,
+        'response_time': [None] * 7
+    })
+    threshold = test_alert_system.thresholds['error_count']
+
+    assert test_alert_system.evaluate(df)['error_rate'] == [(threshold, threshold + 1)]
+    assert test_alert_system.evaluate(df.iloc[:threshold])['error_rate'] == []
+
+def test_collect_alerts(test_alert_system):
+    df = pd.DataFrame({
+        'timestamp': [datetime(2024, 3, 12, 1, 0, 0), datetime(2024, 3, 12, 1, 0, 1)],
+        'severity': ['INFO', 'WARNING'],
+        'message': ['ok', 'slow'],
+        'response_time': [None, 9000.0]
+    })
+    assert test_alert_system.collect_alerts(df) == [{
+        'timestamp': pd.Timestamp(2024, 3, 12, 1, 0, 1),
+        'severity': 'WARNING',
+        'message': 'slow',
+        'response_time': 9000.0
+    }]
+
+def test_collect_alerts_carries_error_rate_across_batches(test_alert_system):
+    start = datetime(2024, 3, 12, 1, 0, 0)
+    threshold = test_alert_system.thresholds['error_count']
+    batches = [pd.DataFrame({
+        'timestamp': [start + timedelta(minutes=i)],
+        'severity': ['ERROR'],
+        'message': ['Database connection failed'],
+        'response_time': [None]
+    }) for i in range(threshold + 2)]
+
+    rate_alerts = [
+        [alert for alert in test_alert_system.collect_alerts(batch, carry_over=True)
+         if 'within one hour' in alert['message']]
+        for batch in batches
+    ]
+    # Reported once, by the batch whose error crosses the threshold
+    assert [len(alerts) for alerts in rate_alerts] == [0] * threshold + [1, 0]
+    assert rate_alerts[threshold][0]['timestamp'] == pd.Timestamp(start + timedelta(minutes=threshold))
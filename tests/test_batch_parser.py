@@ -0,0 +1,74 @@
+import sys
+from pathlib import Path
+import pandas as pd
+import pytest
+sys.path.append(str(Path(__file__).parent.parent / 'src'))
+
+from batch_parser import BatchParser
+from ingestion import parse_files
+from log_columns import LogColumns
+from log_parser import LogParser
+
+LINES = [
+    "2024-03-12 01:00:00 INFO Request ok response_time=12.5",
+    "2024-03-12 01:00:01 WARN Slow disk",
+    "2024-03-12 01:00:02 ERROR Timeout response_time=7.",
+    "2024-03-12 01:00:03 INFO Retried after ERROR",
+    "Something FATAL without a timestamp",
+    "2024-13-12 01:00:00 INFO Bad month",
+    "2024-03-12 25:00:00 INFO Bad hour",
+    "  2024-03-12 01:00:04 CRITICAL Padded  ",
+    "2024-03-12\t01:00:05 INFO Tab separated",
+    "",
+    "2024-03-12 01:00:06 INFO Twice response_time=1 response_time=2",
+    "2024-03-12 01:00:07 INFO",
+]
+
+@pytest.mark.parametrize("batch_size", [1, 5, 1000])
+def test_batch_matches_per_line_parser(batch_size):
+    parser = LogParser()
+    df = BatchParser(parser, batch_size).parse_lines(LINES)
+    expected = [(parser.parse(line), parser.parse_fields(line.encode())) for line in LINES]
+    expected = [(parsed, fields[3].decode()) for parsed, fields in expected if parsed is not None]
+
+    assert len(df) == len(expected)
+    for row, (parsed, message) in zip(df.itertuples(index=False), expected):
+        if parsed['timestamp'] is None:
+            assert pd.isna(row.timestamp)
+        else:
+            assert row.timestamp == parsed['timestamp']
+        assert row.severity == parsed['severity']
+        # Standard-layout lines keep only their body
+        assert row.message == message
+        if parsed['response_time'] is None:
+            assert pd.isna(row.response_time)
+        else:
+            assert row.response_time == pytest.approx(parsed['response_time'])
+
+def test_unicode_whitespace_matches_bytes_parser():
+    # Whitespace to str patterns and str.strip(), but not to the bytes ones
+    lines = [
+        "2024-01-01 10:00:01 INFO ok response_time=60.0\xa0",
+        "2024-01-01 10:00:02 INFO\u2003em space response_time=5",
+        "2024-01-01 10:00:03 WARNING sep\x1c response_time=7.5\x1c",
+        "\xa02024-01-01 10:00:04 ERROR leading nbsp",
+        "2024-01-01 10:00:05 INFO plain\xa0body",
+    ]
+    parser = LogParser()
+    batch = BatchParser(parser).parse_lines(lines)
+    columns = LogColumns()
+    columns.add_buffer("\n".join(lines).encode() + b"\n", parser.parse_fields)
+
+    assert batch.equals(columns.to_frame())
+
+def test_parse_files_matches_columnar_frame(tmp_path):
+    log_file = tmp_path / "app.log"
+    log_file.write_text("\n".join(LINES * 50) + "\n")
+    batch = BatchParser(batch_size=64).parse_files([log_file])
+
+    assert batch.equals(parse_files([log_file]).to_frame())
+
+def test_empty_input():
+    df = BatchParser().parse_lines([])
+    assert df.empty
+    assert list(df.columns) == ['timestamp', 'severity', 'message', 'response_time']
@@ -0,0 +1,58 @@
+import subprocess
+import sys
+from pathlib import Path
+import pytest
+sys.path.append(str(Path(__file__).parent.parent / 'src'))
+
+from cli import parse_args, setup_argparse
+
+SRC_DIR = Path(__file__).parent.parent / 'src'
+
+def test_subcommands_and_default_analysis():
+    parser = setup_argparse()
+    assert parser.parse_args([]).command is None
+    assert parser.parse_args(['--summary-only']).summary_only
+    args = parser.parse_args(['analyze', '--workers', '4', '--since', '2024-03-12'])
+    assert (args.command, args.workers, args.since) == ('analyze', 4, '2024-03-12')
+    assert parser.parse_args(['cleanup', '--report-dir', 'old']).report_dir == 'old'
+    assert parser.parse_args(['metrics']).command == 'metrics'
+    args = parser.parse_args(['history', '--since', '2024-03-01', '--resolution', '1h'])
+    assert (args.command, args.since, args.resolution) == ('history', '2024-03-01', '1h')
+    args = parser.parse_args(['query', '--severity', 'ERROR', 'WARNING', '--regex', 'time(d )?out', '-i',
+                              '--group-by', 'hour', 'template', '--top', '5'])
+    assert (args.command, args.severity, args.ignore_case) == ('query', ['ERROR', 'WARNING'], True)
+    assert (args.group_by, args.top, args.limit) == (['hour', 'template'], 5, 20)
+
+def test_options_before_the_command_are_kept():
+    parser = setup_argparse()
+    args = parser.parse_args(['--workers', '4', '--since', '2024-01-01', 'analyze'])
+    assert (args.workers, args.since) == (4, '2024-01-01')
+    assert parser.parse_args(['--report-dir', 'old', 'cleanup']).report_dir == 'old'
+    args = parser.parse_args(['--since', '2024-01-01', '--workers', '3', 'query', '--until', '2024-02-01'])
+    assert (args.since, args.until, args.workers) == ('2024-01-01', '2024-02-01', 3)
+    # Defaults still apply when the option is given nowhere
+    args = parser.parse_args(['query'])
+    assert (args.since, args.log_dir, args.limit) == (None, None, 20)
+    assert parser.parse_args(['analyze', '--since', '2024-03-12']).since == '2024-03-12'
+
+def test_options_a_command_does_not_use_are_rejected(capsys):
+    with pytest.raises(SystemExit) as error:
+        parse_args(['--log-dir', 'logs', '--report-dir', 'old', 'history'])
+    assert error.value.code == 2
+    assert "--log-dir, --report-dir cannot be used with the history command" in capsys.readouterr().err
+    with pytest.raises(SystemExit):
+        parse_args(['--alert', 'metrics'])
+    assert parse_args(['--since', '2024-01-01', 'history']).since == '2024-01-01'
+    assert parse_args(['--log-dir', 'logs', '--summary-only']).log_dir == 'logs'
+
+def test_cheap_commands_do_not_import_heavy_modules(tmp_path):
+    # A fresh interpreter, as this test process already has pandas loaded
+    script = (
+        "import sys; import cli; "
+        f"cli.run_cleanup({str(tmp_path)!r}); "
+        "heavy = {'pandas', 'numpy', 'matplotlib', 'seaborn', 'psutil', 'tqdm'}; "
+        "print(sorted(heavy & set(sys.modules)))"
+    )
+    result = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True,
+                            cwd=SRC_DIR, check=True)
+    assert result.stdout.strip().splitlines()[-1] == '[]'
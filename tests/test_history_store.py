@@ -0,0 +1,75 @@
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import pytest
+sys.path.append(str(Path(__file__).parent.parent / 'src'))
+
+from config import Config
+from history_store import HistoryStore
+from rollups import Rollup
+
+START = datetime(2024, 3, 1)
+
+@pytest.fixture
+def sample_df():
+    rng = np.random.default_rng(3)
+    size = 5000
+    response_times = rng.uniform(10, 500, size)
+    response_times[rng.random(size) < 0.2] = np.nan
+    return pd.DataFrame({
+        'timestamp': [START + timedelta(seconds=int(s)) for s in rng.integers(0, 20 * 86400, size)],
+        'severity': pd.Categorical(rng.choice(Config.SEVERITY_LEVELS, size), categories=Config.SEVERITY_LEVELS),
+        'response_time': response_times.astype(np.float32),
+    })
+
+def test_rollups_add_up_and_survive_compaction(tmp_path, sample_df):
+    store = HistoryStore(tmp_path / "history.db")
+    # Two cycles of new rows
+    store.add_rollup(Rollup.from_frame(sample_df.iloc[:3000]))
+    store.add_rollup(Rollup.from_frame(sample_df.iloc[3000:]))
+    expected = Rollup.from_frame(sample_df).frame.resample('1D').agg(
+        {**{level: 'sum' for level in Config.SEVERITY_LEVELS},
+         'response_time_sum': 'sum', 'response_time_count': 'sum', 'response_time_max': 'max'})
+
+    daily = store.rollup(resolution='1D').frame
+    pd.testing.assert_frame_equal(daily, expected, check_freq=False, check_dtype=False)
+
+    # Minute buckets older than 7 days become hours, hours older than 10 days become days
+    store.tiers = [('minute', '1min', 7), ('hour', '1h', 10), ('day', '1D', None)]
+    assert store.compact(now=START + timedelta(days=20)) > 0
+    pd.testing.assert_frame_equal(store.rollup(resolution='1D').frame, daily)
+
+    since, until = START + timedelta(days=14), START + timedelta(days=16)
+    hourly = store.rollup(since, until, '1h').frame
+    in_range = sample_df[(sample_df['timestamp'] >= since) & (sample_df['timestamp'] < until)]
+    assert hourly[Config.SEVERITY_LEVELS].to_numpy().sum() == len(in_range)
+    assert hourly.index.min() >= pd.Timestamp(since) and hourly.index.max() < pd.Timestamp(until)
+
+def test_replace_skips_compacted_buckets(tmp_path, sample_df):
+    store = HistoryStore(tmp_path / "history.db")
+    rollup = Rollup.from_frame(sample_df)
+    store.add_rollup(rollup, replace=True)
+    store.compact(now=START + timedelta(days=20))
+    # A full re-read in the next cycle must not count compacted rows twice
+    store.add_rollup(rollup, replace=True)
+
+    totals = store.rollup(resolution='1D').frame[Config.SEVERITY_LEVELS].sum()
+    assert totals.to_dict() == sample_df['severity'].value_counts().to_dict()
+
+def test_summaries_are_thinned_to_one_per_day(tmp_path):
+    store = HistoryStore(tmp_path / "history.db")
+    for hours in range(0, 72, 6):
+        store.add_summary({'total_logs': hours, 'start_time': pd.Timestamp(START)},
+                          time=START + timedelta(hours=hours))
+        store.add_metrics({'counters': {'lines': hours}}, time=START + timedelta(hours=hours))
+
+    assert store.latest_summary()['total_logs'] == 66
+    assert store.latest_summary()['start_time'] == str(pd.Timestamp(START))
+    store.compact(now=START + timedelta(days=2 + Config.RETENTION_DAYS))
+    kept = [summary['total_logs'] for _, summary in store.summaries()]
+    # The last summary of each day older than the retention period, and all newer ones
+    assert kept == [18, 42, 48, 54, 60, 66]
+    assert [metrics['counters']['lines'] for _, metrics in store.metrics()] == kept
+    assert [summary['total_logs'] for _, summary in store.summaries(since=START + timedelta(days=2))] == [48, 54, 60, 66]
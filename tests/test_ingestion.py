@@ -0,0 +1,77 @@
+import sys
+from pathlib import Path
+import pytest
+sys.path.append(str(Path(__file__).parent.parent / 'src'))
+
+from ingestion import IngestionStats, plan_ranges, parse_files, summarize_files
+from log_analyzer import LogAnalyzer
+
+@pytest.fixture
+def log_files(tmp_path):
+    lines = [
+        f"2024-03-12 01:{minute:02d}:00 {severity} Event {minute} response_time={minute * 10}.5\n"
+        for minute in range(60)
+        for severity in ['INFO', 'WARNING', 'ERROR']
+    ]
+    first = tmp_path / "a.log"
+    first.write_text("".join(lines))
+    second = tmp_path / "b.log"
+    # No trailing newline on the last line
+    second.write_text("".join(lines[:10]).rstrip('\n'))
+    return [first, second]
+
+def test_plan_ranges_are_contiguous_and_line_aligned(log_files):
+    ranges = plan_ranges(log_files[:1], chunk_size=500)
+    data = log_files[0].read_bytes()
+
+    assert len(ranges) > 1
+    assert ranges[0][1] == 0
+    assert ranges[-1][2] == len(data)
+    for (_, _, end), (_, start, _) in zip(ranges, ranges[1:]):
+        assert end == start
+        assert data[end - 1:end] == b'\n'
+
+def test_parallel_matches_sequential(log_files):
+    sequential = parse_files(log_files, workers=1).to_frame()
+    parallel = parse_files(log_files, workers=3, chunk_size=700).to_frame()
+
+    assert len(sequential) == 190
+    assert sequential.equals(parallel)
+
+def test_streamed_summary_matches_dataframe_summary(log_files):
+    df = parse_files(log_files).to_frame()
+    expected = LogAnalyzer(log_files[0].parent).generate_summary(df)
+
+    for workers in (1, 2):
+        summary = summarize_files(log_files, workers=workers, chunk_size=700).to_summary()
+        assert summary['total_logs'] == expected['total_logs']
+        assert summary['error_count'] == expected['error_count']
+        assert summary['avg_response_time'] == pytest.approx(expected['avg_response_time'])
+        assert summary['max_response_time'] == pytest.approx(expected['max_response_time'])
+        assert summary['start_time'] == expected['start_time']
+        assert summary['end_time'] == expected['end_time']
+
+def test_streamed_summary_time_bounds(log_files):
+    since = 1710205200 + 30 * 60  # 2024-03-12 01:30:00
+    summary = summarize_files(log_files, since=since).to_summary()
+    assert summary['total_logs'] == 90
+    assert str(summary['start_time']) == '2024-03-12 01:30:00'
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_stats_count_bytes_and_lines(log_files, workers):
+    updates = []
+    stats = IngestionStats(updates.append)
+    columns = parse_files(log_files, workers=workers, chunk_size=700, stats=stats)
+    total_bytes = sum(log_file.stat().st_size for log_file in log_files)
+
+    assert stats.files == 2
+    assert stats.lines == len(columns) == 190
+    assert stats.bytes == sum(updates) == total_bytes
+    assert stats.parse_failures == 0
+    assert stats.mb_per_second > 0
+
+def test_summary_stats_count_lines_before_time_filter(log_files):
+    stats = IngestionStats()
+    summary = summarize_files(log_files, since=1710205200 + 30 * 60, stats=stats).to_summary()
+    assert summary['total_logs'] == 90
+    assert stats.lines == 190
@@ -0,0 +1,147 @@
+import sys
+import time
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent / 'src'))
+
+from config import Config
+from instrumentation import CycleMetrics, profile_cycle
+
+LINES = [
+    "2024-03-12 01:17:45 INFO User login successful response_time=120.0\n",
+    "not a log line\n",
+    "2024-03-12 01:18:45 ERROR Database connection failed response_time=8000.0\n",
+]
+
+def test_stages_add_up_and_export_as_prometheus():
+    metrics = CycleMetrics()
+    for _ in range(2):
+        with metrics.stage('parse'):
+            time.sleep(0.01)
+    metrics.count('lines', 10)
+    metrics.count('lines', 5)
+    metrics.totals['alerts_sent'] = 3
+    metrics.finish()
+
+    assert metrics.stages['parse'] >= 0.02
+    assert metrics.counters == {'lines': 15}
+    text = metrics.to_prometheus()
+    assert 'log_analyzer_stage_seconds{stage="parse"} 0.0' in text
+    assert '# TYPE log_analyzer_last_cycle_lines gauge\nlog_analyzer_last_cycle_lines 15\n' in text
+    assert '# TYPE log_analyzer_alerts_sent_total counter\nlog_analyzer_alerts_sent_total 3\n' in text
+
+def test_profile_cycle_writes_profiles(tmp_path):
+    with profile_cycle(tmp_path, 'cycle', cprofile=True, trace_memory=True) as written:
+        data = [bytes(1000) for _ in range(1000)]
+    assert len(data) == 1000
+    assert [path.name for path in written] == ['cycle.prof', 'cycle.tracemalloc.txt']
+    assert (tmp_path / 'cycle.tracemalloc.txt').read_text().startswith('Peak traced memory')
+
+    with profile_cycle(tmp_path / 'off', 'cycle') as written:
+        pass
+    assert written == [] and not (tmp_path / 'off').exists()
+
+def make_service(tmp_path, monkeypatch):
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    (data_dir / "app.log").write_text("".join(LINES))
+    (tmp_path / "logs").mkdir()
+    monkeypatch.setattr(Config, 'LOGS_DIR', tmp_path / "logs")
+    monkeypatch.setattr(Config, 'REPORTS_DIR', tmp_path / "reports")
+    monkeypatch.setattr(Config, 'VISUALIZATIONS_DIR', tmp_path / "visualizations")
+    monkeypatch.setattr(Config, 'INCREMENTAL_CONFIG',
+                        {**Config.INCREMENTAL_CONFIG, 'state_file': tmp_path / "state" / "tail.json"})
+    monkeypatch.setattr(Config, 'VISUALIZATION_CONFIG', {**Config.VISUALIZATION_CONFIG, 'render_workers': 1})
+    monkeypatch.setattr(Config, 'HISTORY_CONFIG', {**Config.HISTORY_CONFIG, 'path': tmp_path / "state" / "history.db"})
+    prometheus_file = tmp_path / "state" / "metrics.prom"
+    monkeypatch.setattr(Config, 'METRICS_CONFIG',
+                        {**Config.METRICS_CONFIG, 'prometheus_file': prometheus_file})
+    from main import LogAnalyzerService
+
+    service = LogAnalyzerService()
+    # Away from the service's own log files
+    service.analyzer.log_dir = data_dir
+    return service
+
+def test_service_cycle_writes_metrics(tmp_path, monkeypatch):
+    service = make_service(tmp_path, monkeypatch)
+    prometheus_file = Config.METRICS_CONFIG['prometheus_file']
+    try:
+        metrics = service.process_logs()
+    finally:
+        service.alert_system.close()
+        service.visualizer.close()
+
+    assert set(metrics.stages) == {'parse', 'save_report', 'render', 'alerts'}
+    assert metrics.counters['files'] == 1
+    assert metrics.counters['lines'] == 3
+    assert metrics.counters['parse_failures'] == 1
+    assert metrics.counters['bytes'] == len("".join(LINES))
+    [(_, recorded)] = service.history.metrics()
+    assert recorded['counters'] == metrics.counters
+    assert 'log_analyzer_last_cycle_parse_failures 1' in prometheus_file.read_text()
+    # The summary and metrics go to the history store instead of report files
+    assert service.history.latest_summary()['total_logs'] == 3
+    assert not list((tmp_path / "reports").glob("*.json"))
+
+def test_failed_cycle_keeps_rows_for_the_next_one(tmp_path, monkeypatch):
+    service = make_service(tmp_path, monkeypatch)
+    def failing_render(data):
+        raise RuntimeError("disk full")
+    render = service.visualizer.generate_all_visualizations
+    try:
+        monkeypatch.setattr(service.visualizer, 'generate_all_visualizations', failing_render)
+        service.process_logs()
+        # Nothing of the failed cycle is recorded
+        assert service.history.latest_summary() is None
+        assert service.analyzer.tailer.aggregator.total == 0
+
+        monkeypatch.setattr(service.visualizer, 'generate_all_visualizations', render)
+        metrics = service.process_logs()
+    finally:
+        service.alert_system.close()
+        service.visualizer.close()
+
+    assert metrics.counters['lines'] == 3
+    assert service.analyzer.tailer.aggregator.total == 3
+
+def test_incremental_cycles_skip_the_services_own_logs(tmp_path, monkeypatch):
+    service = make_service(tmp_path, monkeypatch)
+    service.analyzer.log_dir = Config.LOGS_DIR
+    (Config.LOGS_DIR / "app.log").write_text("".join(LINES))
+    try:
+        first = service.process_logs()
+        second = service.process_logs()
+    finally:
+        service.alert_system.close()
+        service.visualizer.close()
+
+    assert (Config.LOGS_DIR / "service.log").exists()
+    assert first.counters['files'] == 1 and first.counters['lines'] == 3
+    # The service logged the first cycle, but nothing new was appended to app.log
+    assert second.counters['lines'] == 0
+    assert service.analyzer.tailer.aggregator.total == 3
+
+def test_failed_fold_is_rolled_back(tmp_path, monkeypatch):
+    from rollups import Rollup
+
+    service = make_service(tmp_path, monkeypatch)
+    merge = Rollup.merge
+    failures = []
+    def failing_merge(self, other):
+        if not failures:
+            failures.append(other)
+            raise RuntimeError("rollup")
+        return merge(self, other)
+    monkeypatch.setattr(Rollup, 'merge', failing_merge)
+    try:
+        service.process_logs()
+        # The aggregates were updated before the rollup merge failed
+        assert failures and service.analyzer.tailer.aggregator.total == 0
+        metrics = service.process_logs()
+    finally:
+        service.alert_system.close()
+        service.visualizer.close()
+
+    assert metrics.counters['lines'] == 3
+    assert service.analyzer.tailer.aggregator.total == 3
+    assert service.history.latest_summary()['total_logs'] == 3
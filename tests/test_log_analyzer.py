@@ -18,16 +18,16 @@ def sample_log_content():
     ]
 
 @pytest.fixture
-def log_analyzer(test_config, tmp_path):
+def log_analyzer(test_config, tmp_path, sample_log_content):
     # Create temporary log directory
     log_dir = tmp_path / "logs"
     log_dir.mkdir()
     
     # Create sample log file
     log_file = log_dir / "test.log"
-    log_file.write_text("\n".join(sample_log_content()))
+    log_file.write_text("\n".join(sample_log_content))
     
-    return LogAnalyzer(log_dir)
+    return LogAnalyzer(log_dir, cache_dir=tmp_path / "cache")
 
 def test_parse_log_line(log_analyzer):
     line = "2024-03-12 01:15:24 INFO Database connection established response_time=50.2"
@@ -62,4 +62,25 @@ def test_generate_summary(log_analyzer):
     assert summary['error_count'] == 1
     assert summary['warning_count'] == 1
     assert summary['info_count'] == 2
-    assert isinstance(summary['avg_response_time'], float)
\ No newline at end of file
+    assert isinstance(summary['avg_response_time'], float)
+
+def test_analyze_incremental(log_analyzer, tmp_path):
+    state_file = tmp_path / "state" / "tail_state.json"
+    log_file = log_analyzer.log_dir / "test.log"
+    log_file.write_text(log_file.read_text() + "\n")
+
+    df, summary = log_analyzer.analyze_incremental(state_file)
+    assert len(df) == 4
+    assert summary['total_logs'] == 4
+    # Until committed the same rows are returned again
+    log_analyzer.tailer.rollback()
+    df, summary = log_analyzer.analyze_incremental(state_file)
+    assert (len(df), summary['total_logs']) == (4, 4)
+    log_analyzer.tailer.commit()
+
+    with open(log_file, 'a') as f:
+        f.write("2024-03-12 01:18:00 ERROR Disk failure response_time=9000.0\n")
+    df, summary = log_analyzer.analyze_incremental(state_file)
+    assert len(df) == 1
+    assert summary['total_logs'] == 5
+    assert summary['error_count'] == 2
\ No newline at end of file
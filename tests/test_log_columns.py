@@ -0,0 +1,79 @@
+import sys
+from pathlib import Path
+import pytest
+import numpy as np
+import pandas as pd
+sys.path.append(str(Path(__file__).parent.parent / 'src'))
+
+from log_columns import LogColumns
+from log_parser import LogParser
+
+@pytest.fixture
+def sample_lines():
+    return [
+        b"2024-03-12 01:15:23 INFO Server started successfully\n",
+        b"2024-03-12 01:15:24 INFO Database connection established response_time=50.2\n",
+        b"2024-03-12 01:16:30 WARNING High CPU usage detected response_time=1200.5\n",
+        b"Unstructured line with ERROR and no timestamp\n",
+        "2024-03-12 01:17:45 ERROR Verbindung fehlgeschlagen ü response_time=8000.0".encode('utf-8'),
+    ]
+
+def test_to_frame_matches_per_line_parser(sample_lines):
+    parser = LogParser()
+    columns = LogColumns()
+    assert columns.add_lines(sample_lines, parser.parse_fields) == len(sample_lines)
+
+    df = columns.to_frame()
+    expected = pd.DataFrame([parser.parse(line.decode('utf-8')) for line in sample_lines])
+
+    assert list(df.columns) == ['timestamp', 'severity', 'message', 'response_time']
+    assert df['timestamp'].dtype == 'datetime64[ns]'
+    assert isinstance(df['severity'].dtype, pd.CategoricalDtype)
+    assert df['response_time'].dtype == np.float32
+    assert df['severity'].astype(str).tolist() == expected['severity'].tolist()
+    assert isinstance(df['message'].dtype, pd.CategoricalDtype)
+    # Standard-layout lines keep only their body, other lines their full text
+    assert df['message'].tolist() == [
+        "Server started successfully",
+        "Database connection established",
+        "High CPU usage detected",
+        "Unstructured line with ERROR and no timestamp",
+        "Verbindung fehlgeschlagen ü",
+    ]
+    assert df['timestamp'].isna().tolist() == expected['timestamp'].isna().tolist()
+    assert (df['timestamp'].dropna() == pd.to_datetime(expected['timestamp'].dropna())).all()
+    np.testing.assert_allclose(
+        df['response_time'].to_numpy(dtype=float),
+        expected['response_time'].to_numpy(dtype=float),
+        rtol=1e-6
+    )
+
+def test_extend_keeps_message_offsets(sample_lines):
+    parser = LogParser()
+    first, second = LogColumns(), LogColumns()
+    first.add_lines(sample_lines[:2], parser.parse_fields)
+    second.add_lines(sample_lines[2:], parser.parse_fields)
+    first.extend(second)
+
+    combined = LogColumns()
+    combined.add_lines(sample_lines, parser.parse_fields)
+
+    assert first.message_list() == combined.message_list()
+    assert len(first) == len(sample_lines)
+
+def test_repeated_messages_are_interned():
+    parser = LogParser()
+    lines = [f"2024-03-12 01:15:{i % 60:02d} INFO Request served response_time={i}".encode() for i in range(100)]
+    lines.append(b"2024-03-12 01:16:00 ERROR Request failed")
+    columns = LogColumns()
+    columns.add_lines(lines, parser.parse_fields)
+
+    assert list(columns.vocabulary) == [b"Request served", b"Request failed"]
+    df = columns.to_frame()
+    assert df['message'].cat.categories.tolist() == ["Request served", "Request failed"]
+    assert df['message'].value_counts()["Request served"] == 100
+
+def test_empty_columns_produce_empty_frame():
+    df = LogColumns().to_frame()
+    assert df.empty
+    assert list(df.columns) == ['timestamp', 'severity', 'message', 'response_time']
@@ -0,0 +1,69 @@
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+import numpy as np
+import pytest
+sys.path.append(str(Path(__file__).parent.parent / 'src'))
+
+from ingestion import parse_files
+from log_generator import LogGenerator, RESPONSE_TIME_RANGES, format_batch
+
+END = datetime(2024, 3, 12, 12, 0, 0)
+START = END - timedelta(days=2)
+
+def read_bytes(paths):
+    return b''.join(Path(path).read_bytes() for path in sorted(paths))
+
+def test_format_batch_matches_per_line_formatting():
+    prefixes = [b"INFO Cache refreshed response_time=", b"ERROR Out of memory error response_time="]
+    seconds = np.array([0, 1710200000, 1710245999])
+    tenths = np.array([500, 9999, 150000])
+    codes = np.array([0, 1, 0])
+    buffer, line_ends = format_batch(seconds, prefixes, codes, tenths)
+
+    expected = ''.join(
+        f"{datetime(1970, 1, 1) + timedelta(seconds=int(second)):%Y-%m-%d %H:%M:%S} "
+        f"{prefixes[code].decode()}{tenth / 10:.1f}\n"
+        for second, code, tenth in zip(seconds, codes, tenths)
+    ).encode()
+    assert buffer == expected
+    assert line_ends[-1] == len(buffer)
+
+def test_bulk_output_parses_with_expected_distributions(tmp_path):
+    paths = LogGenerator(tmp_path).generate_bulk(20000, START, END, seed=3, batch_size=7000)
+    df = parse_files(paths).to_frame()
+
+    assert len(df) == 20000
+    assert df['timestamp'].between(START, END).all()
+    shares = df['severity'].value_counts(normalize=True)
+    assert shares['INFO'] == pytest.approx(0.7, abs=0.02)
+    assert shares['ERROR'] == pytest.approx(0.1, abs=0.02)
+    for level, (low, high) in RESPONSE_TIME_RANGES.items():
+        times = df.loc[df['severity'] == level, 'response_time']
+        assert times.min() >= low and times.max() <= high
+
+def test_seed_reproduces_output_for_any_worker_count(tmp_path):
+    runs = [
+        LogGenerator(tmp_path / f"run_{workers}").generate_bulk(
+            5000, START, END, files=2, workers=workers, seed=11, batch_size=1000)
+        for workers in (1, 2)
+    ]
+    assert read_bytes(runs[0]) == read_bytes(runs[1])
+    other = LogGenerator(tmp_path / "other").generate_bulk(5000, START, END, files=2, seed=12,
+                                                           batch_size=1000)
+    assert read_bytes(other) != read_bytes(runs[0])
+
+def test_rotation_keeps_whole_lines_and_sorted_order(tmp_path):
+    rotate_bytes = 64 * 1024
+    paths = LogGenerator(tmp_path).generate_bulk(10000, START, END, rotate_bytes=rotate_bytes,
+                                                 order='sorted', seed=5, batch_size=3000)
+    assert len(paths) > 1
+    for path in paths:
+        data = Path(path).read_bytes()
+        assert len(data) <= rotate_bytes
+        assert data.endswith(b'\n')
+
+    lines = read_bytes(paths).splitlines()
+    assert len(lines) == 10000
+    stamps = [line[:19] for line in lines]
+    assert stamps == sorted(stamps)
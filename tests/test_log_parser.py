@@ -0,0 +1,48 @@
+import sys
+from pathlib import Path
+import pytest
+from datetime import datetime
+sys.path.append(str(Path(__file__).parent.parent / 'src'))
+
+from log_parser import LogParser
+
+@pytest.fixture
+def parser():
+    return LogParser()
+
+@pytest.fixture
+def tricky_lines():
+    return [
+        "2024-03-12 01:15:23 INFO Server started successfully",
+        "2024-03-12 01:15:24 INFO Database connection established response_time=50.2\n",
+        "2024-03-12 01:16:30 WARN High CPU usage detected response_time=1200.5",
+        "2024-03-12 01:17:45 CRITICAL Disk failure response_time=8000",
+        "2024-03-12 01:17:46 INFO Retrying after ERROR in worker",
+        "2024-03-12 01:17:47 INFO first response_time=1.5 then response_time=2.5",
+        "2024-03-12 01:17:48 INFO bad value response_time=abc",
+        "  2024-03-12 01:17:49 ERROR Leading whitespace",
+        "prefix 2024-03-12 01:17:50 WARNING Timestamp not at start",
+        "No timestamp ERROR here",
+        "2024-03-12 01:17:51 INFO",
+        "2024-02-30 01:17:52 INFO Impossible date",
+        "",
+    ]
+
+def test_parse_standard_line(parser):
+    result = parser.parse("2024-03-12 01:15:24 WARNING Slow query response_time=1200.5\n")
+
+    assert result['timestamp'] == datetime(2024, 3, 12, 1, 15, 24)
+    assert result['severity'] == 'WARNING'
+    assert result['message'] == "2024-03-12 01:15:24 WARNING Slow query response_time=1200.5"
+    assert result['response_time'] == 1200.5
+
+def test_parse_matches_fallback(parser, tricky_lines):
+    for line in tricky_lines:
+        assert parser.parse(line) == parser.parse_fallback(line), line
+
+def test_keyword_in_body_keeps_original_severity(parser):
+    result = parser.parse("2024-03-12 01:17:46 INFO Retrying after ERROR in worker")
+    assert result['severity'] == 'ERROR'
+
+def test_invalid_date_returns_none(parser):
+    assert parser.parse("2024-02-30 01:17:52 INFO Impossible date") is None
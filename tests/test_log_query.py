@@ -0,0 +1,92 @@
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+import pytest
+sys.path.append(str(Path(__file__).parent.parent / 'src'))
+
+import log_analyzer
+from batch_parser import BatchParser
+from config import Config
+from ingestion import parse_each_file
+from log_analyzer import LogAnalyzer
+from log_query import LogQuery, group_rows
+
+START = datetime(2024, 3, 1)
+
+def write_log(path, hours, first_hour=0):
+    lines = [
+        f"{(START + timedelta(hours=hour, seconds=second)):%Y-%m-%d %H:%M:%S} "
+        f"{'ERROR' if second % 420 == 0 else 'INFO'} "
+        f"{'Timeout calling db' if second % 420 == 0 else 'Request served'} in {second}ms "
+        f"response_time={hour * 100 + second // 60}"
+        for hour in range(first_hour, first_hour + hours)
+        for second in range(0, 3600, 60)
+    ]
+    path.write_text("\n".join(lines) + "\n")
+
+@pytest.fixture
+def log_dir(tmp_path):
+    log_dir = tmp_path / "logs"
+    log_dir.mkdir()
+    write_log(log_dir / "day1.log", 24)
+    write_log(log_dir / "day2.log", 24, first_hour=24)
+    return log_dir
+
+def expected_rows(df, since, until, severity, pattern, min_response_time):
+    keep = ((df['timestamp'] >= since) & (df['timestamp'] < until) & (df['severity'] == severity)
+            & df['message'].astype(str).str.contains(pattern, case=False, regex=True)
+            & (df['response_time'] >= min_response_time))
+    return df[keep].reset_index(drop=True)
+
+def test_query_matches_filtering_the_full_frame(log_dir, tmp_path):
+    analyzer = LogAnalyzer(log_dir, cache_dir=tmp_path / "cache")
+    since, until = START + timedelta(hours=20), START + timedelta(hours=30)
+    query = LogQuery(since=since, until=until, severities=['error'], regex='TIMEOUT.*db',
+                     ignore_case=True, min_response_time=2100)
+    df = analyzer.query(query)
+
+    expected = expected_rows(analyzer.analyze_logs(), since, until, 'ERROR', 'timeout.*db', 2100)
+    assert len(df) == 9 * 9
+    assert df[['timestamp', 'severity', 'response_time']].equals(
+        expected[['timestamp', 'severity', 'response_time']])
+    assert list(df['message'].cat.categories) == sorted(set(expected['message'].astype(str)),
+                                                        key=list(expected['message'].astype(str)).index)
+
+def test_cached_query_skips_blocks_outside_the_filters(log_dir, tmp_path, monkeypatch):
+    monkeypatch.setitem(Config.CACHE_CONFIG, 'block_rows', 60)
+    analyzer = LogAnalyzer(log_dir, cache_dir=tmp_path / "cache")
+    make_query = lambda: LogQuery(since=START + timedelta(hours=30), until=START + timedelta(hours=32),
+                                  contains='Timeout')
+    first = analyzer.query(make_query())
+
+    parsed = []
+    def tracking_parse_each_file(log_files, *args, **kwargs):
+        parsed.extend(log_files)
+        return parse_each_file(log_files, *args, **kwargs)
+    monkeypatch.setattr(log_analyzer, 'parse_each_file', tracking_parse_each_file)
+    query = make_query()
+    df = analyzer.query(query)
+
+    assert parsed == []
+    assert df.equals(first)
+    assert len(df) == 2 * 9
+    # Only day2.log is opened (by the time index), and only its two hours are read
+    assert (query.blocks_read, query.blocks_total) == (2, 24)
+    assert query.rows_scanned == 120
+
+def test_group_rows_counts_top_groups():
+    df = BatchParser().parse_lines([
+        "2024-03-01 00:00:00 INFO Request served in 10ms response_time=10",
+        "2024-03-01 00:10:00 INFO Request served in 20ms response_time=20",
+        "2024-03-01 01:00:00 INFO Request served in 30ms response_time=30",
+        "2024-03-01 01:30:00 ERROR Disk full",
+    ])
+    result = group_rows(df, ['severity'], top=1)
+    assert result.to_dict('records') == [
+        {'severity': 'INFO', 'count': 3, 'avg_response_time': 20.0, 'max_response_time': 30.0}
+    ]
+    by_hour = group_rows(df, ['hour', 'template'])
+    assert list(by_hour['count']) == [2, 1, 1]
+    assert list(by_hour['template']) == ['Request served in <*>ms', 'Disk full', 'Request served in <*>ms']
+    with pytest.raises(ValueError):
+        group_rows(df, ['host'])
@@ -0,0 +1,75 @@
+import bz2
+import gzip
+import sys
+from pathlib import Path
+import pytest
+sys.path.append(str(Path(__file__).parent.parent / 'src'))
+
+from log_reader import iter_blocks, iter_decompressed_blocks, iter_mapped_blocks, list_log_files
+
+@pytest.fixture
+def log_file(tmp_path):
+    lines = [f"2024-03-12 01:{i % 60:02d}:00 INFO Event number {i}\n" for i in range(2000)]
+    # One line much longer than the block sizes used below, and no trailing newline
+    lines.insert(700, "2024-03-12 02:00:00 WARNING " + "x" * 5000 + "\n")
+    path = tmp_path / "app.log"
+    path.write_text("".join(lines) + "2024-03-12 03:00:00 ERROR unterminated")
+    return path
+
+@pytest.mark.parametrize("block_size", [64, 1000, 1 << 20])
+def test_mapped_blocks_cover_range(log_file, block_size):
+    data = log_file.read_bytes()
+    blocks = list(iter_mapped_blocks(log_file, 0, len(data), block_size))
+
+    assert b"".join(blocks) == data
+    assert all(block.endswith(b"\n") for block in blocks[:-1])
+
+def test_mapped_blocks_match_stream_blocks(log_file):
+    data = log_file.read_bytes()
+    # Start at an offset that is not a multiple of the mmap granularity
+    start = data.index(b"\n", 70000) + 1
+    with open(log_file, 'rb') as f:
+        streamed = b"".join(iter_blocks(f, start, len(data), 4096))
+    mapped = b"".join(iter_mapped_blocks(log_file, start, len(data), 4096))
+
+    assert mapped == streamed == data[start:]
+
+def test_partial_line_is_held_back(log_file):
+    data = log_file.read_bytes()
+    blocks = list(iter_mapped_blocks(log_file, 0, len(data), 4096, include_partial=False))
+
+    assert b"".join(blocks) == data[:data.rindex(b"\n") + 1]
+
+def test_empty_range_yields_nothing(log_file):
+    assert list(iter_mapped_blocks(log_file, 10, 10, 4096)) == []
+
+def compress(data, codec):
+    if codec == 'gz':
+        # Two members, as left by appending to a gzip file
+        return gzip.compress(data[:1000]) + gzip.compress(data[1000:])
+    if codec == 'bz2':
+        return bz2.compress(data)
+    zstandard = pytest.importorskip("zstandard")
+    return zstandard.ZstdCompressor().compress(data)
+
+@pytest.mark.parametrize("codec", ["gz", "bz2", "zst"])
+def test_decompressed_blocks_cover_file(log_file, codec):
+    data = log_file.read_bytes()
+    archive = log_file.with_name(f"app.log.{codec}")
+    archive.write_bytes(compress(data, codec))
+    blocks = list(iter_decompressed_blocks(archive, 1000))
+
+    assert b"".join(blocks) == data
+    assert all(block.endswith(b"\n") for block in blocks[:-1])
+    assert b"".join(iter_decompressed_blocks(archive, 1000, include_partial=False)) == \
+        data[:data.rindex(b"\n") + 1]
+
+def test_list_log_files_includes_archives(tmp_path):
+    for name in ["app.log", "app.log.1", "app.log.1.gz", "app.log.gz", "app.log-20240101.zst",
+                 "old.log.bz2", "notes.txt.gz", "app.logger.gz", "app.login.log.1.gz",
+                 "catalog.log-20240101.bz2", "app.log.logger.gz"]:
+        (tmp_path / name).touch()
+    assert [path.name for path in list_log_files(tmp_path)] == \
+        ["app.log", "app.log-20240101.zst", "app.log.1.gz", "app.log.gz", "app.login.log.1.gz",
+         "catalog.log-20240101.bz2", "old.log.bz2"]
+    assert [path.name for path in list_log_files(tmp_path, compressed=False)] == ["app.log"]
@@ -0,0 +1,163 @@
+import json
+import sys
+from pathlib import Path
+import pytest
+sys.path.append(str(Path(__file__).parent.parent / 'src'))
+
+from log_tailer import LogTailer
+from log_parser import LogParser
+
+LINES = [
+    "2024-03-12 01:15:23 INFO Server started successfully\n",
+    "2024-03-12 01:16:30 WARNING High CPU usage detected response_time=1200.5\n",
+    "2024-03-12 01:17:45 ERROR Database connection failed response_time=8000.0\n",
+]
+
+@pytest.fixture
+def log_dir(tmp_path):
+    log_dir = tmp_path / "logs"
+    log_dir.mkdir()
+    return log_dir
+
+@pytest.fixture
+def state_file(tmp_path):
+    return tmp_path / "state" / "tail_state.json"
+
+def run_cycle(tailer):
+    df = tailer.read_new().to_frame()
+    tailer.commit(df)
+    return df
+
+def test_only_appended_lines_are_parsed(log_dir, state_file):
+    log_file = log_dir / "app.log"
+    log_file.write_text("".join(LINES[:2]))
+    tailer = LogTailer(log_dir, LogParser(), state_file)
+
+    assert len(run_cycle(tailer)) == 2
+    assert len(run_cycle(tailer)) == 0
+
+    with open(log_file, 'a') as f:
+        f.write(LINES[2])
+    df = run_cycle(tailer)
+    assert df['severity'].astype(str).tolist() == ['ERROR']
+    assert tailer.aggregator.to_summary()['total_logs'] == 3
+
+def test_partial_line_waits_for_newline(log_dir, state_file):
+    log_file = log_dir / "app.log"
+    log_file.write_text(LINES[0] + LINES[1].rstrip('\n'))
+    tailer = LogTailer(log_dir, LogParser(), state_file)
+
+    assert len(run_cycle(tailer)) == 1
+    with open(log_file, 'a') as f:
+        f.write("\n")
+    df = run_cycle(tailer)
+    assert df['severity'].astype(str).tolist() == ['WARNING']
+
+def test_truncation_and_replacement_restart_from_zero(log_dir, state_file):
+    log_file = log_dir / "app.log"
+    log_file.write_text("".join(LINES))
+    tailer = LogTailer(log_dir, LogParser(), state_file)
+    assert len(run_cycle(tailer)) == 3
+
+    log_file.write_text(LINES[0])
+    assert len(run_cycle(tailer)) == 1
+
+    # Same size as before but different content
+    log_file.write_text(LINES[1])
+    run_cycle(tailer)
+    log_file.write_text(LINES[1].replace('High', 'Huge'))
+    df = run_cycle(tailer)
+    assert df['message'].str.contains('Huge').tolist() == [True]
+
+def test_rotation_by_rename_resumes_old_file(log_dir, state_file):
+    log_file = log_dir / "app.log"
+    log_file.write_text(LINES[0])
+    tailer = LogTailer(log_dir, LogParser(), state_file)
+    assert len(run_cycle(tailer)) == 1
+
+    with open(log_file, 'a') as f:
+        f.write(LINES[1])
+    log_file.rename(log_dir / "app-1.log")
+    log_file.write_text(LINES[2])
+
+    df = run_cycle(tailer)
+    assert sorted(df['severity'].astype(str)) == ['ERROR', 'WARNING']
+
+def test_state_survives_restart(log_dir, state_file):
+    log_file = log_dir / "app.log"
+    log_file.write_text("".join(LINES[:2]))
+    run_cycle(LogTailer(log_dir, LogParser(), state_file))
+
+    with open(log_file, 'a') as f:
+        f.write(LINES[2])
+    tailer = LogTailer(log_dir, LogParser(), state_file)
+    assert len(run_cycle(tailer)) == 1
+
+    summary = tailer.aggregator.to_summary()
+    assert summary['total_logs'] == 3
+    assert summary['error_count'] == 1
+    assert summary['max_response_time'] == pytest.approx(8000.0)
+    # Sketches cover the rows of both cycles
+    assert summary['p50_response_time'] == pytest.approx(1200.5, rel=0.01)
+    assert summary['distinct_messages'] == 3
+    # Sketches live in a binary sidecar, not in the JSON state
+    assert 'sketches' not in json.loads(state_file.read_text())['aggregates']
+    assert state_file.with_suffix('.sketches.npz').exists()
+
+def test_tailer_without_sketches(log_dir, state_file):
+    (log_dir / "app.log").write_text("".join(LINES))
+    tailer = LogTailer(log_dir, LogParser(), state_file, sketches=False)
+    run_cycle(tailer)
+    assert tailer.aggregator.sketches is None
+    assert not state_file.with_suffix('.sketches.npz').exists()
+    assert LogTailer(log_dir, LogParser(), state_file, sketches=False).aggregator.total == 3
+
+def test_read_new_limited_to_changed_paths(log_dir, state_file):
+    first, second = log_dir / "a.log", log_dir / "b.log"
+    first.write_text(LINES[0])
+    second.write_text(LINES[1])
+    tailer = LogTailer(log_dir, LogParser(), state_file)
+    assert len(run_cycle(tailer)) == 2
+
+    with open(first, 'a') as f:
+        f.write(LINES[2])
+    with open(second, 'a') as f:
+        f.write(LINES[2])
+    df = tailer.read_new([first]).to_frame()
+    tailer.commit(df)
+    assert len(df) == 1
+    # The other file keeps its checkpoint and is picked up later
+    assert str(second) in tailer.checkpoints
+    assert len(run_cycle(tailer)) == 1
+
+def test_excluded_files_are_never_read(log_dir, state_file):
+    app, own = log_dir / "app.log", log_dir / "alerts.log"
+    app.write_text(LINES[0])
+    own.write_text(LINES[2])
+    tailer = LogTailer(log_dir, LogParser(), state_file)
+
+    # Both on a rescan and when the file is reported as changed
+    df = tailer.read_new(exclude={own.resolve()}).to_frame()
+    tailer.commit(df)
+    assert list(df['severity']) == ['INFO']
+    assert len(tailer.read_new([own], exclude={own.resolve()})) == 0
+
+def test_skip_existing_checkpoints_at_last_complete_line(log_dir, state_file):
+    log_file = log_dir / "app.log"
+    log_file.write_text(LINES[0] + LINES[1] + LINES[2].rstrip('\n'))
+    tailer = LogTailer(log_dir, LogParser(), state_file)
+    tailer.skip_existing()
+    assert state_file.exists()
+
+    with open(log_file, 'a') as f:
+        f.write('\n' + LINES[0])
+    df = run_cycle(LogTailer(log_dir, LogParser(), state_file))
+    assert list(df['severity']) == ['ERROR', 'INFO']
+
+def test_live_files_are_not_memory_mapped(log_dir, state_file, monkeypatch):
+    import mmap
+    def no_mmap(*args, **kwargs):
+        raise AssertionError("tailing must not mmap files that may be truncated")
+    monkeypatch.setattr(mmap, 'mmap', no_mmap)
+    (log_dir / "app.log").write_text("".join(LINES))
+    assert len(run_cycle(LogTailer(log_dir, LogParser(), state_file))) == 3
@@ -0,0 +1,89 @@
+import sys
+import threading
+import time
+from pathlib import Path
+import pytest
+sys.path.append(str(Path(__file__).parent.parent / 'src'))
+
+from config import Config
+from log_watcher import InotifyWatcher, PollingWatcher, create_watcher
+
+LINE = "2024-03-12 01:17:45 ERROR Database connection failed response_time=8000.0\n"
+
+def make_watcher(mode, log_dir):
+    if mode == 'polling':
+        return PollingWatcher(log_dir, interval=0.01)
+    try:
+        return InotifyWatcher(log_dir)
+    except OSError:
+        pytest.skip("inotify is not available")
+
+@pytest.fixture
+def log_dir(tmp_path):
+    log_dir = tmp_path / "logs"
+    log_dir.mkdir()
+    return log_dir
+
+@pytest.mark.parametrize('mode', ['polling', 'inotify'])
+def test_wait_reports_appended_files(mode, log_dir):
+    log_file = log_dir / "app.log"
+    log_file.write_text(LINE)
+    watcher = make_watcher(mode, log_dir)
+    try:
+        assert watcher.wait(0.05) == set()
+        with open(log_file, 'a') as f:
+            f.write(LINE)
+        (log_dir / "notes.txt").write_text("ignored")
+        assert watcher.wait(2) == {log_file}
+    finally:
+        watcher.close()
+
+@pytest.mark.parametrize('mode', ['polling', 'inotify'])
+def test_wait_requests_rescan_after_rotation(mode, log_dir):
+    log_file = log_dir / "app.log"
+    log_file.write_text(LINE)
+    watcher = make_watcher(mode, log_dir)
+    try:
+        log_file.rename(log_dir / "app-1.log")
+        log_file.write_text(LINE)
+        assert watcher.wait(2) is None
+    finally:
+        watcher.close()
+
+def test_create_watcher_falls_back_to_polling(log_dir):
+    assert create_watcher(log_dir, use_inotify=False).mode == 'polling'
+
+def test_service_watch_alerts_on_appended_lines(tmp_path, log_dir, monkeypatch):
+    monkeypatch.setattr(Config, 'LOGS_DIR', log_dir)
+    monkeypatch.setattr(Config, 'REPORTS_DIR', tmp_path / "reports")
+    monkeypatch.setattr(Config, 'VISUALIZATIONS_DIR', tmp_path / "visualizations")
+    monkeypatch.setattr(Config, 'HISTORY_CONFIG', {**Config.HISTORY_CONFIG, 'path': tmp_path / "state" / "history.db"})
+    watch_config = {**Config.WATCH_CONFIG, 'state_file': tmp_path / "state" / "watch.json",
+                    'poll_interval': 0.01, 'wait_timeout': 0.05}
+    monkeypatch.setattr(Config, 'WATCH_CONFIG', watch_config)
+    from main import LogAnalyzerService
+
+    log_file = log_dir / "app.log"
+    log_file.write_text(LINE)
+    service = LogAnalyzerService()
+    batches = []
+    stop = threading.Event()
+    thread = threading.Thread(target=service.watch, args=(stop, lambda df, alerts: batches.append(alerts)))
+    thread.start()
+    try:
+        deadline = time.monotonic() + 5
+        # Existing content is skipped on the first run
+        while not watch_config['state_file'].exists() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        with open(log_file, 'a') as f:
+            f.write(LINE.replace('Database', 'Cache'))
+        while not batches and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        stop.set()
+        thread.join(5)
+        service.alert_system.close()
+
+    alerts = [alert for batch in batches for alert in batch]
+    assert len(alerts) == 1
+    assert 'Cache connection failed' in alerts[0]['message']
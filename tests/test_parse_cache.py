@@ -0,0 +1,160 @@
+import gzip
+import os
+import sys
+from datetime import datetime
+from pathlib import Path
+import numpy as np
+import pytest
+sys.path.append(str(Path(__file__).parent.parent / 'src'))
+
+import log_analyzer
+from config import Config
+from ingestion import parse_each_file, parse_files
+from log_analyzer import LogAnalyzer
+from parse_cache import ParseCache
+
+LINES = [
+    "2024-03-12 01:00:00 INFO Request ok response_time=12.5",
+    "2024-03-12 01:00:01 WARNING Slow disk",
+    "2024-03-12 01:00:02 ERROR Timeout response_time=7000",
+    "no timestamp here",
+]
+
+@pytest.fixture
+def log_dir(tmp_path):
+    log_dir = tmp_path / "logs"
+    log_dir.mkdir()
+    (log_dir / "a.log").write_text("\n".join(LINES * 20) + "\n")
+    (log_dir / "b.log").write_text("\n".join(LINES[:2]))
+    return log_dir
+
+def test_round_trip(log_dir, tmp_path):
+    cache = ParseCache(tmp_path / "cache")
+    log_file = log_dir / "a.log"
+    columns = parse_files([log_file])
+
+    assert cache.load(log_file) is None
+    cache.store(log_file, columns)
+    assert cache.load(log_file).to_frame().equals(columns.to_frame())
+
+def test_changed_file_misses_and_replaces_entry(log_dir, tmp_path):
+    cache = ParseCache(tmp_path / "cache")
+    log_file = log_dir / "b.log"
+    cache.store(log_file, parse_files([log_file]))
+    with open(log_file, 'a') as f:
+        f.write("\n" + LINES[2])
+
+    assert cache.load(log_file) is None
+    cache.store(log_file, parse_files([log_file]))
+    assert len(list(cache.cache_dir.iterdir())) == 1
+    assert len(cache.load(log_file)) == 3
+
+def test_parser_config_changes_miss(log_dir, tmp_path, monkeypatch):
+    cache = ParseCache(tmp_path / "cache")
+    log_file = log_dir / "a.log"
+    cache.store(log_file, parse_files([log_file]))
+    key = cache.fingerprint(log_file)
+
+    monkeypatch.setitem(Config.LOG_PATTERNS, 'response_time', r'rt=(\d+)')
+    assert cache.fingerprint(log_file) != key
+    assert cache.load(log_file) is None
+    monkeypatch.undo()
+    monkeypatch.setattr(Config, 'SEVERITY_LEVELS', [*Config.SEVERITY_LEVELS, 'CRITICAL'])
+    assert cache.fingerprint(log_file) != key
+    monkeypatch.undo()
+    assert cache.load(log_file) is not None
+
+def test_evicts_least_recently_used(log_dir, tmp_path):
+    cache = ParseCache(tmp_path / "cache")
+    for name in ("a.log", "b.log"):
+        cache.store(log_dir / name, parse_files([log_dir / name]))
+    entries = sorted(cache.cache_dir.iterdir(), key=lambda entry: entry.stat().st_size)
+    # Make the larger entry the least recently used one
+    os.utime(entries[1], ns=(0, 0))
+    cache.max_bytes = entries[0].stat().st_size
+
+    assert cache.evict() == 1
+    assert list(cache.cache_dir.iterdir()) == entries[:1]
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_parse_each_file_splits_by_file(log_dir, workers):
+    log_files = sorted(log_dir.glob('*.log'))
+    per_file = dict(parse_each_file(log_files, workers, chunk_size=200))
+
+    assert list(per_file) == [str(log_file) for log_file in log_files]
+    for log_file in log_files:
+        expected = parse_files([log_file]).to_frame()
+        assert per_file[str(log_file)].to_frame().equals(expected)
+
+def test_analyze_logs_only_parses_changed_files(log_dir, tmp_path, monkeypatch):
+    analyzer = LogAnalyzer(log_dir, cache_dir=tmp_path / "cache")
+    first = analyzer.analyze_logs()
+
+    parsed = []
+    def tracking_parse_each_file(log_files, *args, **kwargs):
+        parsed.extend(log_files)
+        return parse_each_file(log_files, *args, **kwargs)
+    monkeypatch.setattr(log_analyzer, 'parse_each_file', tracking_parse_each_file)
+
+    assert analyzer.analyze_logs().equals(first)
+    assert parsed == []
+
+    with open(log_dir / "b.log", 'a') as f:
+        f.write("\n" + LINES[2])
+    df = analyzer.analyze_logs()
+    assert parsed == [log_dir / "b.log"]
+    assert len(df) == len(first) + 1
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_archives_parse_like_plain_files_and_are_cached(log_dir, tmp_path, monkeypatch, workers):
+    plain = LogAnalyzer(log_dir, cache_dir=tmp_path / "plain_cache").analyze_logs()
+    for log_file in log_dir.glob('*.log'):
+        log_file.with_name(log_file.name + '.gz').write_bytes(gzip.compress(log_file.read_bytes()))
+        log_file.unlink()
+    analyzer = LogAnalyzer(log_dir, cache_dir=tmp_path / "cache")
+    assert analyzer.analyze_logs(workers=workers).equals(plain)
+
+    parsed = []
+    def tracking_parse_each_file(log_files, *args, **kwargs):
+        parsed.extend(log_files)
+        return parse_each_file(log_files, *args, **kwargs)
+    monkeypatch.setattr(log_analyzer, 'parse_each_file', tracking_parse_each_file)
+    # Also from the cache when a time range is given, as archives are read in full
+    assert len(analyzer.analyze_logs(since=datetime(2024, 3, 12, 1, 0, 1))) == 41
+    assert parsed == []
+
+def test_load_reads_only_selected_blocks(log_dir, tmp_path, monkeypatch):
+    monkeypatch.setitem(Config.CACHE_CONFIG, 'block_rows', 16)
+    cache = ParseCache(tmp_path / "cache")
+    log_file = log_dir / "a.log"
+    columns = parse_files([log_file])
+    cache.store(log_file, columns)
+
+    seen = []
+    def second_and_fourth(stats):
+        seen.append(stats)
+        return np.arange(len(stats['min_time'])) % 2 == 1
+    loaded = cache.load(log_file, blocks=second_and_fourth)
+
+    assert len(seen[0]['min_time']) == 5
+    assert list(seen[0]['severities']) == [0b111] * 5
+    rows = np.concatenate([np.arange(16, 32), np.arange(48, 64)])
+    assert loaded.to_frame().equals(columns.to_frame(rows))
+
+def test_feather_pruned_loads_match_full_loads(log_dir, tmp_path, monkeypatch):
+    pa = pytest.importorskip('pyarrow')
+    monkeypatch.setitem(Config.CACHE_CONFIG, 'block_rows', 16)
+    cache = ParseCache(tmp_path / "cache")
+    log_file = log_dir / "a.log"
+    cache.store(log_file, parse_files([log_file]))
+    [entry] = cache.cache_dir.iterdir()
+    assert entry.suffix == '.feather'
+    with pa.memory_map(str(entry)) as source:
+        assert pa.ipc.open_file(source).num_record_batches == 5
+
+    full = cache.load(log_file).to_frame()
+    assert cache.load(log_file, blocks=lambda stats: np.ones(5, dtype=bool)).to_frame().equals(full)
+    odd = cache.load(log_file, blocks=lambda stats: np.arange(5) % 2 == 1).to_frame()
+    rows = np.concatenate([np.arange(16, 32), np.arange(48, 64)])
+    assert odd.reset_index(drop=True).equals(full.iloc[rows].reset_index(drop=True))
+    assert len(cache.load(log_file, blocks=lambda stats: np.zeros(5, dtype=bool))) == 0
@@ -0,0 +1,83 @@
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import pytest
+sys.path.append(str(Path(__file__).parent.parent / 'src'))
+
+from config import Config
+from log_parser import LogParser
+from log_tailer import LogTailer
+from rollups import Rollup
+
+START = datetime(2024, 3, 12, 1, 0, 0)
+
+@pytest.fixture
+def sample_df():
+    rng = np.random.default_rng(7)
+    size = 2000
+    response_times = rng.uniform(50, 9000, size)
+    response_times[rng.random(size) < 0.3] = np.nan
+    return pd.DataFrame({
+        'timestamp': [START + timedelta(seconds=int(s)) for s in rng.integers(0, 3 * 86400, size)],
+        'severity': pd.Categorical(rng.choice(Config.SEVERITY_LEVELS, size), categories=Config.SEVERITY_LEVELS),
+        'message': ['event'] * size,
+        'response_time': response_times.astype(np.float32),
+    })
+
+def test_from_frame_matches_raw_aggregates(sample_df):
+    rollup = Rollup.from_frame(sample_df)
+    minutes = sample_df['timestamp'].dt.floor('1min')
+
+    expected = pd.crosstab(minutes, sample_df['severity'])
+    assert (rollup.frame[Config.SEVERITY_LEVELS].to_numpy() == expected.to_numpy()).all()
+    grouped = sample_df['response_time'].groupby(minutes)
+    assert np.allclose(rollup.frame['response_time_sum'], grouped.sum())
+    assert (rollup.frame['response_time_count'].to_numpy() == grouped.count().to_numpy()).all()
+    assert np.allclose(rollup.frame['response_time_max'], grouped.max(), equal_nan=True)
+    assert rollup.severity_totals().to_dict() == sample_df['severity'].value_counts().to_dict()
+
+def test_hourly_counts_match_crosstab(sample_df):
+    expected = pd.crosstab(sample_df['timestamp'].dt.hour, sample_df['severity'])
+    assert (Rollup.from_frame(sample_df).hourly_counts().to_numpy() == expected.to_numpy()).all()
+
+def test_merge_equals_rollup_of_all_rows(sample_df):
+    merged = Rollup.from_frame(sample_df.iloc[:700]).merge(Rollup.from_frame(sample_df.iloc[700:]))
+    pd.testing.assert_frame_equal(merged.frame, Rollup.from_frame(sample_df).frame, check_dtype=False)
+
+def test_save_and_load_round_trip(sample_df, tmp_path):
+    rollup = Rollup.from_frame(sample_df)
+    rollup.save(tmp_path / "rollup.npz")
+    loaded = Rollup.load(tmp_path / "rollup.npz")
+    assert loaded.bucket == rollup.bucket
+    pd.testing.assert_frame_equal(loaded.frame, rollup.frame)
+
+def test_series_is_coarsened_for_long_ranges():
+    df = pd.DataFrame({
+        'timestamp': [START, START + timedelta(days=30)],
+        'severity': ['INFO', 'ERROR'],
+        'response_time': [100.0, None],
+    })
+    series = Rollup.from_frame(df).series(max_points=1500)
+    assert len(series) < 1500
+    assert series[Config.SEVERITY_LEVELS].to_numpy().sum() == 2
+    assert series['response_time_mean'].iloc[0] == pytest.approx(100.0)
+
+def test_tailer_persists_rollup(tmp_path):
+    log_dir = tmp_path / "logs"
+    log_dir.mkdir()
+    log_file = log_dir / "app.log"
+    log_file.write_text("2024-03-12 01:15:23 INFO Server started\n")
+    state_file = tmp_path / "state" / "tail_state.json"
+
+    tailer = LogTailer(log_dir, LogParser(), state_file, rollups=True)
+    tailer.commit(tailer.read_new().to_frame())
+    with open(log_file, 'a') as f:
+        f.write("2024-03-12 01:15:50 ERROR Database connection failed response_time=8000.0\n")
+    tailer = LogTailer(log_dir, LogParser(), state_file, rollups=True)
+    tailer.commit(tailer.read_new().to_frame())
+
+    restored = LogTailer(log_dir, LogParser(), state_file, rollups=True).rollup
+    assert restored.frame.loc[pd.Timestamp('2024-03-12 01:15'), ['INFO', 'ERROR']].tolist() == [1, 1]
+    assert restored.frame['response_time_max'].iloc[0] == pytest.approx(8000.0)
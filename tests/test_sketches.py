@@ -0,0 +1,60 @@
+import sys
+from pathlib import Path
+import numpy as np
+import pytest
+sys.path.append(str(Path(__file__).parent.parent / 'src'))
+
+from sketches import DDSketch, HyperLogLog, TimeSketches
+
+def test_quantiles_within_relative_accuracy_and_merge_exactly():
+    values = np.random.default_rng(0).lognormal(5, 1.5, 100000)
+    whole = DDSketch(0.01).add(values)
+    for q in (0.5, 0.95, 0.99):
+        exact = np.quantile(values, q, method='lower')
+        assert whole.quantile(q) == pytest.approx(exact, rel=0.01)
+
+    merged = DDSketch(0.01).add(values[:30000]).merge(DDSketch(0.01).add(values[30000:]))
+    assert merged.to_dict() == whole.to_dict()
+    assert DDSketch.from_dict(whole.to_dict()).quantile(0.99) == whole.quantile(0.99)
+    with pytest.raises(ValueError):
+        whole.merge(DDSketch(0.05))
+
+def test_distinct_count_estimate_and_union():
+    first = HyperLogLog(12).add(f"message {i}" for i in range(20000))
+    second = HyperLogLog(12).add(f"message {i}".encode() for i in range(10000, 40000))
+
+    assert first.estimate() == pytest.approx(20000, rel=4 * first.relative_error)
+    union = HyperLogLog.from_dict(first.to_dict()).merge(second)
+    assert union.estimate() == pytest.approx(40000, rel=4 * first.relative_error)
+    # Small sets are counted exactly enough to be useful as they are
+    assert HyperLogLog().add(["a", "b", "a"]).estimate() == 2
+
+def test_time_buckets_answer_ranges(tmp_path):
+    hour = 3600
+    seconds = np.array([0, 10, hour + 5, 2 * hour + 1, -2**63], dtype=np.int64)
+    response_times = np.array([10.0, 20.0, 1000.0, np.nan, 5.0])
+    sketches = TimeSketches('1h')
+    sketches.update(seconds, response_times, np.array([0, 1, 0, 2, 0], dtype=np.int32),
+                    HyperLogLog.hash_values(["a", "b", "c"]))
+
+    assert set(sketches.buckets) == {0, hour, 2 * hour, None}
+    response_sketch, message_sketch = sketches.combined(since=hour, until=2 * hour)
+    assert response_sketch.count == 1
+    assert response_sketch.quantile(0.5) == 1000.0
+    assert message_sketch.estimate() == 1
+    assert sketches.summary()['distinct_messages'] == 3
+
+    restored = TimeSketches.from_dict(sketches.to_dict())
+    assert restored.summary() == sketches.summary()
+    sketches.save(tmp_path / "sketches.npz")
+    loaded = TimeSketches.load(tmp_path / "sketches.npz")
+    assert loaded.to_dict() == sketches.to_dict()
+
+def test_old_buckets_expire_into_the_total():
+    sketches = TimeSketches('1h', max_buckets=2)
+    for hour in range(4):
+        sketches.update([hour * 3600], [float(hour + 1)])
+
+    assert sorted(sketches.buckets) == [2 * 3600, 3 * 3600]
+    assert sketches.combined()[0].count == 4
+    assert sketches.combined(since=0)[0].count == 2
@@ -0,0 +1,70 @@
+import sys
+from pathlib import Path
+import pytest
+import pandas as pd
+from datetime import datetime
+sys.path.append(str(Path(__file__).parent.parent / 'src'))
+
+from summary_aggregator import SummaryAggregator
+from log_columns import LogColumns
+from log_parser import LogParser
+
+@pytest.fixture
+def sample_df():
+    return pd.DataFrame([
+        {'timestamp': datetime(2024, 3, 12, 1, 15, 23), 'severity': 'INFO', 'response_time': None},
+        {'timestamp': datetime(2024, 3, 12, 1, 15, 24), 'severity': 'INFO', 'response_time': 50.2},
+        {'timestamp': datetime(2024, 3, 12, 1, 16, 30), 'severity': 'WARNING', 'response_time': 1200.5},
+        {'timestamp': datetime(2024, 3, 12, 1, 17, 45), 'severity': 'ERROR', 'response_time': 8000.0},
+    ])
+
+def test_summary_matches_dataframe(sample_df):
+    aggregator = SummaryAggregator()
+    aggregator.update_frame(sample_df)
+    summary = aggregator.to_summary()
+
+    assert summary['total_logs'] == 4
+    assert summary['error_count'] == 1
+    assert summary['warning_count'] == 1
+    assert summary['info_count'] == 2
+    assert summary['avg_response_time'] == pytest.approx(sample_df['response_time'].mean())
+    assert summary['max_response_time'] == 8000.0
+    assert summary['start_time'] == sample_df['timestamp'].min()
+    assert summary['end_time'] == sample_df['timestamp'].max()
+    assert summary['p50_response_time'] == pytest.approx(1200.5, rel=0.01)
+    assert summary['distinct_messages'] == 0
+
+def test_merge_equals_single_pass(sample_df):
+    whole = SummaryAggregator()
+    whole.update_frame(sample_df)
+
+    first, second = SummaryAggregator(), SummaryAggregator()
+    first.update_frame(sample_df.iloc[:2])
+    second.update_frame(sample_df.iloc[2:])
+    first.merge(second)
+
+    assert first.to_summary() == whole.to_summary()
+
+def test_round_trip_through_dict(sample_df):
+    aggregator = SummaryAggregator()
+    aggregator.update_frame(sample_df)
+    restored = SummaryAggregator.from_dict(aggregator.to_dict())
+    assert restored.to_summary() == aggregator.to_summary()
+
+def test_line_and_column_updates_agree():
+    parser = LogParser()
+    lines = [
+        b"2024-03-12 01:15:23 INFO Server started successfully",
+        b"2024-03-12 01:16:30 WARNING High CPU usage detected response_time=1200.5",
+        b"No timestamp here",
+    ]
+    by_line = SummaryAggregator()
+    for line in lines:
+        by_line.update(parser.parse_fields(line))
+
+    columns = LogColumns()
+    columns.add_lines(lines, parser.parse_fields)
+    by_block = SummaryAggregator()
+    by_block.update_columns(columns)
+
+    assert by_line.to_summary() == by_block.to_summary()
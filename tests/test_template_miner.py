@@ -0,0 +1,96 @@
+import sys
+from pathlib import Path
+import pandas as pd
+sys.path.append(str(Path(__file__).parent.parent / 'src'))
+
+from config import Config
+from log_analyzer import LogAnalyzer
+from template_miner import TemplateMiner
+
+LINES = [
+    ("2024-03-12 01:15:23 ERROR Database connection failed response_time=8000.0", 'ERROR'),
+    ("2024-03-12 01:15:24 ERROR Database connection failed response_time=6500.5", 'ERROR'),
+    ("2024-03-12 01:15:25 INFO User 42 logged in from 10.0.0.1", 'INFO'),
+    ("2024-03-12 01:15:26 INFO User 7 logged in from 10.0.0.2", 'INFO'),
+    ("2024-03-12 01:15:27 INFO Cache refreshed for region eu", 'INFO'),
+    ("2024-03-12 01:15:28 INFO Cache refreshed for region us", 'INFO'),
+    ("2024-03-12 01:15:29 WARNING High CPU usage detected", 'WARNING'),
+]
+
+def frame(lines):
+    return pd.DataFrame({
+        'message': [line for line, _ in lines],
+        'severity': pd.Categorical([severity for _, severity in lines],
+                                   categories=Config.SEVERITY_LEVELS),
+    })
+
+def test_similar_messages_share_a_template():
+    miner = TemplateMiner()
+    ids = miner.add_frame(frame(LINES))
+
+    assert list(ids) == [0, 0, 1, 1, 2, 2, 3]
+    assert miner.template(0) == "Database connection failed response_time=<*>"
+    assert miner.template(1) == "User <*> logged in from <*>"
+    assert miner.template(2) == "Cache refreshed for region <*>"
+    assert miner.parameters(LINES[2][0], 1) == ['42', '10.0.0.1']
+    assert miner.match("2024-03-13 00:00:00 INFO Cache refreshed for region ap") == 2
+    assert miner.match("Something else entirely") is None
+
+def test_top_templates_per_severity_and_round_trip():
+    miner = TemplateMiner()
+    miner.add_frame(frame(LINES * 3))
+    top = miner.top_templates(1)
+
+    assert top['ERROR'] == [{'template_id': 0, 'count': 6,
+                             'template': "Database connection failed response_time=<*>"}]
+    assert [entry['count'] for entry in top['INFO']] == [6]
+    assert top['WARNING'][0]['template'] == "High CPU usage detected"
+
+    restored = TemplateMiner.from_dict(miner.to_dict())
+    assert restored.to_dict() == miner.to_dict()
+    # The prefix tree is rebuilt, so new messages land on the same IDs
+    assert restored.add("2024-03-14 00:00:00 INFO User 99 logged in from 10.0.0.9", 0) == 1
+
+def test_restored_tree_matches_the_original():
+    # Shallow and narrow, so templates share wildcard branches and are generalized there
+    miner = TemplateMiner(depth=4, max_children=2)
+    for message in ["open a.txt ok", "open b.txt ok", "close b.txt ok", "close c.txt ok",
+                    "stat a.txt ok", "stat a.txt failed", "stat x.txt failed"]:
+        miner.add(message)
+
+    # Templates go back on their own branches, even with another max_children now
+    restored = TemplateMiner.from_dict(miner.to_dict(), depth=4)
+    assert restored.root == miner.root
+    for message in ["open z.txt ok", "close b.txt ok", "stat q.txt failed", "mkdir z ok"]:
+        assert restored.match(message) == miner.match(message)
+
+def test_categorical_messages_mine_like_plain_strings():
+    plain, categorical = TemplateMiner(), TemplateMiner()
+    df = frame(LINES * 3)
+    plain_ids = plain.add_frame(df)
+    df['message'] = df['message'].astype('category')
+    categorical_ids = categorical.add_frame(df)
+
+    assert list(categorical_ids) == list(plain_ids)
+    assert categorical.to_dict() == plain.to_dict()
+
+def test_summaries_include_top_templates(tmp_path):
+    log_dir = tmp_path / "logs"
+    log_dir.mkdir()
+    log_file = log_dir / "app.log"
+    log_file.write_text("\n".join(line for line, _ in LINES) + "\n")
+    analyzer = LogAnalyzer(log_dir, cache_dir=tmp_path / "cache")
+
+    summary = analyzer.generate_summary(analyzer.analyze_logs())
+    assert summary['top_templates']['INFO'][0]['count'] == 2
+
+    state_file = tmp_path / "state" / "tail.json"
+    df, summary = analyzer.analyze_incremental(state_file)
+    assert df['template_id'].tolist() == [0, 0, 1, 1, 2, 2, 3]
+    analyzer.tailer.commit()
+    with open(log_file, 'a') as f:
+        f.write("2024-03-12 01:16:00 ERROR Database connection failed response_time=9000.0\n")
+    # A new analyzer resumes the persisted templates
+    df, summary = LogAnalyzer(log_dir, cache_dir=tmp_path / "cache").analyze_incremental(state_file)
+    assert df['template_id'].tolist() == [0]
+    assert summary['top_templates']['ERROR'][0]['count'] == 3
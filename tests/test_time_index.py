@@ -0,0 +1,85 @@
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+import pytest
+sys.path.append(str(Path(__file__).parent.parent / 'src'))
+
+from ingestion import parse_files
+from log_analyzer import LogAnalyzer
+from time_index import TimeIndex
+
+START = datetime(2024, 3, 1)
+
+def write_log(path, hours, first_hour=0):
+    lines = [
+        f"{(START + timedelta(hours=hour, seconds=second)):%Y-%m-%d %H:%M:%S} "
+        f"{'ERROR' if second % 7 == 0 else 'INFO'} Event {hour}/{second} response_time={second}.5"
+        for hour in range(first_hour, first_hour + hours)
+        for second in range(0, 3600, 60)
+    ]
+    path.write_text("\n".join(lines) + "\n")
+
+@pytest.fixture
+def log_dir(tmp_path):
+    log_dir = tmp_path / "logs"
+    log_dir.mkdir()
+    write_log(log_dir / "day1.log", 24)
+    write_log(log_dir / "day2.log", 24, first_hour=24)
+    return log_dir
+
+def test_spans_cover_only_the_requested_hour(log_dir, tmp_path):
+    index = TimeIndex(tmp_path / "index", block_size=4096)
+    log_file = log_dir / "day2.log"
+    since = START + timedelta(hours=30)
+    spans = index.spans(log_file, since, since + timedelta(hours=1))
+    data = log_file.read_bytes()
+
+    assert sum(end - start for start, end in spans) < len(data) / 8
+    rows = parse_files([log_file], spans=lambda path: spans).to_frame()
+    in_range = rows[(rows['timestamp'] >= since) & (rows['timestamp'] < since + timedelta(hours=1))]
+    assert len(in_range) == 60
+    assert index.spans(log_dir / "day1.log", since) == []
+
+def test_index_is_extended_after_append(log_dir, tmp_path):
+    index = TimeIndex(tmp_path / "index", block_size=4096)
+    log_file = log_dir / "day1.log"
+    blocks = index.get(log_file)['blocks']
+    with open(log_file, 'a') as f:
+        f.write("2024-03-05 00:00:00 INFO Late entry\n2024-03-05 00:00:01 INFO partial")
+
+    updated = index.get(log_file)
+    assert updated['blocks'][:len(blocks) - 1] == blocks[:-1]
+    assert updated['blocks'][-1][3] == "2024-03-05 00:00:00"
+    # The unterminated last line is not indexed but is always read
+    spans = index.spans(log_file, datetime(2024, 3, 5))
+    assert spans[-1][1] == log_file.stat().st_size
+
+def test_replaced_file_is_reindexed(log_dir, tmp_path):
+    index = TimeIndex(tmp_path / "index", block_size=4096)
+    log_file = log_dir / "day1.log"
+    index.get(log_file)
+    log_file.write_text("2024-04-01 00:00:00 INFO Replaced\n")
+
+    assert index.get(log_file)['blocks'] == [[0, 34, "2024-04-01 00:00:00", "2024-04-01 00:00:00"]]
+
+def test_non_ascii_timestamps_widen_the_range(tmp_path):
+    index = TimeIndex(tmp_path / "index")
+    block = "2024-03-01 10:00:00 INFO é\n٢٠٢٤-٠٣-٠١ 09:00:00 INFO arabic digits\n".encode()
+    assert index.block_range(block) == ("2024-03-01 09:00:00", "2024-03-01 10:00:00")
+
+@pytest.mark.parametrize("use_cache", [True, False])
+def test_analyze_logs_time_range_matches_filtered_frame(log_dir, tmp_path, use_cache):
+    analyzer = LogAnalyzer(log_dir, cache_dir=tmp_path / "cache")
+    analyzer.time_index.block_size = 4096
+    if not use_cache:
+        analyzer.cache = None
+    full = analyzer.analyze_logs()
+    since, until = START + timedelta(hours=23, minutes=30), START + timedelta(hours=25)
+    expected = full[(full['timestamp'] >= since) & (full['timestamp'] < until)].reset_index(drop=True)
+    # Only messages of the rows read are interned
+    expected['message'] = expected['message'].cat.remove_unused_categories()
+
+    assert analyzer.analyze_logs(since=since, until=until).equals(expected)
+    summary = analyzer.summarize_logs(since=since, until=until)
+    assert summary['total_logs'] == len(expected) == 90
+    assert summary['error_count'] == (expected['severity'] == 'ERROR').sum()
@@ -78,4 +78,33 @@ def test_visualization_style(test_visualizer):
     assert plt.style.available
     test_visualizer.setup_style()
     # Current style should match config
-    assert plt.style.available
\ No newline at end of file
+    assert plt.style.available
+
+def test_unchanged_charts_are_not_rendered_again(test_visualizer, sample_df):
+    assert all(test_visualizer.generate_all_visualizations(sample_df).values())
+    paths = [test_visualizer.output_dir / f"{name}.png"
+             for name in ['severity_distribution', 'time_series', 'hourly_distribution']]
+    mtimes = [path.stat().st_mtime_ns for path in paths]
+
+    assert all(test_visualizer.generate_all_visualizations(sample_df).values())
+    assert [path.stat().st_mtime_ns for path in paths] == mtimes
+
+    # Only the charts whose input changed are drawn again
+    changed = sample_df.copy()
+    changed.loc[0, 'response_time'] = 9999.0
+    test_visualizer.generate_all_visualizations(changed)
+    new_mtimes = [path.stat().st_mtime_ns for path in paths]
+    assert new_mtimes[0] == mtimes[0]
+    assert new_mtimes[1] != mtimes[1]
+
+def test_in_process_and_pool_rendering_match(tmp_path, sample_df):
+    outputs = {}
+    for workers in (1, 2):
+        visualizer = LogVisualizer(tmp_path / f"workers_{workers}", workers=workers)
+        try:
+            assert all(visualizer.generate_all_visualizations(sample_df).values())
+        finally:
+            visualizer.close()
+        outputs[workers] = sorted(path.name for path in visualizer.output_dir.glob('*.png'))
+    assert outputs[1] == outputs[2] == ['hourly_distribution.png', 'severity_distribution.png',
+                                        'time_series.png']